@@ -1,73 +1,52 @@
-import cv2
-import mediapipe as mp
+from devwell.startup import StartupProfile
+
+# Heavy modules that are only needed later (pandas/matplotlib for reports,
+# pyttsx3/plyer for alerts, mediapipe for tracking) are imported on first use
+startup = StartupProfile()
+with startup.phase("import Qt"):
+    from PyQt5 import QtWidgets, QtGui, QtCore
+with startup.phase("import cv2"):
+    import cv2
+    import numpy as np
 import time
 import sqlite3
-import pyttsx3
-import threading
 import datetime
-import pandas as pd
-import matplotlib.pyplot as plt
-from pynput import keyboard, mouse
-from PyQt5 import QtWidgets, QtGui, QtCore
-from plyer import notification
+import threading
 import random
 import sys
 import os
-import numpy as np
-from matplotlib.backends.backend_qt5agg import FigureCanvas
 import traceback
 
-class DevWellApp(QtWidgets.QMainWindow):
+with startup.phase("import devwell"):
+    from devwell import alerts
+    from devwell.activity import ActivityAggregator, InputCounter
+    from devwell.alerts import AlertDispatcher
+    from devwell.capture import BACKENDS, PIXEL_FORMATS, Camera, camera_options
+    from devwell.detectors import VisionDetectors
+    from devwell.pipeline import FramePipeline
+    from devwell.preview import PreviewBuffer
+    from devwell.recording import LandmarkRecorder
+    from devwell.storage import ActivityWriter, BlinkWriter, Database, UserWriter, load_users
+
+class DevWellApp(VisionDetectors, QtWidgets.QMainWindow):
     # Add signal for database operations
     db_signal = QtCore.pyqtSignal(dict)
     # Add signal for stopping tracking
     stop_tracking_signal = QtCore.pyqtSignal()
+    # Detector status updates arrive from the inference thread
+    status_changed = QtCore.pyqtSignal(str, str)
+    status_message_changed = QtCore.pyqtSignal(str)
+    # A new frame is waiting in the preview buffer
+    preview_ready = QtCore.pyqtSignal()
 
     def __init__(self):
         super().__init__()
-        self.keyboard_activity = 0
-        self.mouse_activity = 0
         self.tracking_active = False
         self.cap = None
-        self.user_data = {}  # Dictionary to store data for each user
-        self.multiple_faces_alerted = False  # Flag to track if multiple faces alert has been shown
-        self.primary_user_id = None  # Track the primary user
-        self.user_detection_cooldown = 5  # Seconds between user detection checks
-        self.last_user_detection_time = 0  # Track last user detection check
-        self.user_timeout = 3  # Seconds before considering a user no longer present
-        self.current_ear = 0.45  # Default eye aspect ratio
-        self.current_posture_score = 50  # Default posture score
-        
-        # Enhanced blink monitoring
-        self.blink_count = 0  # Count blinks in the current minute
-        self.blink_timer = time.time()  # Timer to track one minute intervals
-        self.min_blink_threshold = 17  # Minimum blinks per minute (updated)
-        self.last_blink_status = False  # Track if eyes were closed in previous frame
-        self.low_blink_alert_time = 0  # Last time we alerted about low blink rate
-        
-        # Tiredness detection
-        self.eyes_closed_start_time = None  # When eyes were closed
-        self.tiredness_threshold = 30  # Alert after 30 seconds of closed eyes
-        self.last_tiredness_alert_time = 0  # Last time we alerted about tiredness
-        self.tiredness_alert_cooldown = 300  # 5 minutes between tiredness alerts
-        
-        # Enhanced posture monitoring
-        self.bad_posture_start_time = None  # When bad posture was first detected
-        self.bad_posture_threshold = 120  # Alert after 2 minutes (120 seconds) of bad posture
-        self.last_posture_alert_time = 0  # Last time we alerted about bad posture
-        self.posture_alert_cooldown = 180  # 3 minutes between posture alerts
-        
-        # Original variables
-        self.ear_threshold = 0.45  # Threshold for eye aspect ratio (eyes closed)
-        self.ear_upper_threshold = 0.50  # Upper threshold for blink detection
-        self.blink_cooldown = 10  # Seconds between blink alerts
-        self.last_blink_time = time.time()  # Track last blink alert
-        self.posture_cooldown = 30  # 30 seconds between posture alerts
-        self.last_posture_alert = 0  # Track last posture alert
-        self.ear_history = []  # Store recent EAR values for smoothing
-        self.ear_history_size = 5  # Number of frames to average
-        self.posture_history = []  # Store recent posture scores for smoothing
-        self.posture_history_size = 5  # Number of frames to average
+        self.frame_pipeline = None  # Capture -> inference pipeline
+        self.report_window = None  # Report view, created on first use and reused
+        self.last_pipeline_stats_time = time.time()
+        self.init_detector_state()
         self.health_tips = [
             "Stay hydrated! Drink water regularly.",
             "Take deep breaths to reduce stress.",
@@ -80,19 +59,15 @@ class DevWellApp(QtWidgets.QMainWindow):
             "Maintain an arm's length distance from your screen.",
             "Practice the 20-20-20 rule: Look 20 feet away for 20 seconds every 20 minutes."
         ]
-        self.bad_posture_count = 0
-        self.posture_prev_bad = False
-        self.posture_warning_time = time.time()  # Track last posture alert
-        self.eyes_closed = False  # Track if eyes are currently closed
-        self.last_blink_detected = time.time()  # Track last actual blink
-        self.no_blink_threshold = 15  # Alert if no blink for 15 seconds
-        self.last_static_image_alert = 0  # Last time we alerted about static image
-        self.static_image_alert_cooldown = 300  # 5 minutes between static image alerts
-
-        self.initUI()
-        self.initDatabase()
-        self.initTracking()
-        self.initVoiceAlert()
+
+        with startup.phase("init UI"):
+            self.initUI()
+        with startup.phase("init database"):
+            self.initDatabase()
+        with startup.phase("init input tracking"):
+            self.initTracking()
+        with startup.phase("init alerts"):
+            self.initVoiceAlert()
 
         # Initialize timers
         self.break_timer = QtCore.QTimer()
@@ -104,8 +79,19 @@ class DevWellApp(QtWidgets.QMainWindow):
         self.status_timer.timeout.connect(self.update_status)
         self.status_timer.start(100)  # Update every 100ms for smooth progress bars
 
+        # Input activity aggregation timer
+        self.input_timer = QtCore.QTimer()
+        self.input_timer.timeout.connect(self.check_input_activity)
+        self.input_timer.start(1000)
+
+        # Preview frames are handed over by the inference thread
+        self.preview = PreviewBuffer(max_fps=15)
+        self.preview_ready.connect(self.render_preview)
+
         # Connect the signal to the stop_tracking slot
         self.stop_tracking_signal.connect(self.stop_tracking)
+        self.status_changed.connect(self.on_status_changed)
+        self.status_message_changed.connect(self.statusBar().showMessage)
 
     def initUI(self):
         try:
@@ -269,6 +255,13 @@ class DevWellApp(QtWidgets.QMainWindow):
             self.activity_status = QtWidgets.QLabel("⌨ Activity: Not Monitoring")
             status_layout.addWidget(self.activity_status)
 
+            self.status_labels = {
+                'eye': self.eye_status,
+                'blink': self.blink_status,
+                'posture': self.posture_status,
+                'activity': self.activity_status,
+            }
+
             status_group.setLayout(status_layout)
             content_layout.addWidget(status_group)
 
@@ -291,6 +284,10 @@ class DevWellApp(QtWidgets.QMainWindow):
             self.report_button.setStyleSheet("background-color: #3498DB; color: white;")
             self.report_button.clicked.connect(lambda: self.generate_report('weekly'))
 
+            self.export_button = QtWidgets.QPushButton("Export History")
+            self.export_button.setStyleSheet("background-color: #16A085; color: white;")
+            self.export_button.clicked.connect(self.show_export)
+
             self.settings_button = QtWidgets.QPushButton("Settings")
             self.settings_button.setStyleSheet("background-color: #9B59B6; color: white;")
             self.settings_button.clicked.connect(self.show_settings)
@@ -298,6 +295,7 @@ class DevWellApp(QtWidgets.QMainWindow):
             button_layout.addWidget(self.start_button)
             button_layout.addWidget(self.stop_button)
             button_layout.addWidget(self.report_button)
+            button_layout.addWidget(self.export_button)
             button_layout.addWidget(self.settings_button)
 
             main_layout.addLayout(button_layout)
@@ -342,70 +340,26 @@ class DevWellApp(QtWidgets.QMainWindow):
             os.makedirs("data", exist_ok=True)
             db_path = os.path.join("data", "devwell.db")
             
-            # Connect to database with proper error handling
+            # Create the schema and open the GUI thread's connection
             try:
-                self.conn = sqlite3.connect(db_path, check_same_thread=False)
+                self.db = Database(db_path)
+                self.db.initialize()
+                self.conn = self.db.connect(check_same_thread=False)
                 self.cursor = self.conn.cursor()
             except sqlite3.Error as e:
                 self.show_error("Database Connection Error", f"Failed to connect to database: {str(e)}")
                 return
             
-            # Create activity table with all required columns
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS activity (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    eye_alerts INTEGER DEFAULT 0,
-                    posture_alerts INTEGER DEFAULT 0,
-                    breaks_taken INTEGER DEFAULT 0,
-                    keyboard_activity INTEGER DEFAULT 0,
-                    mouse_activity INTEGER DEFAULT 0,
-                    low_light_alerts INTEGER DEFAULT 0,
-                    session_duration INTEGER DEFAULT 0
-                )
-            """)
-            
-            # Create index on timestamp for faster queries
-            self.cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_activity_timestamp 
-                ON activity(timestamp)
-            """)
-            
-            # Create settings table
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS settings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    setting_name TEXT UNIQUE,
-                    setting_value TEXT
-                )
-            """)
-            
-            # Create blink data table for detailed blink tracking
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS blink_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    blink_count INTEGER,
-                    minute_interval INTEGER
-                )
-            """)
-            
-            # Insert default settings if they don't exist
-            default_settings = {
-                'ear_threshold': '0.45',
-                'min_blink_threshold': '17',
-                'bad_posture_threshold': '120',
-                'keyboard_limit': '2500',
-                'mouse_limit': '2500'
-            }
-            
-            for setting_name, setting_value in default_settings.items():
-                self.cursor.execute("""
-                    INSERT OR IGNORE INTO settings (setting_name, setting_value)
-                    VALUES (?, ?)
-                """, (setting_name, setting_value))
-            
-            self.conn.commit()
+            # Activity counters are batched and written by their own thread
+            self.activity_writer = ActivityWriter(self.db)
+            self.activity_writer.start()
+            # Per-minute blink statistics, batched and compacted by their own writer
+            self.blink_writer = BlinkWriter(self.db)
+            self.blink_writer.start()
+            # Known users, so returning users keep their ID across sessions
+            self.user_writer = UserWriter(self.db)
+            self.user_writer.start()
+            self.identity_tracker.load_profiles(load_users(self.conn))
             print("Database initialized successfully")
             
         except Exception as e:
@@ -416,21 +370,21 @@ class DevWellApp(QtWidgets.QMainWindow):
 
     def initTracking(self):
         try:
-            self.mp_face_mesh = mp.solutions.face_mesh.FaceMesh(
-                max_num_faces=10,  # Allow up to 10 faces
-                min_detection_confidence=0.5,
-                min_tracking_confidence=0.5,
-                static_image_mode=False
-            )
-            self.mp_pose = mp.solutions.pose.Pose(
-                min_detection_confidence=0.5,
-                min_tracking_confidence=0.5
-            )
+            from pynput import keyboard, mouse
+            # MediaPipe graphs are built in the background and waited for on Start
+            if os.environ.get('DEVWELL_WARMUP', '1') != '0':
+                self.warm_up_vision_graphs()
             self.keyboard_limit = 2500
             self.mouse_limit = 2500
 
-            self.listener_kb = keyboard.Listener(on_press=self.on_key_press)
-            self.listener_mouse = mouse.Listener(on_click=self.on_mouse_click)
+            # The OS hook callbacks only bump a counter; limits are checked
+            # once a second by check_input_activity on the GUI thread
+            self.keyboard_counter = InputCounter()
+            self.mouse_counter = InputCounter()
+            self.input_aggregator = ActivityAggregator({'keyboard': self.keyboard_counter,
+                                                        'mouse': self.mouse_counter})
+            self.listener_kb = keyboard.Listener(on_press=self.keyboard_counter.bump)
+            self.listener_mouse = mouse.Listener(on_click=self.mouse_counter.bump_pressed)
             self.listener_kb.start()
             self.listener_mouse.start()
         except Exception as e:
@@ -438,491 +392,138 @@ class DevWellApp(QtWidgets.QMainWindow):
 
     def initVoiceAlert(self):
         try:
-            self.engine = pyttsx3.init()
-            self.engine.setProperty('rate', 150)
-            self.engine.setProperty('volume', 1.0)
+            # The TTS engine is created lazily on the alert worker thread,
+            # which is the only thread that ever uses it
+            self.engine = None
+            self.alert_dispatcher = AlertDispatcher(notify=self._notify_now, speak=self._speak_now,
+                                                    min_interval=10)
+            self.alert_dispatcher.start()
         except Exception as e:
             self.show_error("Voice Alert Error", str(e))
 
     def show_error(self, title, message):
         QtWidgets.QMessageBox.critical(self, title, message)
 
-    def speak(self, message):
+    def set_status(self, field, text):
+        """Update one of the status labels ('eye', 'blink', 'posture', 'activity')"""
+        # Emitted so the label is updated on the GUI thread
+        self.status_changed.emit(field, text)
+
+    def show_status_message(self, text):
+        self.status_message_changed.emit(text)
+
+    def on_status_changed(self, field, text):
+        self.status_labels[field].setText(text)
+
+    def alert(self, message=None, speech=None, key=None, priority=alerts.NORMAL):
+        """Queue a notification and/or voice alert; returns immediately"""
         try:
+            return self.alert_dispatcher.submit(message, speech, key=key, priority=priority)
+        except Exception as e:
+            print(f"Alert error: {str(e)}")
+
+    def speak(self, message, key=None, priority=alerts.NORMAL):
+        return self.alert(speech=message, key=key, priority=priority)
+
+    def show_notification(self, message, key=None, priority=alerts.NORMAL):
+        return self.alert(message=message, key=key, priority=priority)
+
+    def _speak_now(self, message):
+        """Speak a message (alert worker thread only)"""
+        try:
+            if self.engine is None:
+                import pyttsx3
+                self.engine = pyttsx3.init()
+                self.engine.setProperty('rate', 150)
+                self.engine.setProperty('volume', 1.0)
             self.engine.say(message)
             self.engine.runAndWait()
         except Exception as e:
             print(f"Voice alert error: {str(e)}")
 
-    def show_notification(self, message):
+    def _notify_now(self, message):
+        """Show a desktop notification (alert worker thread only)"""
         try:
+            from plyer import notification
             notification.notify(title='DevWell Alert', message=message, timeout=5)
         except Exception as e:
             print(f"Notification error: {str(e)}")
 
-    def calculate_eye_aspect_ratio(self, landmarks, indices):
-        """Calculate eye aspect ratio for a single eye with improved reliability"""
-        try:
-            # Extract the 6 points for the eye
-            points = [landmarks[i] for i in indices]
-            
-            # Calculate vertical distances
-            v1 = np.linalg.norm(np.array([points[1].x - points[4].x, points[1].y - points[4].y]))
-            v2 = np.linalg.norm(np.array([points[2].x - points[5].x, points[2].y - points[5].y]))
-            
-            # Calculate horizontal distance
-            h = np.linalg.norm(np.array([points[0].x - points[3].x, points[0].y - points[3].y]))
-            
-            # Calculate eye aspect ratio with safeguard against division by zero
-            if h > 0.001:  # Avoid division by very small numbers
-                ear = (v1 + v2) / (2.0 * h)
-            else:
-                ear = 0.3  # Default value when horizontal distance is too small
-            
-            # Apply moving average smoothing but with less history for faster response
-            self.ear_history.append(ear)
-            if len(self.ear_history) > 3:  # Reduced from 5 to 3 for faster response
-                self.ear_history.pop(0)
-            
-            # Return smoothed value
-            return sum(self.ear_history) / len(self.ear_history)
-            
-        except Exception as e:
-            print(f"Eye aspect ratio calculation error: {str(e)}")
-            return 0.3  # Return default value on error
-
-    def detect_eye_strain(self, image):
-        try:
-            # Check for low light conditions first
-            gray_frame = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-            avg_brightness = np.mean(gray_frame)
-            
-            if avg_brightness < 40:  # Low light threshold
-                # Reset all counters and timers during low light
-                self.blink_count = 0
-                self.blink_timer = time.time()
-                self.last_blink_status = False
-                self.eyes_closed_start_time = None
-                self.last_blink_detected = time.time()
-                self.eye_status.setText("👁 Eye Health: Low Light Conditions")
-                return
-
-            results = self.mp_face_mesh.process(image)
-            if not results.multi_face_landmarks:
-                # Reset all counters and timers when no face is detected
-                self.blink_count = 0
-                self.blink_timer = time.time()
-                self.last_blink_status = False
-                self.eyes_closed_start_time = None
-                self.last_blink_detected = time.time()
-                self.eye_status.setText("👁 Eye Health: No Face Detected")
-                return
-
-            # Calculate eye aspect ratio for both eyes
-            left_eye_indices = [33, 160, 158, 133, 153, 144]  # Left eye landmarks
-            right_eye_indices = [362, 385, 387, 263, 373, 380]  # Right eye landmarks
-            
-            for face_landmarks in results.multi_face_landmarks:
-                # Calculate eye aspect ratio for both eyes
-                left_eye = self.calculate_eye_aspect_ratio(face_landmarks.landmark, left_eye_indices)
-                right_eye = self.calculate_eye_aspect_ratio(face_landmarks.landmark, right_eye_indices)
-                
-                # Average the eye aspect ratio
-                current_ear = (left_eye + right_eye) / 2.0
-                self.current_ear = current_ear
-
-                current_time = time.time()
-                
-                # Simplified blink detection
-                if current_ear <= self.ear_threshold and not self.last_blink_status:
-                    # Count this as a blink
-                    self.blink_count += 1
-                    self.last_blink_detected = current_time
-                    print(f"Blink detected! Count: {self.blink_count}, EAR: {current_ear:.3f}")
-                
-                # Update last blink status
-                self.last_blink_status = current_ear <= self.ear_threshold
-                
-                # Check blink rate every minute
-                if current_time - self.blink_timer >= 60:
-                    if self.blink_count < self.min_blink_threshold:
-                        self.show_notification(f"Low blink rate detected! Only {self.blink_count} blinks in the last minute.")
-                        self.speak(f"Low blink rate detected. You only blinked {self.blink_count} times in the last minute.")
-                        self.eye_status.setText("👁 Eye Health: Low Blink Rate Alert")
-                        # Log eye alert to database
-                        self.log_activity(eye_alerts=1)
-                    print(f"Resetting blink count. Total blinks in last minute: {self.blink_count}")
-                    self.blink_count = 0
-                    self.blink_timer = current_time
-                
-                # Check for tiredness (eyes closed for 30 seconds)
-                if current_ear <= self.ear_threshold:  # Eyes are closed
-                    if self.eyes_closed_start_time is None:
-                        self.eyes_closed_start_time = current_time
-                    elif current_time - self.eyes_closed_start_time >= 30:  # 30 seconds threshold
-                        if (current_time - self.last_tiredness_alert_time) >= self.tiredness_alert_cooldown:
-                            self.show_notification("You seem tired! Your eyes have been closed for 30 seconds.")
-                            self.speak("You seem tired. Your eyes have been closed for 30 seconds. Consider taking a short break.")
-                            self.last_tiredness_alert_time = current_time
-                            self.eye_status.setText("👁 Eye Health: Tiredness Alert")
-                            # Log eye alert to database
-                            self.log_activity(eye_alerts=1)
-                else:
-                    self.eyes_closed_start_time = None  # Reset timer when eyes are open
-                
-                # Check for static image (no blink for 50 seconds)
-                time_since_last_blink = current_time - self.last_blink_detected
-                if time_since_last_blink >= 50:  # If no blink for 50 seconds
-                    if (current_time - self.last_static_image_alert) >= self.static_image_alert_cooldown:
-                        self.show_notification("Static content alert! A real user is required. Are you there?")
-                        self.speak("Static content alert.A real user is required. Are you there?")
-                        self.eye_status.setText("👁 Eye Health: Static Content Alert A real user is required Are you there?")
-                        # Log eye alert to database
-                        self.log_activity(eye_alerts=1)
-                        self.last_static_image_alert = current_time
-                
-                # Update eye status with more detailed information
-                if time_since_last_blink >= 50:
-                    self.eye_status.setText(f"👁 Eye Health: No Blinks ({int(time_since_last_blink)}s)")
-                else:
-                    self.eye_status.setText(f"👁 Eye Health: Good (Last blink: {int(time_since_last_blink)}s ago)")
-                
-                # Update blink status display
-                self.blink_status.setText(f"😌 Blinks: {self.blink_count}")
-
-        except Exception as e:
-            print(f"Eye strain detection error: {str(e)}")
-            traceback.print_exc()
-
     def log_activity(self, eye_alerts=0, posture_alerts=0, breaks_taken=0, 
                      keyboard_activity=0, mouse_activity=0, 
                      low_light_alerts=0, session_duration=0):
-        """Log activity data to the database with proper transaction handling"""
+        """Queue activity counters of the current user for the write-behind activity writer"""
         try:
-            # Check if we have an active session record within the last 5 minutes
-            self.cursor.execute("""
-                SELECT id, session_duration FROM activity 
-                WHERE timestamp >= datetime('now', '-5 minutes')
-                ORDER BY timestamp DESC LIMIT 1
-            """)
-            recent_record = self.cursor.fetchone()
-            
-            if recent_record:
-                # Update existing record
-                self.cursor.execute("""
-                    UPDATE activity SET
-                        eye_alerts = eye_alerts + ?,
-                        posture_alerts = posture_alerts + ?,
-                        breaks_taken = breaks_taken + ?,
-                        keyboard_activity = keyboard_activity + ?,
-                        mouse_activity = mouse_activity + ?,
-                        low_light_alerts = low_light_alerts + ?,
-                        session_duration = session_duration + ?
-                    WHERE id = ?
-                """, (eye_alerts, posture_alerts, breaks_taken, 
-                      keyboard_activity, mouse_activity, low_light_alerts,
-                      session_duration, recent_record[0]))
-            else:
-                # Create new record
-                self.cursor.execute("""
-                    INSERT INTO activity (
-                        eye_alerts,
-                        posture_alerts,
-                        breaks_taken,
-                        keyboard_activity,
-                        mouse_activity,
-                        low_light_alerts,
-                        session_duration
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (eye_alerts, posture_alerts, breaks_taken,
-                      keyboard_activity, mouse_activity, low_light_alerts,
-                      session_duration))
-            
-            self.conn.commit()
-            print(f"Logged activity: eye={eye_alerts}, posture={posture_alerts}, breaks={breaks_taken}, "
-                  f"keyboard={keyboard_activity}, mouse={mouse_activity}, "
-                  f"low_light={low_light_alerts}, duration={session_duration}")
+            self.activity_writer.add(self.current_user_id,
+                                     eye_alerts=eye_alerts,
+                                     posture_alerts=posture_alerts,
+                                     breaks_taken=breaks_taken,
+                                     keyboard_activity=keyboard_activity,
+                                     mouse_activity=mouse_activity,
+                                     low_light_alerts=low_light_alerts,
+                                     session_duration=session_duration)
         except Exception as e:
             print(f"Error logging activity: {str(e)}")
             traceback.print_exc()
 
-    def detect_users(self, image):
-        """Detect and track users in the frame"""
-        try:
-            current_time = time.time()
-            
-            # Only check for multiple users periodically
-            if current_time - self.last_user_detection_time < self.user_detection_cooldown:
-                return
-
-            self.last_user_detection_time = current_time
-            
-            # Check for faces
-            face_results = self.mp_face_mesh.process(image)
-            if not face_results.multi_face_landmarks:
-                # No faces detected - reset all counters and timers
-                if self.primary_user_id and current_time - self.user_data.get(self.primary_user_id, {}).get('last_seen', 0) > self.user_timeout:
-                    self.statusBar().showMessage("Primary user no longer detected")
-                    self.primary_user_id = None
-                    self.activity_status.setText("⌨ Activity Level: No User Detected")
-                    # Reset blink count and related variables
-                    self.blink_count = 0
-                    self.blink_timer = current_time
-                    self.last_blink_status = False
-                    self.eyes_closed_start_time = None
-                    self.last_blink_detected = current_time
-                    self.eye_status.setText("👁 Eye Health: No User Detected")
-                return
-
-            # Update detected users
-            current_users = set()
-            for face_landmarks in face_results.multi_face_landmarks:
-                try:
-                    user_id = self.generate_user_id(face_landmarks)
-                    current_users.add(user_id)
-                    
-                    # Initialize user data if not exists
-                    if user_id not in self.user_data:
-                        self.user_data[user_id] = {
-                            'last_seen': current_time,
-                            'last_blink_time': current_time,
-                            'posture_warning_time': current_time,
-                            'eye_status': "Good",
-                            'posture_status': "Good",
-                            'face_landmarks': face_landmarks
-                        }
-                    else:
-                        self.user_data[user_id]['last_seen'] = current_time
-                        self.user_data[user_id]['face_landmarks'] = face_landmarks
-                except Exception as e:
-                    print(f"Error processing face: {str(e)}")
-                    continue
-
-            # Remove users that haven't been seen recently
-            self.user_data = {k: v for k, v in self.user_data.items() 
-                             if current_time - v['last_seen'] <= self.user_timeout}
-
-            # Set primary user if not set
-            if not self.primary_user_id and current_users:
-                self.primary_user_id = next(iter(current_users))
-                self.statusBar().showMessage("Primary user identified")
-                self.multiple_faces_alerted = False
-                self.activity_status.setText("⌨ Activity Level: Normal")
-
-            # Handle multiple users
-            if len(current_users) > 1:
-                if not self.multiple_faces_alerted:
-                    self.show_notification(f"Multiple users detected ({len(current_users)}). Only one user should be in frame.")
-                    self.speak(f"Multiple users detected. Only one user should be in frame")
-                    self.multiple_faces_alerted = True
-                    self.activity_status.setText(f"👥 Multiple Users Detected ({len(current_users)})")
-            else:
-                # Only one user detected
-                if self.multiple_faces_alerted:
-                    # Reset multiple faces alert and update status
-                    self.multiple_faces_alerted = False
-                    self.activity_status.setText("⌨ Activity Level: Normal")
-                    self.statusBar().showMessage("Single user detected")
-
-            # Update status bar with current user count
-            self.statusBar().showMessage(f"Detected {len(current_users)} user(s) in frame")
-
-        except Exception as e:
-            print(f"User detection error: {str(e)}")
-
-    def detect_posture(self, image):
-        try:
-            results = self.mp_pose.process(image)
-            if not results.pose_landmarks:
-                self.posture_status.setText("🪑 Posture: No Detection")
-                return
-
-            current_time = time.time()
-            
-            # Calculate posture score
-            self.current_posture_score = self.calculate_posture_score(results.pose_landmarks)
-            print(f"Current posture score: {self.current_posture_score}")  # Debug print
-            
-            # Enhanced posture monitoring with clear timing stages
-            if self.current_posture_score < 40:  # Bad posture threshold
-                # Start tracking bad posture duration if not already tracking
-                if self.bad_posture_start_time is None:
-                    self.bad_posture_start_time = current_time
-                    print(f"Bad posture detected - starting timer at {current_time}")  # Debug print
-                
-                # Calculate how long bad posture has persisted
-                bad_posture_duration = current_time - self.bad_posture_start_time
-                print(f"Bad posture duration: {bad_posture_duration} seconds")  # Debug print
-                
-                # Stage 1: Warning after 30 seconds
-                if 30 <= bad_posture_duration < 60:
-                    self.posture_status.setText(f"🪑 Posture: Poor - Warning ({int(bad_posture_duration)}s)")
-                    if not hasattr(self, 'posture_warning_shown') or not self.posture_warning_shown:
-                        self.show_notification("Warning: Poor posture detected. Please adjust your position.")
-                        self.speak("Warning: Poor posture detected. Please adjust your position.")
-                        self.posture_warning_shown = True
-                        # Log posture alert
-                        self.log_activity(posture_alerts=1)
-                
-                # Stage 2: Alert after 2 minutes (120 seconds)
-                elif bad_posture_duration >= self.bad_posture_threshold:
-                    # Only alert if we haven't alerted recently
-                    if (current_time - self.last_posture_alert_time) >= self.posture_alert_cooldown:
-                        print("Triggering posture alert")  # Debug print
-                        self.show_notification("⚠️ POSTURE ALERT: You've been in poor posture for 2 minutes! Please adjust your sitting position.")
-                        self.speak("Posture alert! You've been in poor posture for too long. Please sit up straight.")
-                        self.last_posture_alert_time = current_time
-                        self.posture_status.setText("🪑 Posture: Poor - Needs Immediate Attention")
-                        # Log posture alert
-                        self.log_activity(posture_alerts=1)
-                        # Reset warning flag
-                        self.posture_warning_shown = False
-                
-                # Stage 3: Countdown to alert
-                elif bad_posture_duration >= 60:
-                    time_until_alert = int(self.bad_posture_threshold - bad_posture_duration)
-                    self.posture_status.setText(f"🪑 Posture: Poor - Alert in {time_until_alert}s")
-                    if not hasattr(self, 'posture_countdown_shown') or not self.posture_countdown_shown:
-                        self.show_notification(f"Posture Alert: You have {time_until_alert} seconds to correct your posture.")
-                        self.speak(f"Posture alert: You have {time_until_alert} seconds to correct your posture.")
-                        self.posture_countdown_shown = True
-                        # Log posture alert
-                        self.log_activity(posture_alerts=1)
-                else:
-                    self.posture_status.setText(f"🪑 Posture: Poor ({int(bad_posture_duration)}s)")
-                    # Reset warning flags when posture improves
-                    self.posture_warning_shown = False
-                    self.posture_countdown_shown = False
-                    
-            elif self.current_posture_score < 70:  # Fair posture
-                # Reset bad posture timer and flags
-                self.bad_posture_start_time = None
-                self.posture_warning_shown = False
-                self.posture_countdown_shown = False
-                self.posture_status.setText("🪑 Posture: Fair")
-            else:  # Good posture
-                # Reset bad posture timer and flags
-                self.bad_posture_start_time = None
-                self.posture_warning_shown = False
-                self.posture_countdown_shown = False
-                self.posture_status.setText("🪑 Posture: Good")
-                
-        except Exception as e:
-            print(f"Posture detection error: {str(e)}")
-            traceback.print_exc()
-
-    def calculate_posture_score(self, pose_landmarks):
-        """Calculate posture score based on body alignment"""
+    def log_blink_minute(self, start, count, mean_ear, closed_seconds):
+        """Queue one minute of blink statistics for the blink writer"""
         try:
-            # Get relevant landmarks
-            left_shoulder = pose_landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_SHOULDER]
-            right_shoulder = pose_landmarks.landmark[mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER]
-            left_ear = pose_landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_EAR]
-            right_ear = pose_landmarks.landmark[mp.solutions.pose.PoseLandmark.RIGHT_EAR]
-            left_hip = pose_landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_HIP]
-            right_hip = pose_landmarks.landmark[mp.solutions.pose.PoseLandmark.RIGHT_HIP]
-
-            # Calculate shoulder alignment
-            shoulder_angle = abs(left_shoulder.y - right_shoulder.y)
-            
-            # Calculate head position relative to shoulders
-            head_forward = abs((left_ear.x + right_ear.x)/2 - (left_shoulder.x + right_shoulder.x)/2)
-            
-            # Calculate hip alignment
-            hip_angle = abs(left_hip.y - right_hip.y)
-            
-            # Calculate neck angle (head tilt)
-            neck_angle = abs((left_ear.y + right_ear.y)/2 - (left_shoulder.y + right_shoulder.y)/2)
-            
-            # Calculate overall score (0-100)
-            score = 100 - (
-                shoulder_angle * 200 +  # Shoulder alignment
-                head_forward * 100 +    # Forward head posture
-                hip_angle * 100 +       # Hip alignment
-                neck_angle * 150        # Neck angle
-            )
-            
-            # Add to history for smoothing
-            self.posture_history.append(score)
-            if len(self.posture_history) > self.posture_history_size:
-                self.posture_history.pop(0)
-            
-            # Return smoothed value
-            smoothed_score = max(0, min(100, sum(self.posture_history) / len(self.posture_history)))
-            print(f"Raw posture score: {score}, Smoothed score: {smoothed_score}")  # Debug print
-            return smoothed_score
-            
+            self.blink_writer.add(start, count, mean_ear, closed_seconds, self.current_user_id)
         except Exception as e:
-            print(f"Posture score calculation error: {str(e)}")
-            return 50
+            print(f"Error logging blink data: {str(e)}")
 
-    def generate_user_id(self, face_landmarks):
-        """Generate a unique ID for a user based on face landmarks"""
+    def log_user(self, user_id, embedding, seen_at):
+        """Queue a user's profile for the users table"""
         try:
-            # Use more facial points for better identification
-            nose = face_landmarks.landmark[1]  # Nose tip
-            left_eye = face_landmarks.landmark[33]  # Left eye
-            right_eye = face_landmarks.landmark[362]  # Right eye
-            left_ear = face_landmarks.landmark[234]  # Left ear
-            right_ear = face_landmarks.landmark[454]  # Right ear
-            
-            # Create a more unique identifier using multiple facial points
-            return f"{nose.x:.3f}{nose.y:.3f}{left_eye.x:.3f}{right_eye.x:.3f}{left_ear.x:.3f}_{right_ear.x:.3f}"
+            self.user_writer.add(user_id, embedding, seen_at)
         except Exception as e:
-            print(f"Error generating user ID: {str(e)}")
-            return f"user_{time.time()}"  # Fallback ID
-
-    def generate_pose_user_id(self, pose_landmarks):
-        """Generate a unique ID for a user based on pose landmarks"""
-        # Use shoulder positions to generate a unique ID
-        left_shoulder = pose_landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_SHOULDER]
-        right_shoulder = pose_landmarks.landmark[mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER]
-        return f"pose_{left_shoulder.x:.3f}_{right_shoulder.x:.3f}"
+            print(f"Error logging user: {str(e)}")
 
-    def on_key_press(self, key):
+    def check_input_activity(self):
+        """Evaluate keyboard/mouse limits from the input counters (GUI thread timer)"""
         try:
-            self.keyboard_activity += 1
-            print(f"Keyboard activity: {self.keyboard_activity}")  # Debug print
+            deltas = self.input_aggregator.sample()
+            keyboard_delta = deltas['keyboard']
+            mouse_delta = deltas['mouse']
+            if not keyboard_delta and not mouse_delta:
+                return
             
-            if self.keyboard_activity >= self.keyboard_limit:
-                self.show_notification("Take a break from typing!")
-                self.speak("You have pressed too many keys. Take a break.")
-                self.keyboard_activity = 0
+            # Limits count per user, so a new user at the desk starts from zero
+            user = self.user_state
+            user.keyboard_activity += keyboard_delta
+            user.mouse_activity += mouse_delta
+            # Log the exact counts; the activity writer batches them
+            self.log_activity(keyboard_activity=keyboard_delta, mouse_activity=mouse_delta)
+            
+            if user.keyboard_activity >= self.keyboard_limit:
+                self.alert("Take a break from typing!",
+                           "You have pressed too many keys. Take a break.", key='keyboard_limit')
+                user.keyboard_activity = 0
                 self.activity_status.setText("⌨ Activity Level: High")
-                # Log keyboard activity
-                self.log_activity(keyboard_activity=self.keyboard_limit)
                 QtCore.QTimer.singleShot(5000, lambda: self.activity_status.setText("⌨ Activity Level: Normal"))
-            else:
-                # Log keyboard activity periodically
-                if self.keyboard_activity % 100 == 0:  # Log every 100 keystrokes
-                    print(f"Logging keyboard activity: {self.keyboard_activity}")  # Debug print
-                    self.log_activity(keyboard_activity=100)
-        except Exception as e:
-            print(f"Keyboard activity error: {str(e)}")
-            traceback.print_exc()
-
-    def on_mouse_click(self):
-        try:
-            self.mouse_activity += 1
-            if self.mouse_activity >= self.mouse_limit:
-                self.show_notification("Take a break from clicking!")
-                self.speak("You have clicked too many times. Take a break.")
-                self.mouse_activity = 0
+            
+            if user.mouse_activity >= self.mouse_limit:
+                self.alert("Take a break from clicking!",
+                           "You have clicked too many times. Take a break.", key='mouse_limit')
+                user.mouse_activity = 0
                 self.activity_status.setText("⌨ Activity Level: High")
-                # Log mouse activity
-                self.log_activity(mouse_activity=self.mouse_limit)
-            else:
-                # Log mouse activity periodically
-                if self.mouse_activity % 100 == 0:  # Log every 100 clicks
-                    self.log_activity(mouse_activity=100)
         except Exception as e:
-            print(f"Mouse activity error: {str(e)}")
+            print(f"Input activity error: {str(e)}")
+            traceback.print_exc()
 
     def start_tracking(self):
         try:
-            self.cap = cv2.VideoCapture(0)
-            if not self.cap.isOpened():
+            self.statusBar().showMessage("Loading vision models...")
+            QtWidgets.QApplication.processEvents()
+            self.ensure_vision_graphs()
+            # Device, backend and capture format come from the settings table
+            self.cursor.execute("SELECT setting_name, setting_value FROM settings")
+            options = camera_options(dict(self.cursor.fetchall()))
+            self.cap = Camera(on_state=self.show_status_message, **options)
+            if not self.cap.open():
                 self.show_error("Camera Error", "Unable to access webcam. Check permissions and try again.")
+                self.cap = None
                 return
                 
             # Test camera read
@@ -930,6 +531,7 @@ class DevWellApp(QtWidgets.QMainWindow):
             if not ret or test_frame is None:
                 self.show_error("Camera Error", "Failed to read from webcam. Please check your camera connection.")
                 self.cap.release()
+                self.cap = None
                 return
                 
             self.tracking_active = True
@@ -937,19 +539,23 @@ class DevWellApp(QtWidgets.QMainWindow):
             self.stop_button.setEnabled(True)
             self.statusBar().showMessage("Monitoring started")
             
-            # Reset counters
-            self.keyboard_activity = 0
-            self.mouse_activity = 0
-            self.blink_count = 0
-            self.blink_timer = time.time()
-            self.last_blink_status = False
-            self.eyes_closed_start_time = None
-            self.bad_posture_start_time = None
-            
-            # Start the tracking loop in a separate thread
-            self.tracking_thread = threading.Thread(target=self.track_loop)
-            self.tracking_thread.daemon = True
-            self.tracking_thread.start()
+            # Reset counters (per-user state included)
+            self.reset_detector_state()
+            
+            # Optionally record the landmark stream for offline replay
+            record_dir = os.environ.get('DEVWELL_RECORD_LANDMARKS')
+            if record_dir:
+                session_name = datetime.datetime.now().strftime("session_%Y%m%d_%H%M%S")
+                self.landmark_recorder = LandmarkRecorder(os.path.join(record_dir, session_name))
+                print(f"Recording landmarks to {self.landmark_recorder.path}")
+            
+            # Start capture and inference on their own threads
+            # The camera reconnects by itself, so read failures never stop the pipeline
+            self.frame_pipeline = FramePipeline(self.cap.read, self.process_frame,
+                                                on_error=self.on_pipeline_error,
+                                                frame_interval=self.detector_scheduler.frame_interval,
+                                                retry_capture=True)
+            self.frame_pipeline.start()
             
             # Reset timers
             self.break_timer.start(3600000)  # 1 hour
@@ -959,8 +565,8 @@ class DevWellApp(QtWidgets.QMainWindow):
             self.log_activity(0, 0, 0, 0, 0, 0, 0)  # Initialize with zeros
             
             # Show welcome notification
-            self.show_notification("DevWell is now monitoring your health")
-            self.speak("DevWell is now monitoring your health. I'll help you stay healthy during coding sessions.")
+            self.alert("DevWell is now monitoring your health",
+                       "DevWell is now monitoring your health. I'll help you stay healthy during coding sessions.", key='monitoring_started', priority=alerts.LOW)
             
         except Exception as e:
             error_msg = f"Tracking Error: {str(e)}"
@@ -968,116 +574,80 @@ class DevWellApp(QtWidgets.QMainWindow):
             self.show_error("Tracking Error", error_msg)
             self.stop_tracking()  # Ensure cleanup on error
 
-    def track_loop(self):
-        consecutive_failures = 0
-        max_consecutive_failures = 5
-        no_face_detected_time = None
-        low_light_alert_time = None
-        last_session_duration_log = time.time()
+    def process_frame(self, frame, captured_at):
+        """Run all detectors on one frame (inference stage of the frame pipeline)"""
+        analysis = self.analyse_frame(frame, captured_at)
+        
+        if captured_at - self.last_pipeline_stats_time >= 60 and self.frame_pipeline is not None:
+            print(f"Pipeline stats: {self.frame_pipeline.format_stats()} | "
+                  f"preview q={self.preview.pending} shown={self.preview.published} "
+                  f"drop={self.preview.dropped} skipped={self.preview.skipped} | "
+                  f"pose gate ran={self.pose_gate.hits} skipped={self.pose_gate.skips}")
+            self.last_pipeline_stats_time = captured_at
+        
+        # Preview work is skipped entirely above the preview fps cap or while minimized
+        if not self.preview.wants_frame():
+            return None
+        
+        # Copy into a reused buffer and draw the overlays on the image that is displayed
+        image = self.preview.write_buffer(analysis.rgb.shape)
+        np.copyto(image, analysis.rgb)
+        
+        # Draw eye aspect ratio on frame
+        if self.current_ear is not None:
+            cv2.putText(image, f"EAR: {self.current_ear:.2f}", (10, 30),
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        
+        # Draw blink count on frame
+        cv2.putText(image, f"Blinks: {self.blink_count}", (10, 60),
+                  cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        
+        # Draw brightness level
+        cv2.putText(image, f"Brightness: {analysis.brightness:.1f}", (10, 90),
+                  cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         
+        self.preview.publish()
+        self.preview_ready.emit()
+        return None
+
+    def render_preview(self):
+        """Show the newest preview frame (GUI thread, via preview_ready)"""
         try:
-            while self.tracking_active and self.cap is not None:
-                try:
-                    ret, frame = self.cap.read()
-                    if not ret or frame is None:
-                        consecutive_failures += 1
-                        print(f"Failed to read frame. Attempt {consecutive_failures}/{max_consecutive_failures}")
-                        if consecutive_failures >= max_consecutive_failures:
-                            raise Exception("Failed to read from webcam after multiple attempts")
-                        time.sleep(0.1)
-                        continue
-                    
-                    consecutive_failures = 0  # Reset on successful frame read
-                    
-                    # Convert to RGB for MediaPipe
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    
-                    # Check for low light conditions
-                    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    avg_brightness = np.mean(gray_frame)
-                    current_time = time.time()
-                    
-                    if avg_brightness < 40:  # Low light threshold
-                        if low_light_alert_time is None:
-                            low_light_alert_time = current_time
-                        elif current_time - low_light_alert_time >= 5:  # Alert after 5 seconds of low light
-                            self.show_notification("Low light detected! Please improve lighting conditions.")
-                            self.speak("Low light detected. Please improve your lighting conditions.")
-                            self.eye_status.setText("👁 Eye Health: Low Light Alert")
-                            self.log_activity(low_light_alerts=1)  # Log low light alert
-                            low_light_alert_time = current_time
-                    else:
-                        low_light_alert_time = None
-                    
-                    # Log session duration every minute
-                    if current_time - last_session_duration_log >= 60:
-                        self.log_activity(session_duration=60)  # Log 60 seconds of session duration
-                        last_session_duration_log = current_time
-                    
-                    # Detect users
-                    self.detect_users(rgb_frame)
-                    
-                    # Check for face detection
-                    if not self.primary_user_id:
-                        if no_face_detected_time is None:
-                            no_face_detected_time = current_time
-                        elif current_time - no_face_detected_time >= 10:  # Alert after 10 seconds of no face
-                            self.show_notification("No face detected! Please position yourself in front of the camera.")
-                            self.speak("No face detected. Please position yourself in front of the camera.")
-                            self.eye_status.setText("👁 Eye Health: No Face Detected")
-                            no_face_detected_time = current_time
-                    else:
-                        no_face_detected_time = None
-                    
-                    # Only process if primary user is detected
-                    if self.primary_user_id:
-                        # Detect eye strain
-                        self.detect_eye_strain(rgb_frame)
-                        
-                        # Detect posture
-                        self.detect_posture(rgb_frame)
-                    
-                    # Draw eye aspect ratio on frame
-                    if self.current_ear is not None:
-                        cv2.putText(frame, f"EAR: {self.current_ear:.2f}", (10, 30),
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                    
-                    # Draw blink count on frame
-                    cv2.putText(frame, f"Blinks: {self.blink_count}", (10, 60),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                    
-                    # Draw brightness level
-                    cv2.putText(frame, f"Brightness: {avg_brightness:.1f}", (10, 90),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                    
-                    # Convert frame to QImage and display
-                    height, width, channel = frame.shape
-                    bytes_per_line = 3 * width
-                    q_image = QtGui.QImage(rgb_frame.data, width, height, bytes_per_line, QtGui.QImage.Format_RGB888)
-                    self.camera_frame.setPixmap(QtGui.QPixmap.fromImage(q_image))
-                    
-                    # Small delay to prevent high CPU usage
-                    time.sleep(0.01)
-                    
-                except Exception as frame_error:
-                    print(f"Error processing frame: {str(frame_error)}")
-                    consecutive_failures += 1
-                    if consecutive_failures >= max_consecutive_failures:
-                        raise Exception(f"Multiple frame processing errors: {str(frame_error)}")
-                    time.sleep(0.1)
-                    continue
-                
+            rgb_frame = self.preview.take()
+            if rgb_frame is None:
+                return
+            
+            # The QImage wraps the preview buffer without copying; the buffer
+            # is not written again until the next take()
+            height, width, channel = rgb_frame.shape
+            bytes_per_line = 3 * width
+            q_image = QtGui.QImage(rgb_frame.data, width, height, bytes_per_line, QtGui.QImage.Format_RGB888)
+            self.camera_frame.setPixmap(QtGui.QPixmap.fromImage(q_image))
         except Exception as e:
-            print(f"Tracking loop error: {str(e)}")
-            traceback.print_exc()
-            # Emit signal to stop tracking
-            self.stop_tracking_signal.emit()
-        finally:
-            self.tracking_active = False
+            print(f"Preview render error: {str(e)}")
+
+    def changeEvent(self, event):
+        # No preview work while the window is minimized
+        if event.type() == QtCore.QEvent.WindowStateChange:
+            self.preview.enabled = not self.isMinimized()
+        super().changeEvent(event)
+
+    def on_pipeline_error(self, message):
+        """Called from a pipeline worker thread when capture or inference gives up"""
+        print(f"Tracking loop error: {message}")
+        # Emit signal to stop tracking
+        self.stop_tracking_signal.emit()
 
     def stop_tracking(self):
         try:
             self.tracking_active = False
+            if self.frame_pipeline is not None:
+                self.frame_pipeline.stop()
+                self.frame_pipeline = None
+            self.preview.clear()
+            if self.landmark_recorder is not None:
+                self.landmark_recorder.close()
+                self.landmark_recorder = None
             if self.cap is not None:
                 self.cap.release()
             self.cap = None
@@ -1092,15 +662,14 @@ class DevWellApp(QtWidgets.QMainWindow):
             self.activity_status.setText("⌨ Activity: Not Monitoring")
             
             # Reset counters
-            self.blink_count = 0
-            self.eyes_closed_start_time = None
-            self.bad_posture_start_time = None
+            self.reset_detector_state()
             self.current_ear = 0.45
             self.current_posture_score = 50
             
-            # Notify user
-            self.show_notification("Health monitoring stopped")
-            self.speak("Health monitoring stopped. Take care of yourself!")
+            # Drop alerts still queued from the session, then notify user
+            self.alert_dispatcher.cancel_all()
+            self.alert("Health monitoring stopped",
+                       "Health monitoring stopped. Take care of yourself!", key='monitoring_stopped')
             
         except Exception as e:
             error_msg = f"Stop Tracking Error: {str(e)}"
@@ -1108,187 +677,18 @@ class DevWellApp(QtWidgets.QMainWindow):
             self.show_error("Stop Tracking Error", error_msg)
 
     def generate_report(self, period='weekly'):
+        """Show the report view; its data is loaded and charted in the background"""
         try:
-            # Get the start date based on period
-            if period == 'daily':
-                start_date = datetime.datetime.now() - datetime.timedelta(days=1)
-            elif period == 'weekly':
-                start_date = datetime.datetime.now() - datetime.timedelta(days=7)
-            else:  # monthly
-                start_date = datetime.datetime.now() - datetime.timedelta(days=30)
-            
-            # First check which columns exist in the activity table
-            self.cursor.execute("PRAGMA table_info(activity)")
-            columns = [col[1] for col in self.cursor.fetchall()]
-            print(f"Available columns: {columns}")  # Debug print
-            
-            if not columns:
-                self.show_error("Report Error", "No activity table found in database")
-                return
-            
-            # Build the query based on available columns
-            select_columns = []
-            if 'eye_alerts' in columns:
-                select_columns.append("SUM(eye_alerts) as eye_alerts")
-            if 'posture_alerts' in columns:
-                select_columns.append("SUM(posture_alerts) as posture_alerts")
-            if 'breaks_taken' in columns:
-                select_columns.append("SUM(breaks_taken) as breaks")
-            if 'keyboard_activity' in columns:
-                select_columns.append("SUM(keyboard_activity) as keyboard_activity")
-            if 'mouse_activity' in columns:
-                select_columns.append("SUM(mouse_activity) as mouse_activity")
-            if 'low_light_alerts' in columns:
-                select_columns.append("SUM(low_light_alerts) as low_light_alerts")
-            if 'session_duration' in columns:
-                select_columns.append("SUM(session_duration) as session_duration")
-            
-            if not select_columns:
-                self.show_error("Report Error", "No valid columns found in activity table")
-                return
-            
-            # Query for activity data
-            query = f"""
-                SELECT date(timestamp) as day,
-                       {', '.join(select_columns)}
-                FROM activity 
-                WHERE timestamp >= ? 
-                GROUP BY day
-                ORDER BY day
-            """
-            
-            print(f"Executing query: {query}")  # Debug print
-            self.cursor.execute(query, (start_date.strftime("%Y-%m-%d"),))
-            activity_data = self.cursor.fetchall()
-            print(f"Query results: {activity_data}")  # Debug print
-            
-            # Query for blink data
-            self.cursor.execute("""
-                SELECT strftime('%H:%M', timestamp) as time,
-                        blink_count
-                FROM blink_data
-                WHERE timestamp >= ?
-                ORDER BY timestamp
-            """, (start_date.strftime("%Y-%m-%d"),))
-            
-            blink_data = self.cursor.fetchall()
-            
-            if not activity_data and not blink_data:
-                self.show_notification("No data available for the selected period")
-                return
-            
-            # Create DataFrames with only available columns
-            df_activity = pd.DataFrame(activity_data, columns=["Date"] + [col.split(" as ")[1] for col in select_columns])
-            df_blinks = pd.DataFrame(blink_data, columns=["Time", "Blinks"])
-            
-            print(f"Activity DataFrame columns: {df_activity.columns}")  # Debug print
-            print(f"Activity DataFrame data:\n{df_activity}")  # Debug print
-            
-            # Create report window
-            report_window = QtWidgets.QDialog(self)
-            report_window.setWindowTitle(f"DevWell {period.capitalize()} Report")
-            report_window.setGeometry(200, 200, 1200, 900)
-            
-            layout = QtWidgets.QVBoxLayout()
-            
-            # Create matplotlib figure with subplots
-            fig = plt.figure(figsize=(12, 12))
-            plot_count = 0
-            
-            # Plot 1: Health alerts
-            if any(col in df_activity.columns for col in ['eye_alerts', 'posture_alerts', 'low_light_alerts']):
-                plot_count += 1
-                ax1 = fig.add_subplot(411)
-                health_cols = [col for col in ['eye_alerts', 'posture_alerts', 'low_light_alerts'] 
-                             if col in df_activity.columns]
-                print(f"Health columns for plot: {health_cols}")  # Debug print
-                df_activity.plot(x='Date', y=health_cols, kind='bar', ax=ax1)
-            ax1.set_title('Health Alerts')
-            ax1.set_ylabel('Number of Alerts')
-            ax1.legend(loc='upper right')
-            
-            # Plot 2: Blink data
-            if not df_blinks.empty:
-                plot_count += 1
-                ax2 = fig.add_subplot(412)
-                df_blinks.plot(x='Time', y='Blinks',kind ='line', ax=ax2, marker='o')
-                ax2.set_title('Blink Rate Over Time')
-                ax2.set_ylabel('Blinks per Minute')
-                ax2.axhline(y=self.min_blink_threshold, color='r', linestyle='--', 
-                           label=f'Minimum Target ({self.min_blink_threshold})')
-                ax2.legend()
-            
-            # Plot 3: Activity levels
-            if any(col in df_activity.columns for col in ['keyboard_activity', 'mouse_activity']):
-                plot_count += 1
-                ax3 = fig.add_subplot(413)
-                activity_cols = [col for col in ['keyboard_activity', 'mouse_activity'] 
-                               if col in df_activity.columns]
-                print(f"Activity columns for plot: {activity_cols}")  # Debug print
-                df_activity.plot(x='Date', y=activity_cols, kind='bar', ax=ax3)
-            ax3.set_title('Activity Levels')
-            ax3.set_ylabel('Activity Count')
-            ax3.legend(loc='upper right')
-            
-            # Plot 4: Session duration
-            if 'session_duration' in df_activity.columns:
-                plot_count += 1
-                ax4 = fig.add_subplot(414)
-                df_activity.plot(x='Date', y='session_duration', kind='bar', ax=ax4)
-                ax4.set_title('Session Duration')
-                ax4.set_ylabel('Duration (seconds)')
-            
-            plt.tight_layout()
-            
-            # Add the plots to the window
-            canvas = FigureCanvas(fig)
-            layout.addWidget(canvas)
-            
-            # Add summary statistics
-            stats_text = QtWidgets.QTextEdit()
-            stats_text.setReadOnly(True)
-            
-            if not df_activity.empty:
-                stats_html = f"""
-                <h3>Summary Statistics</h3>
-                    <p><b>Period:</b> {period.capitalize()} Report ({start_date.date()} to {datetime.datetime.now().date()})</p>
-                """
-                
-                if 'eye_alerts' in df_activity.columns:
-                    stats_html += f"<p><b>Total Eye Alerts:</b> {df_activity['eye_alerts'].sum()}</p>"
-                if 'posture_alerts' in df_activity.columns:
-                    stats_html += f"<p><b>Total Posture Alerts:</b> {df_activity['posture_alerts'].sum()}</p>"
-                if 'low_light_alerts' in df_activity.columns:
-                    stats_html += f"<p><b>Total Low Light Alerts:</b> {df_activity['low_light_alerts'].sum()}</p>"
-                if 'breaks' in df_activity.columns:
-                    stats_html += f"<p><b>Total Breaks:</b> {df_activity['breaks'].sum()}</p>"
-                if not df_blinks.empty:
-                    stats_html += f"<p><b>Average Blinks per Minute:</b> {df_blinks['Blinks'].mean():.1f}</p>"
-                if 'keyboard_activity' in df_activity.columns:
-                    total_keyboard = df_activity['keyboard_activity'].sum()
-                    stats_html += f"<p><b>Total Keyboard Activity:</b> {total_keyboard:,} keystrokes</p>"
-                    stats_html += f"<p><b>Average Keyboard Activity per Day:</b> {total_keyboard/len(df_activity):,.0f} keystrokes</p>"
-                if 'mouse_activity' in df_activity.columns:
-                    total_mouse = df_activity['mouse_activity'].sum()
-                    stats_html += f"<p><b>Total Mouse Activity:</b> {total_mouse:,} clicks</p>"
-                    stats_html += f"<p><b>Average Mouse Activity per Day:</b> {total_mouse/len(df_activity):,.0f} clicks</p>"
-                if 'session_duration' in df_activity.columns:
-                    total_duration = df_activity['session_duration'].sum()
-                    stats_html += f"<p><b>Total Session Duration:</b> {total_duration/3600:.1f} hours</p>"
-                    stats_html += f"<p><b>Average Session Duration per Day:</b> {total_duration/len(df_activity)/3600:.1f} hours</p>"
-            else:
-                stats_html = "<h3>No activity data available</h3>"
-            
-            stats_text.setHtml(stats_html)
-            layout.addWidget(stats_text)
-            
-            # Save button
-            save_button = QtWidgets.QPushButton("Save Report")
-            save_button.clicked.connect(lambda: self.save_report(df_activity, df_blinks, period))
-            layout.addWidget(save_button)
-            
-            report_window.setLayout(layout)
-            report_window.exec_()
+            if self.report_window is None:
+                from devwell.report_view import ReportDialog
+                # Buffered counters are flushed on the report thread, not here
+                self.report_window = ReportDialog(self, self.db, self.min_blink_threshold,
+                                                  prepare=(self.activity_writer.flush, self.blink_writer.flush,
+                                                           self.user_writer.flush),
+                                                  on_save=self.save_report)
+            self.report_window.load(period, self.min_blink_threshold)
+            self.report_window.show()
+            self.report_window.raise_()
             
         except Exception as e:
             error_msg = f"Error generating report: {str(e)}"
@@ -1314,11 +714,82 @@ class DevWellApp(QtWidgets.QMainWindow):
         except Exception as e:
             self.show_error("Save Error", f"Error saving report: {str(e)}")
 
+    def show_export(self):
+        try:
+            export_window = QtWidgets.QDialog(self)
+            export_window.setWindowTitle("Export History")
+            
+            layout = QtWidgets.QFormLayout()
+            
+            table_input = QtWidgets.QComboBox()
+            table_input.addItems(["activity", "blink_data"])
+            layout.addRow("Data:", table_input)
+            
+            format_input = QtWidgets.QComboBox()
+            format_input.addItems(["csv", "csv.gz", "parquet"])
+            layout.addRow("Format:", format_input)
+            
+            today = QtCore.QDate.currentDate()
+            start_input = QtWidgets.QDateEdit(today.addDays(-30))
+            start_input.setCalendarPopup(True)
+            layout.addRow("From:", start_input)
+            end_input = QtWidgets.QDateEdit(today)
+            end_input.setCalendarPopup(True)
+            layout.addRow("To (inclusive):", end_input)
+            
+            export_button = QtWidgets.QPushButton("Export...")
+            export_button.clicked.connect(lambda: self.export_history(
+                export_window, table_input.currentText(), format_input.currentText(),
+                start_input.date().toString("yyyy-MM-dd"),
+                end_input.date().addDays(1).toString("yyyy-MM-dd")))
+            layout.addRow(export_button)
+            
+            export_window.setLayout(layout)
+            export_window.exec_()
+            
+        except Exception as e:
+            self.show_error("Export Error", str(e))
+
+    def export_history(self, export_window, table, fmt, start, end):
+        """Stream rows to a file on a background thread, reporting progress in the status bar"""
+        try:
+            from devwell.export import Exporter
+            os.makedirs("reports", exist_ok=True)
+            default_path = os.path.join("reports", f"devwell_{table}_{start}_{end}.{fmt}")
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(export_window, "Export History", default_path)
+            if not path:
+                return
+            
+            exporter = Exporter(self.db, table, path, fmt=fmt, start=start, end=end,
+                                progress=lambda rows: self.show_status_message(f"Exporting {table}: {rows:,} rows"))
+            resume = False
+            if exporter.resumable and os.path.exists(exporter.state_path):
+                answer = QtWidgets.QMessageBox.question(
+                    export_window, "Resume Export",
+                    "An interrupted export to this file was found. Resume it?")
+                resume = answer == QtWidgets.QMessageBox.Yes
+            export_window.accept()
+            
+            def run():
+                try:
+                    rows = exporter.run(resume=resume)
+                    self.show_status_message(f"Exported {rows:,} {table} rows to {path}")
+                    self.show_notification(f"Export finished: {rows:,} rows saved to {path}")
+                except Exception as e:
+                    print(f"Export error: {str(e)}")
+                    hint = " (run it again to resume)" if exporter.resumable else ""
+                    self.show_status_message(f"Export failed: {str(e)}{hint}")
+            
+            threading.Thread(target=run, name="devwell-export", daemon=True).start()
+            
+        except Exception as e:
+            self.show_error("Export Error", str(e))
+
     def show_settings(self):
         try:
             settings_window = QtWidgets.QDialog(self)
             settings_window.setWindowTitle("DevWell Settings")
-            settings_window.setGeometry(300, 300, 400, 500)
+            settings_window.setGeometry(300, 300, 400, 700)
             
             layout = QtWidgets.QVBoxLayout()
             
@@ -1369,6 +840,44 @@ class DevWellApp(QtWidgets.QMainWindow):
             activity_group.setLayout(activity_layout)
             layout.addWidget(activity_group)
             
+            # Camera settings, applied the next time monitoring starts
+            camera_group = QtWidgets.QGroupBox("Camera Settings")
+            camera_layout = QtWidgets.QFormLayout()
+            self.cursor.execute("SELECT setting_name, setting_value FROM settings")
+            camera = camera_options(dict(self.cursor.fetchall()))
+            
+            self.camera_device_input = QtWidgets.QSpinBox()
+            self.camera_device_input.setRange(0, 9)
+            self.camera_device_input.setValue(camera.get('device', 0))
+            camera_layout.addRow("Camera Index:", self.camera_device_input)
+            
+            self.camera_backend_input = QtWidgets.QComboBox()
+            self.camera_backend_input.addItems(BACKENDS)
+            self.camera_backend_input.setCurrentText(camera.get('backend', 'any'))
+            camera_layout.addRow("Capture Backend:", self.camera_backend_input)
+            
+            self.camera_resolution_input = QtWidgets.QComboBox()
+            self.camera_resolution_input.addItems(["640x480", "800x600", "960x540", "1280x720", "1920x1080"])
+            self.camera_resolution_input.setCurrentText(f"{camera.get('width', 640)}x{camera.get('height', 480)}")
+            camera_layout.addRow("Resolution:", self.camera_resolution_input)
+            
+            self.camera_fps_input = QtWidgets.QSpinBox()
+            self.camera_fps_input.setRange(5, 60)
+            self.camera_fps_input.setValue(int(camera.get('fps', 30)))
+            camera_layout.addRow("Frame Rate:", self.camera_fps_input)
+            
+            self.camera_format_input = QtWidgets.QComboBox()
+            self.camera_format_input.addItems(PIXEL_FORMATS)
+            self.camera_format_input.setCurrentText(camera.get('pixel_format', 'MJPG'))
+            camera_layout.addRow("Pixel Format:", self.camera_format_input)
+            
+            self.camera_grab_input = QtWidgets.QCheckBox("Always use the newest frame (grab thread)")
+            self.camera_grab_input.setChecked(camera.get('grab_thread', False))
+            camera_layout.addRow(self.camera_grab_input)
+            
+            camera_group.setLayout(camera_layout)
+            layout.addWidget(camera_group)
+            
             # Save button
             save_button = QtWidgets.QPushButton("Save Settings")
             save_button.clicked.connect(lambda: self.save_settings(settings_window))
@@ -1403,7 +912,14 @@ class DevWellApp(QtWidgets.QMainWindow):
                 'min_blink_threshold': self.min_blink_threshold,
                 'bad_posture_threshold': self.bad_posture_threshold,
                 'keyboard_limit': self.keyboard_limit,
-                'mouse_limit': self.mouse_limit
+                'mouse_limit': self.mouse_limit,
+                'camera_device': self.camera_device_input.value(),
+                'camera_backend': self.camera_backend_input.currentText(),
+                'camera_width': self.camera_resolution_input.currentText().split('x')[0],
+                'camera_height': self.camera_resolution_input.currentText().split('x')[1],
+                'camera_fps': self.camera_fps_input.value(),
+                'camera_pixel_format': self.camera_format_input.currentText(),
+                'camera_grab_thread': int(self.camera_grab_input.isChecked())
             }
             
             for name, value in settings.items():
@@ -1428,8 +944,8 @@ class DevWellApp(QtWidgets.QMainWindow):
 
     def suggest_break(self):
         try:
-            self.show_notification("Time for a break! Take a few minutes to stretch and rest your eyes.")
-            self.speak("It's time for a break. Please take a few minutes to stretch and rest your eyes.")
+            self.alert("Time for a break! Take a few minutes to stretch and rest your eyes.",
+                       "It's time for a break. Please take a few minutes to stretch and rest your eyes.", key='break')
             
             # Log break taken
             self.log_activity(breaks_taken=1)
@@ -1455,6 +971,17 @@ class DevWellApp(QtWidgets.QMainWindow):
         try:
             # Clean up resources
             self.stop_tracking()
+            if self.report_window is not None:
+                self.report_window.dispose()
+                self.report_window = None
+            if hasattr(self, 'alert_dispatcher'):
+                self.alert_dispatcher.stop(drain=True)
+            if hasattr(self, 'activity_writer'):
+                self.activity_writer.close()
+            if hasattr(self, 'blink_writer'):
+                self.blink_writer.close()
+            if hasattr(self, 'user_writer'):
+                self.user_writer.close()
             if hasattr(self, 'conn'):
                 self.conn.close()
             event.accept()
@@ -1468,22 +995,11 @@ class DevWellApp(QtWidgets.QMainWindow):
             operation = data.get('operation')
             
             if operation == 'insert_activity':
-                self.cursor.execute("""
-                    INSERT INTO activity (
-                        eye_alerts,
-                        posture_alerts,
-                        breaks_taken,
-                        keyboard_activity,
-                        mouse_activity
-                    ) VALUES (?, ?, ?, ?, ?)
-                """, (
-                    data.get('eye_alerts', 0),
-                    data.get('posture_alerts', 0),
-                    data.get('breaks_taken', 0),
-                    data.get('keyboard_activity', 0),
-                    data.get('mouse_activity', 0)
-                ))
-                self.conn.commit()
+                self.log_activity(eye_alerts=data.get('eye_alerts', 0),
+                                  posture_alerts=data.get('posture_alerts', 0),
+                                  breaks_taken=data.get('breaks_taken', 0),
+                                  keyboard_activity=data.get('keyboard_activity', 0),
+                                  mouse_activity=data.get('mouse_activity', 0))
                 
             elif operation == 'update_settings':
                 for setting_name, setting_value in data.get('settings', {}).items():
@@ -1506,4 +1022,5 @@ if __name__ == '__main__':
     app = QtWidgets.QApplication(sys.argv)
     window = DevWellApp()
     window.show()
+    QtCore.QTimer.singleShot(0, startup.finish)
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""Compare the per-point and vectorized eye aspect ratio paths.
+
+Builds synthetic FaceMesh results for 1, 4 and 10 faces (FaceMesh is
+configured with max_num_faces=10) and times, per frame:
+
+* per-point: the original three np.linalg.norm calls per eye per face
+* vectorized: eye_aspect_ratios on the 12 EAR_LANDMARKS of each face,
+  including their conversion (the detectors' path)
+* full conversion: the same after converting all 468 landmarks of each
+  face, for reference
+* array only: eye_aspect_ratios on already converted points
+
+    python benchmarks/bench_ear.py [repeats]
+"""
+import os
+import random
+import sys
+import timeit
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from devwell.vision import (EAR_LANDMARKS, LEFT_EYE_INDICES, RIGHT_EYE_INDICES,
+                            eye_aspect_ratios, landmarks_to_array)
+
+NUM_LANDMARKS = 468
+
+
+def fake_faces(count):
+    rng = random.Random(count)
+    return [SimpleNamespace(landmark=[SimpleNamespace(x=rng.random(), y=rng.random(), z=rng.random())
+                                      for _ in range(NUM_LANDMARKS)])
+            for _ in range(count)]
+
+
+def per_point_ear(landmarks, indices):
+    """The pre-vectorization calculation, without smoothing"""
+    points = [landmarks[i] for i in indices]
+    v1 = np.linalg.norm(np.array([points[1].x - points[4].x, points[1].y - points[4].y]))
+    v2 = np.linalg.norm(np.array([points[2].x - points[5].x, points[2].y - points[5].y]))
+    h = np.linalg.norm(np.array([points[0].x - points[3].x, points[0].y - points[3].y]))
+    return (v1 + v2) / (2.0 * h) if h > 0.001 else 0.3
+
+
+def per_point_frame(faces):
+    return [(per_point_ear(face.landmark, LEFT_EYE_INDICES), per_point_ear(face.landmark, RIGHT_EYE_INDICES))
+            for face in faces]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'faces':>5} {'per-point':>12} {'vectorized':>12} {'full conv.':>12} {'array only':>12}")
+    for count in (1, 4, 10):
+        faces = fake_faces(count)
+        points = landmarks_to_array(faces, EAR_LANDMARKS)
+        assert np.allclose(np.array(per_point_frame(faces)), eye_aspect_ratios(points), atol=1e-4)
+        ear_columns = list(EAR_LANDMARKS)
+
+        timings = [
+            min(timeit.repeat(lambda: per_point_frame(faces), number=repeats, repeat=3)),
+            min(timeit.repeat(lambda: eye_aspect_ratios(landmarks_to_array(faces, EAR_LANDMARKS)),
+                              number=repeats, repeat=3)),
+            min(timeit.repeat(lambda: eye_aspect_ratios(landmarks_to_array(faces)[:, ear_columns]),
+                              number=repeats, repeat=3)),
+            min(timeit.repeat(lambda: eye_aspect_ratios(points), number=repeats, repeat=3)),
+        ]
+        print(f"{count:>5} " + " ".join(f"{t / repeats * 1e6:>10.1f}us" for t in timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Measure the worst-case latency of the keyboard/mouse hook callbacks.
+
+Runs the InputCounter callbacks the way pynput would, from a dedicated hook
+thread, while an aggregator samples the counters in the background, and
+prints latency percentiles for a single callback.
+
+    python benchmarks/bench_input_callbacks.py [events]
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from devwell.activity import ActivityAggregator, InputCounter
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def run_hook(callback, args, events, latencies):
+    clock = time.perf_counter_ns
+    for _ in range(events):
+        start = clock()
+        callback(*args)
+        latencies.append(clock() - start)
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    keyboard_counter = InputCounter()
+    mouse_counter = InputCounter()
+    aggregator = ActivityAggregator({'keyboard': keyboard_counter, 'mouse': mouse_counter})
+
+    # Aggregate much faster than the app does to maximise interference
+    stop = threading.Event()
+
+    def aggregate():
+        while not stop.is_set():
+            aggregator.sample()
+            time.sleep(0.001)
+
+    aggregator_thread = threading.Thread(target=aggregate, daemon=True)
+    aggregator_thread.start()
+
+    cases = [
+        ('keyboard on_press', keyboard_counter.bump, ('a',)),
+        ('mouse on_click', mouse_counter.bump_pressed, (0, 0, 'left', True)),
+    ]
+    for name, callback, args in cases:
+        latencies = []
+        hook = threading.Thread(target=run_hook, args=(callback, args, events, latencies))
+        hook.start()
+        hook.join()
+        latencies.sort()
+        print(f"{name:18s} n={events} "
+              f"p50={percentile(latencies, 0.50)}ns "
+              f"p99={percentile(latencies, 0.99)}ns "
+              f"p99.9={percentile(latencies, 0.999)}ns "
+              f"max={latencies[-1] / 1000:.1f}us")
+
+    stop.set()
+    aggregator_thread.join()
+    aggregator.sample()
+    print(f"Counted: keyboard={aggregator.totals['keyboard']} mouse={aggregator.totals['mouse']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Keyboard and mouse activity counting that stays out of the OS input hooks."""
+import collections
+import time
+
+
+class InputCounter:
+    """Event counter bumped from a single input hook thread.
+
+    ``bump()`` is one attribute increment and nothing else, so the OS hook
+    returns immediately. No lock is needed: only the hook thread writes
+    ``count`` and readers just take snapshots of it.
+    """
+
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+    def bump(self, *args):
+        """Count one event; accepts and ignores the hook's callback arguments"""
+        self.count += 1
+
+    def bump_pressed(self, x, y, button, pressed):
+        """pynput mouse on_click callback, counting presses only"""
+        if pressed:
+            self.count += 1
+
+
+class ActivityAggregator:
+    """Turns raw input counters into per-interval buckets.
+
+    ``sample()`` is called periodically off the hook threads (the GUI
+    thread's timer in the desktop app). Each call records how many events
+    every counter saw since the previous sample, keeping ``history``
+    buckets per counter; thresholds and alerts are evaluated on these
+    deltas by the caller.
+    """
+
+    def __init__(self, counters, history=3600):
+        self.counters = counters  # name -> InputCounter
+        self.buckets = {name: collections.deque(maxlen=history) for name in counters}
+        self.totals = {name: 0 for name in counters}
+        self._last_counts = {name: counter.count for name, counter in counters.items()}
+
+    def sample(self, now=None):
+        """Close the current bucket; returns {name: events since last sample}"""
+        now = time.time() if now is None else now
+        deltas = {}
+        for name, counter in self.counters.items():
+            count = counter.count
+            delta = count - self._last_counts[name]
+            self._last_counts[name] = count
+            self.buckets[name].append((now, delta))
+            self.totals[name] += delta
+            deltas[name] = delta
+        return deltas
+
+    def recent(self, name, seconds, now=None):
+        """Events counted for name over the last ``seconds`` seconds"""
+        now = time.time() if now is None else now
+        total = 0
+        for timestamp, delta in reversed(self.buckets[name]):
+            if now - timestamp > seconds:
+                break
+            total += delta
+        return total
@@ -0,0 +1,167 @@
+"""Background dispatch of voice and desktop notification alerts."""
+import heapq
+import itertools
+import threading
+import time
+import traceback
+
+# Alert priorities, lower values are delivered first
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+
+class Alert:
+    """A queued alert. ``message`` is shown as a notification, ``speech`` is spoken."""
+
+    def __init__(self, key, message=None, speech=None, priority=NORMAL, created=None):
+        self.key = key
+        self.message = message
+        self.speech = speech
+        self.priority = priority
+        self.created = time.time() if created is None else created
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class AlertDispatcher:
+    """Delivers alerts on a dedicated worker thread.
+
+    ``submit()`` only enqueues and returns immediately, so detectors, input
+    listeners and the GUI never wait on text-to-speech. Pending alerts are
+    kept in a priority queue; submitting an alert whose key is already
+    pending coalesces into it instead of queueing a duplicate. An alert key
+    is not delivered again within ``min_interval`` seconds, alerts older than
+    ``max_age`` seconds are dropped unheard, and ``cancel()``/``cancel_all()``
+    withdraw pending alerts.
+
+    ``notify(message)`` and ``speak(text)`` are called on the worker thread,
+    which is where a thread-affine TTS engine should be created.
+    """
+
+    def __init__(self, notify=None, speak=None, min_interval=30, max_age=60, min_gap=0.5):
+        self.notify = notify
+        self.speak = speak
+        self.min_interval = min_interval
+        self.max_age = max_age
+        self.min_gap = min_gap  # Pause between consecutive deliveries
+
+        self._heap = []
+        self._pending = {}  # key -> Alert
+        self._last_delivered = {}  # key -> time
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+
+        # Counters for diagnostics
+        self.delivered = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.expired = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="devwell-alerts", daemon=True)
+        self._thread.start()
+
+    def stop(self, drain=False, timeout=5.0):
+        """Stop the worker, optionally delivering what is still pending first"""
+        if not drain:
+            self.cancel_all()
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, message=None, speech=None, key=None, priority=NORMAL, min_interval=None):
+        """Queue an alert and return it, or None if it was rate limited"""
+        if not message and not speech:
+            return None
+        key = key or speech or message
+        now = time.time()
+        interval = self.min_interval if min_interval is None else min_interval
+        with self._cond:
+            if now - self._last_delivered.get(key, float('-inf')) < interval:
+                self.rate_limited += 1
+                return None
+
+            alert = self._pending.get(key)
+            if alert is not None and not alert.cancelled:
+                # Coalesce into the pending alert, keeping the newest text
+                alert.message = message or alert.message
+                alert.speech = speech or alert.speech
+                self.coalesced += 1
+                if priority < alert.priority:
+                    alert.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._counter), alert))
+                return alert
+
+            alert = Alert(key, message, speech, priority, now)
+            self._pending[key] = alert
+            heapq.heappush(self._heap, (priority, next(self._counter), alert))
+            self._cond.notify()
+            return alert
+
+    def cancel(self, key):
+        """Withdraw the pending alert with this key; returns True if one was pending"""
+        with self._cond:
+            alert = self._pending.pop(key, None)
+            if alert is None:
+                return False
+            alert.cancel()
+            return True
+
+    def cancel_all(self):
+        with self._cond:
+            for alert in self._pending.values():
+                alert.cancel()
+            self._pending.clear()
+            self._heap.clear()
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _next_alert(self):
+        with self._cond:
+            while True:
+                while self._heap:
+                    priority, _, alert = heapq.heappop(self._heap)
+                    # Skip cancelled alerts and stale heap entries left by a priority bump
+                    if alert.cancelled or priority != alert.priority or self._pending.get(alert.key) is not alert:
+                        continue
+                    del self._pending[alert.key]
+                    return alert
+                if not self.running:
+                    return None
+                self._cond.wait()
+
+    def _run(self):
+        while True:
+            alert = self._next_alert()
+            if alert is None:
+                return
+            now = time.time()
+            if now - alert.created > self.max_age:
+                self.expired += 1
+                continue
+            with self._cond:
+                self._last_delivered[alert.key] = now
+            try:
+                if alert.message and self.notify:
+                    self.notify(alert.message)
+                if alert.speech and self.speak and not alert.cancelled:
+                    self.speak(alert.speech)
+                self.delivered += 1
+            except Exception as e:
+                print(f"Alert delivery error: {str(e)}")
+                traceback.print_exc()
+            if self.min_gap:
+                time.sleep(self.min_gap)
@@ -0,0 +1,203 @@
+"""Camera capture with explicit format negotiation and automatic reconnect.
+
+Driver defaults on many webcams are 1080p MJPEG with a several-frame
+internal queue, so every frame read is both stale and expensive to decode.
+Camera asks for a target resolution, frame rate and pixel format, keeps the
+driver buffer at one frame, and can instead drain the driver from a grab
+thread so ``read()`` always returns the newest frame. If the device
+disappears, ``read()`` keeps retrying to reopen it instead of failing.
+"""
+import threading
+import time
+
+import cv2
+
+BACKENDS = ('any', 'dshow', 'msmf', 'v4l2', 'avfoundation', 'gstreamer')
+PIXEL_FORMATS = ('MJPG', 'YUYV', 'NV12', 'auto')
+
+# Settings table keys (see devwell.storage.DEFAULT_SETTINGS) -> Camera arguments
+CAMERA_SETTINGS = {
+    'camera_device': ('device', int),
+    'camera_backend': ('backend', str),
+    'camera_width': ('width', int),
+    'camera_height': ('height', int),
+    'camera_fps': ('fps', float),
+    'camera_pixel_format': ('pixel_format', str),
+    'camera_grab_thread': ('grab_thread', lambda value: str(value).lower() in ('1', 'true', 'yes')),
+}
+
+
+def camera_options(settings):
+    """Camera keyword arguments from a settings dict, ignoring missing keys"""
+    options = {}
+    for name, (argument, convert) in CAMERA_SETTINGS.items():
+        if name in settings and settings[name] not in (None, ''):
+            options[argument] = convert(settings[name])
+    return options
+
+
+def backend_id(name):
+    if not name or name == 'any':
+        return cv2.CAP_ANY
+    try:
+        return getattr(cv2, f"CAP_{name.upper()}")
+    except AttributeError:
+        raise ValueError(f"Unknown capture backend: {name}")
+
+
+class Camera:
+    """``read()``-compatible camera source for FramePipeline.
+
+    ``on_state(text)``, if given, is called with a short description when
+    the camera is opened, lost or reconnected (from the reading thread).
+    """
+
+    def __init__(self, device=0, backend='any', width=640, height=480, fps=30.0,
+                 pixel_format='MJPG', buffer_size=1, grab_thread=False,
+                 reconnect_interval=2.0, max_failures=5, on_state=None):
+        self.device = device
+        self.backend = backend
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.pixel_format = pixel_format
+        self.buffer_size = buffer_size
+        self.grab_thread = grab_thread
+        self.reconnect_interval = reconnect_interval
+        self.max_failures = max_failures
+        self.on_state = on_state
+
+        self.cap = None
+        self.closed = False
+        self.negotiated = {}
+        self.reconnects = 0
+        self._failures = 0
+
+        # Grab thread state: newest frame and a sequence number
+        self._frame = None
+        self._frame_seq = 0
+        self._read_seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._device_lock = threading.Lock()  # Grab thread reads vs. release
+
+    def open(self):
+        """Open and configure the device; returns False if it can't be opened"""
+        cap = cv2.VideoCapture(self.device, backend_id(self.backend))
+        if not cap.isOpened():
+            cap.release()
+            return False
+        # Pixel format first: some drivers only offer high resolutions/fps with MJPG
+        if self.pixel_format and self.pixel_format != 'auto':
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.pixel_format))
+        if self.width and self.height:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.buffer_size:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)  # Not supported by every backend
+
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        self.negotiated = {
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': cap.get(cv2.CAP_PROP_FPS),
+            'pixel_format': "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00'),
+            'backend': cap.getBackendName() if hasattr(cap, 'getBackendName') else self.backend,
+        }
+        self.cap = cap
+        self._failures = 0
+        self._state(f"Camera {self.device} opened: {self.negotiated['width']}x{self.negotiated['height']} "
+                    f"@ {self.negotiated['fps']:.0f} fps {self.negotiated['pixel_format']} "
+                    f"({self.negotiated['backend']})")
+        if self.grab_thread and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._grab_loop, name="devwell-grab", daemon=True)
+            self._thread.start()
+        return True
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self):
+        """Return (ok, frame); reconnects the device on repeated failures"""
+        while not self.closed:
+            if self.cap is None and not self._reconnect():
+                continue
+            if self.grab_thread:
+                ok, frame = self._newest_frame()
+            else:
+                ok, frame = self.cap.read()
+            if ok and frame is not None:
+                self._failures = 0
+                return True, frame
+            self._failures += 1
+            if self._failures < self.max_failures:
+                # Transient; the caller retries (FramePipeline with retry_capture=True)
+                return False, None
+            self._state(f"Camera {self.device} lost, reconnecting...")
+            self._release_device()
+        return False, None
+
+    def release(self):
+        self.closed = True
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(2.0)
+        self._thread = None
+        self._release_device()
+
+    def _release_device(self):
+        with self._device_lock:
+            cap, self.cap = self.cap, None
+            if cap is not None:
+                cap.release()
+
+    def _reconnect(self):
+        with self._cond:
+            self._cond.wait(self.reconnect_interval)  # Woken early by release()
+        if self.closed:
+            return False
+        try:
+            if self.open():
+                self.reconnects += 1
+                return True
+        except Exception as e:
+            print(f"Camera reconnect error: {str(e)}")
+        return False
+
+    def _grab_loop(self):
+        # Reads continuously so the driver queue never holds stale frames
+        while not self.closed:
+            with self._device_lock:
+                cap = self.cap
+                ok, frame = cap.read() if cap is not None else (False, None)
+            if cap is None:
+                time.sleep(0.05)
+                continue
+            with self._cond:
+                if ok and frame is not None:
+                    self._frame = frame
+                    self._frame_seq += 1
+                else:
+                    self._frame = None
+                self._cond.notify_all()
+            if not ok:
+                time.sleep(0.05)
+
+    def _newest_frame(self, timeout=1.0):
+        with self._cond:
+            deadline = time.time() + timeout
+            while self._frame_seq == self._read_seq and not self.closed:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False, None
+                self._cond.wait(remaining)
+            self._read_seq = self._frame_seq
+            return self._frame is not None, self._frame
+
+    def _state(self, text):
+        print(text)
+        if self.on_state:
+            self.on_state(text)
@@ -0,0 +1,100 @@
+"""Thin window that attaches to a running ``devwell.daemon`` service.
+
+    python -m devwell.client --url http://127.0.0.1:8765/metrics
+
+Polls the metrics endpoint asynchronously once a second and shows the
+values; all capture and detection stays in the service process.
+"""
+import argparse
+import json
+import sys
+import urllib.request
+
+from PyQt5 import QtCore, QtNetwork, QtWidgets
+
+from devwell.daemon import DEFAULT_HOST, DEFAULT_PORT
+
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}/metrics"
+
+
+def fetch_metrics(url=DEFAULT_URL, timeout=1.0):
+    """Return the service's current metrics (blocking; for scripts)"""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+class MetricsWindow(QtWidgets.QWidget):
+
+    def __init__(self, url=DEFAULT_URL, interval=1000):
+        super().__init__()
+        self.url = QtCore.QUrl(url)
+        self.setWindowTitle("DevWell (attached)")
+        self.network = QtNetwork.QNetworkAccessManager(self)
+        self.network.finished.connect(self.on_reply)
+        self._pending = False
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.labels = {}
+        for field in ('connection', 'eye', 'blink', 'posture', 'activity', 'input', 'message'):
+            label = QtWidgets.QLabel("")
+            layout.addWidget(label)
+            self.labels[field] = label
+        self.labels['connection'].setText(f"Connecting to {url} ...")
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(interval)
+        self.poll()
+
+    def poll(self):
+        if self._pending:
+            return  # Previous request still in flight
+        self._pending = True
+        self.network.get(QtNetwork.QNetworkRequest(self.url))
+
+    def on_reply(self, reply):
+        self._pending = False
+        try:
+            if reply.error() != QtNetwork.QNetworkReply.NoError:
+                self.labels['connection'].setText(f"Service not reachable: {reply.errorString()}")
+                return
+            self.show_metrics(json.loads(bytes(reply.readAll()).decode('utf-8')))
+        except ValueError as e:
+            self.labels['connection'].setText(f"Invalid response: {str(e)}")
+        finally:
+            reply.deleteLater()
+
+    def show_metrics(self, metrics):
+        status = metrics.get('status', {})
+        activity = metrics.get('activity', {})
+        state = "Monitoring" if metrics.get('tracking') else "Not Monitoring"
+        state += f" (up {int(metrics.get('uptime', 0))}s)"
+        if metrics.get('current_user_id'):
+            state += f" - {metrics['current_user_id']}"
+        self.labels['connection'].setText(state)
+        self.labels['eye'].setText(status.get('eye', "👁 Eye Health: -") + f"  EAR {metrics.get('ear', 0):.2f}")
+        blink_rate = metrics.get('blink_rate')
+        rate_text = f"{blink_rate}/min" if blink_rate is not None else f"~{metrics.get('blink_rate_estimate', 0):.0f}/min"
+        self.labels['blink'].setText(f"😌 Blinks: {metrics.get('blink_count', 0)} ({rate_text})")
+        self.labels['posture'].setText(status.get('posture', "🪑 Posture: -")
+                                       + f"  score {metrics.get('posture_score', 0):.0f}")
+        self.labels['activity'].setText(status.get('activity', "⌨ Activity Level: -"))
+        self.labels['input'].setText(f"Keys/min: {activity.get('keyboard_last_minute', 0)}  "
+                                     f"Clicks/min: {activity.get('mouse_last_minute', 0)}")
+        self.labels['message'].setText(metrics.get('status_message', ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show metrics from a running DevWell service")
+    parser.add_argument('--url', default=DEFAULT_URL, help="metrics endpoint of the service")
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    window = MetricsWindow(args.url)
+    window.resize(420, 220)
+    window.show()
+    return app.exec_()
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
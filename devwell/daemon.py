@@ -0,0 +1,363 @@
+"""Headless DevWell monitoring service with a local metrics endpoint.
+
+Runs capture, the detectors, alerts and activity logging without PyQt5 or
+matplotlib, for use as a background service on dev workstations:
+
+    python -m devwell.daemon --port 8765
+    curl http://127.0.0.1:8765/metrics
+
+The endpoint only listens on the loopback interface. ``/metrics`` returns
+the current EAR, blink rate, posture score, input activity counters, the
+current user and per-user counters, detector status and pipeline stats as
+JSON; ``/health`` returns 200 while
+the service is up. ``python -m devwell.client`` is a small window that
+attaches to a running service.
+"""
+import argparse
+import http.server
+import json
+import os
+import signal
+import threading
+import time
+import traceback
+
+from devwell import alerts
+from devwell.activity import ActivityAggregator, InputCounter
+from devwell.alerts import AlertDispatcher
+from devwell.capture import BACKENDS, PIXEL_FORMATS, Camera
+from devwell.detectors import VisionDetectors
+from devwell.pipeline import FramePipeline
+from devwell.storage import ActivityWriter, BlinkWriter, Database, UserWriter, load_users
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class HeadlessMonitor(VisionDetectors):
+    """Detector host for the background service.
+
+    Alerts go to desktop notifications and speech when plyer / pyttsx3 are
+    installed, activity goes to the same SQLite database as the desktop
+    app, and status text is kept in memory for ``metrics()``.
+    """
+
+    def __init__(self, db_path, camera=None, notify=True, speak=True,
+                 keyboard_limit=2500, mouse_limit=2500):
+        self.db_path = db_path
+        self.camera_options = camera or {}  # Camera keyword arguments
+        self.keyboard_limit = keyboard_limit
+        self.mouse_limit = mouse_limit
+        self.started_at = time.time()
+        self.init_detector_state(now=self.started_at)
+
+        self.status = {}
+        self.status_message = ""
+        self.last_blink_rate = None  # Blinks counted in the last full minute
+        self._status_lock = threading.Lock()
+
+        self.db = Database(db_path)
+        self.db.initialize()
+        self.activity_writer = ActivityWriter(self.db)
+        self.blink_writer = BlinkWriter(self.db)
+        self.user_writer = UserWriter(self.db)
+        conn = self.db.connect()
+        try:
+            self.identity_tracker.load_profiles(load_users(conn))
+        finally:
+            conn.close()
+
+        self.engine = None
+        self.alert_dispatcher = AlertDispatcher(notify=self._notify_now if notify else None,
+                                                speak=self._speak_now if speak else None,
+                                                min_interval=10)
+
+        self.keyboard_counter = InputCounter()
+        self.mouse_counter = InputCounter()
+        self.input_aggregator = ActivityAggregator({'keyboard': self.keyboard_counter,
+                                                    'mouse': self.mouse_counter})
+        self._listeners = []
+
+        self.cap = None
+        self.frame_pipeline = None
+        self.running = False
+        self._stopped = threading.Event()
+        self._input_thread = None
+
+    # Side-effect hooks
+
+    def alert(self, message=None, speech=None, key=None, priority=alerts.NORMAL):
+        try:
+            return self.alert_dispatcher.submit(message, speech, key=key, priority=priority)
+        except Exception as e:
+            print(f"Alert error: {str(e)}")
+
+    def log_activity(self, **counts):
+        try:
+            self.activity_writer.add(self.current_user_id, **counts)
+        except Exception as e:
+            print(f"Error logging activity: {str(e)}")
+
+    def log_blink_minute(self, start, count, mean_ear, closed_seconds):
+        self.blink_writer.add(start, count, mean_ear, closed_seconds, self.current_user_id)
+
+    def log_user(self, user_id, embedding, seen_at):
+        self.user_writer.add(user_id, embedding, seen_at)
+
+    def set_status(self, field, text):
+        with self._status_lock:
+            self.status[field] = text
+
+    def show_status_message(self, text):
+        self.status_message = text
+
+    def on_detector_event(self, event):
+        if event.kind == 'blink_minute':
+            self.last_blink_rate = event.data['count']
+
+    def _speak_now(self, message):
+        """Speak a message (alert worker thread only)"""
+        try:
+            if self.engine is None:
+                import pyttsx3
+                self.engine = pyttsx3.init()
+                self.engine.setProperty('rate', 150)
+                self.engine.setProperty('volume', 1.0)
+            self.engine.say(message)
+            self.engine.runAndWait()
+        except Exception as e:
+            print(f"Voice alert error: {str(e)}")
+
+    def _notify_now(self, message):
+        """Show a desktop notification (alert worker thread only)"""
+        try:
+            from plyer import notification
+            notification.notify(title='DevWell Alert', message=message, timeout=5)
+        except Exception as e:
+            print(f"Notification error: {str(e)}")
+
+    # Lifecycle
+
+    def start(self):
+        self.ensure_vision_graphs()
+        self.cap = Camera(on_state=self.show_status_message, **self.camera_options)
+        if not self.cap.open():
+            raise IOError(f"Unable to access webcam {self.cap.device}")
+
+        self.activity_writer.start()
+        self.blink_writer.start()
+        self.user_writer.start()
+        self.alert_dispatcher.start()
+        self._start_input_listeners()
+        self.reset_detector_state()
+        self.running = True
+        self._stopped.clear()
+
+        # The camera reconnects by itself, so read failures never stop the pipeline
+        self.frame_pipeline = FramePipeline(self.cap.read, self.process_frame,
+                                            on_error=self.on_pipeline_error,
+                                            frame_interval=self.detector_scheduler.frame_interval,
+                                            retry_capture=True)
+        self.frame_pipeline.start()
+        self._input_thread = threading.Thread(target=self._input_loop, name="devwell-input", daemon=True)
+        self._input_thread.start()
+        self.log_activity()
+        print("DevWell headless monitoring started")
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._stopped.set()
+        if self.frame_pipeline is not None:
+            self.frame_pipeline.stop()
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        for listener in self._listeners:
+            listener.stop()
+        self._listeners = []
+        if self._input_thread is not None:
+            self._input_thread.join(2.0)
+        self.alert_dispatcher.cancel_all()
+        self.alert_dispatcher.stop()
+        self.activity_writer.close()
+        self.blink_writer.close()
+        self.user_writer.close()
+        print("DevWell headless monitoring stopped")
+
+    def request_stop(self):
+        """Make wait() return; safe to call from signal handlers and other threads"""
+        self._stopped.set()
+
+    def wait(self):
+        """Block until stop() is called or the pipeline gives up"""
+        while not self._stopped.wait(0.5):
+            pass
+
+    def process_frame(self, frame, captured_at):
+        """Inference-thread stage; nothing is rendered in headless mode"""
+        self.analyse_frame(frame, captured_at)
+
+    def on_pipeline_error(self, message):
+        print(f"Stopping: {message}")
+        self.request_stop()
+
+    def _start_input_listeners(self):
+        try:
+            from pynput import keyboard, mouse
+        except Exception as e:
+            # No input hooks available (e.g. no display server); keep running without them
+            print(f"Input tracking disabled: {str(e)}")
+            return
+        self._listeners = [keyboard.Listener(on_press=self.keyboard_counter.bump),
+                           mouse.Listener(on_click=self.mouse_counter.bump_pressed)]
+        for listener in self._listeners:
+            listener.start()
+
+    def _input_loop(self):
+        while not self._stopped.wait(1.0):
+            try:
+                self.check_input_activity()
+            except Exception as e:
+                print(f"Input activity error: {str(e)}")
+                traceback.print_exc()
+
+    def check_input_activity(self):
+        """Evaluate keyboard/mouse limits from the input counters (once a second)"""
+        deltas = self.input_aggregator.sample()
+        keyboard_delta = deltas['keyboard']
+        mouse_delta = deltas['mouse']
+        if not keyboard_delta and not mouse_delta:
+            return
+
+        # Limits count per user, so a new user at the desk starts from zero
+        user = self.user_state
+        user.keyboard_activity += keyboard_delta
+        user.mouse_activity += mouse_delta
+        self.log_activity(keyboard_activity=keyboard_delta, mouse_activity=mouse_delta)
+
+        if user.keyboard_activity >= self.keyboard_limit:
+            self.alert("Take a break from typing!",
+                       "You have pressed too many keys. Take a break.", key='keyboard_limit')
+            user.keyboard_activity = 0
+        if user.mouse_activity >= self.mouse_limit:
+            self.alert("Take a break from clicking!",
+                       "You have clicked too many times. Take a break.", key='mouse_limit')
+            user.mouse_activity = 0
+
+    def metrics(self):
+        """Snapshot of the current measurements as a JSON-serializable dict"""
+        now = time.time()
+        with self._status_lock:
+            status = dict(self.status)
+        minute_elapsed = max(1.0, now - self.blink_monitor.minute_start)
+        return {
+            'timestamp': now,
+            'uptime': now - self.started_at,
+            'tracking': self.running,
+            'ear': float(self.current_ear),
+            'blink_count': self.blink_count,
+            'blink_rate': self.last_blink_rate,
+            'blink_rate_estimate': self.blink_count * 60.0 / minute_elapsed,
+            'posture_score': float(self.current_posture_score),
+            'primary_user_id': self.primary_user_id,
+            'current_user_id': self.current_user_id,
+            'users': {
+                state.user_id: {
+                    'blink_count': state.blink_monitor.count,
+                    'keyboard_activity': state.keyboard_activity,
+                    'mouse_activity': state.mouse_activity,
+                    'last_active': state.last_active,
+                }
+                for state in self.user_states if state.user_id is not None
+            },
+            'activity': {
+                'keyboard_total': self.input_aggregator.totals['keyboard'],
+                'mouse_total': self.input_aggregator.totals['mouse'],
+                'keyboard_last_minute': self.input_aggregator.recent('keyboard', 60, now),
+                'mouse_last_minute': self.input_aggregator.recent('mouse', 60, now),
+            },
+            'status': status,
+            'status_message': self.status_message,
+            'pipeline': self.frame_pipeline.stats() if self.frame_pipeline else None,
+            'pose_gate': {'hits': self.pose_gate.hits, 'skips': self.pose_gate.skips},
+        }
+
+
+class MetricsServer(http.server.ThreadingHTTPServer):
+    """Loopback HTTP server answering from ``monitor.metrics()``"""
+
+    daemon_threads = True
+
+    def __init__(self, monitor, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.monitor = monitor
+        super().__init__((host, port), MetricsHandler)
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path in ('/metrics', '/'):
+            self._send_json(200, self.server.monitor.metrics())
+        elif self.path == '/health':
+            self._send_json(200, {'ok': True})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Polled every second by clients; keep the service log quiet
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run DevWell monitoring without the GUI")
+    parser.add_argument('--camera', type=int, default=0, help="camera device index")
+    parser.add_argument('--backend', choices=BACKENDS, default='any', help="capture backend")
+    parser.add_argument('--resolution', default='640x480', help="requested capture size, WIDTHxHEIGHT")
+    parser.add_argument('--fps', type=float, default=30, help="requested capture frame rate")
+    parser.add_argument('--pixel-format', choices=PIXEL_FORMATS, default='MJPG', help="requested pixel format")
+    parser.add_argument('--grab-thread', action='store_true',
+                        help="drain the camera on a separate thread so the newest frame is always used")
+    parser.add_argument('--db', default=os.path.join("data", "devwell.db"), help="SQLite database path")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="metrics endpoint address (loopback only by default)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="metrics endpoint port")
+    parser.add_argument('--no-notify', action='store_true', help="disable desktop notifications")
+    parser.add_argument('--no-speech', action='store_true', help="disable voice alerts")
+    args = parser.parse_args(argv)
+
+    db_dir = os.path.dirname(args.db)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    width, height = (int(value) for value in args.resolution.lower().split('x'))
+    camera = {'device': args.camera, 'backend': args.backend, 'width': width, 'height': height,
+              'fps': args.fps, 'pixel_format': args.pixel_format, 'grab_thread': args.grab_thread}
+    monitor = HeadlessMonitor(args.db, camera=camera,
+                              notify=not args.no_notify, speak=not args.no_speech)
+    server = MetricsServer(monitor, args.host, args.port)
+    server_thread = threading.Thread(target=server.serve_forever, name="devwell-metrics", daemon=True)
+    server_thread.start()
+    print(f"Metrics available at http://{args.host}:{server.server_address[1]}/metrics")
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: monitor.request_stop())
+    try:
+        monitor.start()
+        monitor.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.stop()
+        server.shutdown()
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+"""Maintenance commands for the DevWell database.
+
+    python -m devwell.dbtool backfill            # rebuild hourly/daily rollups
+    python -m devwell.dbtool compact             # downsample old blink data now
+    python -m devwell.dbtool users               # list known users
+    python -m devwell.dbtool rename user_3 Alex  # give a user a display name
+    python -m devwell.dbtool --db other.db backfill
+"""
+import argparse
+import os
+import sys
+import time
+
+from devwell.storage import ROLLUPS, Database, compact_blink_data, rebuild_rollups
+
+DEFAULT_DB = os.path.join("data", "devwell.db")
+
+
+def backfill(database):
+    conn = database.connect()
+    try:
+        start = time.perf_counter()
+        rebuild_rollups(conn)
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ROLLUPS}
+        print(f"Rebuilt rollups in {time.perf_counter() - start:.2f}s: "
+              + ", ".join(f"{table}={count} rows" for table, count in counts.items()))
+    finally:
+        conn.close()
+
+
+def compact(database):
+    conn = database.connect()
+    try:
+        merged, expired = compact_blink_data(conn)
+        print(f"Compacted blink data: {merged} minute rows merged, {expired} hourly rows expired")
+    finally:
+        conn.close()
+
+
+def list_users(database):
+    conn = database.connect(readonly=True)
+    try:
+        rows = conn.execute("""
+            SELECT user_id, COALESCE(name, ''), first_seen, last_seen FROM users ORDER BY last_seen DESC
+        """).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        print("No users recorded yet")
+    for user_id, name, first_seen, last_seen in rows:
+        print(f"{user_id:<12} {name:<20} first seen {first_seen}  last seen {last_seen}")
+
+
+def rename_user(database, user_id, name):
+    conn = database.connect()
+    try:
+        with conn:
+            updated = conn.execute("UPDATE users SET name = ? WHERE user_id = ?",
+                                   (name or None, user_id)).rowcount
+    finally:
+        conn.close()
+    if not updated:
+        print(f"Unknown user: {user_id}")
+        return 1
+    print(f"{user_id} is now shown as {name}" if name else f"Cleared the name of {user_id}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DevWell database maintenance")
+    parser.add_argument('--db', default=DEFAULT_DB, help="SQLite database path")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('backfill', help="rebuild the hourly and daily rollups from raw activity")
+    commands.add_parser('compact', help="merge blink data older than a week into hourly rows")
+    commands.add_parser('users', help="list the users DevWell has told apart")
+    rename = commands.add_parser('rename', help="set the name reports show for a user")
+    rename.add_argument('user_id')
+    rename.add_argument('name', help="display name (empty to clear)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}")
+        return 1
+    database = Database(args.db)
+    database.initialize()
+    if args.command == 'backfill':
+        backfill(database)
+    elif args.command == 'compact':
+        compact(database)
+    elif args.command == 'users':
+        list_users(database)
+    elif args.command == 'rename':
+        return rename_user(database, args.user_id, args.name)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,513 @@
+"""Eye strain, posture and user detection on analysed camera frames.
+
+The detectors live in a Qt-free mixin so the desktop app and headless tools
+(such as the replay engine) run exactly the same logic.
+"""
+import threading
+import time
+import traceback
+
+from devwell import alerts
+from devwell.monitors import UserPresenceMonitor
+from devwell.scheduler import PRESENT, DetectorScheduler
+from devwell.smoothing import SignalBank
+from devwell.tracking import TRACKED_LANDMARKS, IdentityTracker
+from devwell.users import UserStates
+from devwell.vision import (FrameAnalysis, MotionGate, PoseLandmark, RoiTracker, create_face_mesh,
+                            create_pose, eye_aspect_ratios)
+
+
+class VisionDetectors:
+    """Mixin holding the detector state and logic.
+
+    Hosts call init_detector_state() and init_vision_graphs() once (or build
+    the graphs lazily with warm_up_vision_graphs() / ensure_vision_graphs()),
+    then feed frames to analyse_frame(). They override the side-effect hooks
+    below: alert(), log_activity(), set_status() and show_status_message()
+    (by default alerts and status messages are printed, the rest dropped).
+    Activity and blink minutes belong to ``current_user_id``.
+    """
+
+    def init_detector_state(self, now=None):
+        now = time.time() if now is None else now
+        self.detector_scheduler = DetectorScheduler()  # Per-detector frame rates
+        self.landmark_recorder = None  # Optional LandmarkRecorder fed by analyse_frame
+        self.vision_graphs_ready = False
+        self._vision_graphs_lock = threading.Lock()
+        self.no_face_detected_time = None
+        self.low_light_alert_time = None
+        self.last_session_duration_log = now
+        self.user_detection_cooldown = 5  # Seconds between user detection checks (see DetectorScheduler)
+        self.roi_tracker = RoiTracker(full_search_interval=self.user_detection_cooldown)
+        self.current_ear = 0.45  # Default eye aspect ratio
+        self.current_posture_score = 50  # Default posture score
+        # Pose inference is skipped while the scene is unchanged; eyes are never gated
+        self.pose_gate = MotionGate(threshold=3.0, max_age=10.0)
+        self.pose_detected = False  # Whether the last pose inference found a body
+        
+        # Alert logic lives in pure state machines fed with measurements; the
+        # eye and posture monitors are kept per user (see devwell.users)
+        self.user_monitor = UserPresenceMonitor(user_timeout=3)
+        self.identity_tracker = IdentityTracker(active_timeout=self.user_monitor.user_timeout)
+        self._identified_analysis = None  # Frame the cached face user IDs belong to
+        self._face_user_ids = []
+        self.user_states = UserStates(max_users=self.identity_tracker.max_tracks)
+        self.user_state = self.user_states.get(None, now)  # Current user; anonymous until one is found
+        
+        self.ear_history_size = 3  # Number of frames to average (short for faster response)
+        self.posture_history_size = 5  # Number of samples to average
+        # Ring buffers for EAR and posture smoothing, kept per user and per signal
+        self.smoothing = SignalBank({
+            'left_ear': self.ear_history_size,
+            'right_ear': self.ear_history_size,
+            'posture': self.posture_history_size,
+        })
+
+    # Thresholds and state that the settings dialog and the UI read or change
+
+    @property
+    def ear_threshold(self):
+        return self.user_states.thresholds['ear_threshold']
+
+    @ear_threshold.setter
+    def ear_threshold(self, value):
+        self.user_states.configure(ear_threshold=value)
+
+    @property
+    def min_blink_threshold(self):
+        return self.user_states.thresholds['min_blinks_per_minute']
+
+    @min_blink_threshold.setter
+    def min_blink_threshold(self, value):
+        self.user_states.configure(min_blinks_per_minute=value)
+
+    @property
+    def bad_posture_threshold(self):
+        return self.user_states.thresholds['bad_posture_seconds']
+
+    @bad_posture_threshold.setter
+    def bad_posture_threshold(self, value):
+        self.user_states.configure(bad_posture_seconds=value)
+
+    @property
+    def blink_monitor(self):
+        return self.user_state.blink_monitor
+
+    @property
+    def tiredness_monitor(self):
+        return self.user_state.tiredness_monitor
+
+    @property
+    def static_image_monitor(self):
+        return self.user_state.static_image_monitor
+
+    @property
+    def posture_monitor(self):
+        return self.user_state.posture_monitor
+
+    @property
+    def blink_count(self):
+        return self.blink_monitor.count
+
+    @property
+    def primary_user_id(self):
+        return self.user_monitor.primary_user_id
+
+    @property
+    def current_user_id(self):
+        """User activity is attributed to: the primary user, or the last one while nobody is in frame"""
+        return self.user_state.user_id
+
+    def init_vision_graphs(self):
+        """Build the MediaPipe graphs"""
+        self.mp_face_mesh = create_face_mesh(max_num_faces=10)  # Allow up to 10 faces
+        # Separate single-face graph for ROI crops, so switching between
+        # crops and full-frame searches doesn't disturb either graph's tracking
+        self.mp_face_mesh_roi = create_face_mesh(max_num_faces=1)
+        self.mp_pose = create_pose()
+        self.mp_pose_roi = create_pose()  # Same for Pose and its own (torso) crops
+        self.vision_graphs_ready = True
+
+    def ensure_vision_graphs(self):
+        """Build the MediaPipe graphs unless already built; waits for a warm-up in progress"""
+        with self._vision_graphs_lock:
+            if not self.vision_graphs_ready:
+                self.init_vision_graphs()
+
+    def warm_up_vision_graphs(self):
+        """Build the MediaPipe graphs on a background thread; returns the thread"""
+        def warm_up():
+            try:
+                start = time.perf_counter()
+                self.ensure_vision_graphs()
+                print(f"Vision graphs ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+            except Exception as e:
+                # Retried by ensure_vision_graphs() on start
+                print(f"Vision graph warm-up failed: {str(e)}")
+        thread = threading.Thread(target=warm_up, name="devwell-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def reset_detector_state(self, now=None):
+        """Reset per-session counters and timers before monitoring starts"""
+        now = time.time() if now is None else now
+        self.user_monitor.reset(now)
+        self.user_states.clear()
+        self.user_state = self.user_states.get(None, now)
+        self.no_face_detected_time = None
+        self.low_light_alert_time = None
+        self.last_session_duration_log = now
+        self.detector_scheduler.set_rate('users', PRESENT, 1.0 / self.user_detection_cooldown)
+        self.detector_scheduler.reset(now)
+        self.roi_tracker.reset()
+        self.pose_gate.reset()
+        self.pose_detected = False
+        self.identity_tracker.reset()
+        self._identified_analysis = None
+
+    def reset_eye_monitors(self, now):
+        """Restart blink counting and eye timers (no face, low light, new session)"""
+        self.blink_monitor.reset(now)
+        self.tiredness_monitor.reset(now)
+
+    def activate_user(self, user_id, now):
+        """Make user_id the current user; their monitors restart where they left off"""
+        if user_id == self.user_state.user_id:
+            return
+        self.user_state = self.user_states.get(user_id, now)
+        self.user_state.reset(now)  # Their timers stopped when they left
+
+    # Side-effect hooks overridden by the host
+
+    def alert(self, message=None, speech=None, key=None, priority=alerts.NORMAL):
+        """Notify the user (message) and/or speak (speech); key identifies the alert type"""
+        print(f"Alert: {message or speech}")
+
+    def log_activity(self, **counts):
+        """Add activity counter increments of the current user, e.g. eye_alerts=1"""
+
+    def set_status(self, field, text):
+        """Show text for one status field: 'eye', 'blink', 'posture' or 'activity'"""
+
+    def show_status_message(self, text):
+        print(text)
+
+    def log_blink_minute(self, start, count, mean_ear, closed_seconds):
+        """Persist one minute of blink statistics of the current user; optional"""
+
+    def log_user(self, user_id, embedding, seen_at):
+        """Persist a user's identity profile (embedding bytes) when they are seen; optional"""
+
+    def on_detector_event(self, event):
+        """Called with every monitor Event after it has been handled; optional"""
+
+    def analyse_frame(self, frame, captured_at):
+        """Run all scheduled detectors on one BGR frame and return its FrameAnalysis"""
+        # User detection needs the whole frame; otherwise, once a primary
+        # user is locked, inference runs on a crop around them
+        users_due = self.detector_scheduler.due('users', captured_at)
+        roi = None if users_due else self.roi_tracker.region(captured_at)
+        pose_roi = None if users_due else self.roi_tracker.pose_region(captured_at)
+        face_mesh = self.mp_face_mesh if roi is None else self.mp_face_mesh_roi
+        pose = self.mp_pose if pose_roi is None else self.mp_pose_roi
+        
+        # Analyse the frame once; FaceMesh and Pose results are
+        # shared by every detector below
+        analysis = FrameAnalysis(frame, face_mesh, pose, timestamp=captured_at, roi=roi, pose_roi=pose_roi)
+        if self.landmark_recorder is not None:
+            # Recordings hold complete landmarks, whatever the schedule needs
+            analysis.face_landmarks
+            analysis.pose_landmarks
+        self.run_detectors(analysis, users_due)
+        if self.landmark_recorder is not None:
+            self.landmark_recorder.write(analysis)
+        return analysis
+
+    def run_detectors(self, analysis, users_due):
+        """Run the scheduled detectors on an analysed (or recorded) frame"""
+        avg_brightness = analysis.brightness
+        current_time = analysis.timestamp
+        
+        # Check for low light conditions
+        if avg_brightness < 40:  # Low light threshold
+            if self.low_light_alert_time is None:
+                self.low_light_alert_time = current_time
+            elif current_time - self.low_light_alert_time >= 5:  # Alert after 5 seconds of low light
+                self.alert("Low light detected! Please improve lighting conditions.",
+                           "Low light detected. Please improve your lighting conditions.", key='low_light')
+                self.set_status('eye', "👁 Eye Health: Low Light Alert")
+                self.log_activity(low_light_alerts=1)  # Log low light alert
+                self.low_light_alert_time = current_time
+        else:
+            self.low_light_alert_time = None
+        
+        # Log session duration every minute
+        if current_time - self.last_session_duration_log >= 60:
+            self.log_activity(session_duration=60)  # Log 60 seconds of session duration
+            self.last_session_duration_log = current_time
+        
+        # Detect users (how often is decided by the detector scheduler)
+        if users_due:
+            self.detect_users(analysis)
+        
+        # Check for face detection
+        if not self.primary_user_id:
+            if self.no_face_detected_time is None:
+                self.no_face_detected_time = current_time
+            elif current_time - self.no_face_detected_time >= 10:  # Alert after 10 seconds of no face
+                self.alert("No face detected! Please position yourself in front of the camera.",
+                           "No face detected. Please position yourself in front of the camera.", key='no_face')
+                self.set_status('eye', "👁 Eye Health: No Face Detected")
+                self.no_face_detected_time = current_time
+        else:
+            self.no_face_detected_time = None
+        
+        # Only process if primary user is detected
+        if self.primary_user_id:
+            # Detect eye strain (full rate while a user is present)
+            if self.detector_scheduler.due('eyes', current_time):
+                self.detect_eye_strain(analysis)
+            
+            # Detect posture (sampled about once a second)
+            if self.detector_scheduler.due('posture', current_time):
+                self.detect_posture(analysis)
+        
+        # Raise or lower detector rates depending on whether anyone is in frame
+        self.detector_scheduler.update(bool(self.primary_user_id), current_time)
+        
+        # Follow the primary user (not whichever face came first) for the next frame's crop
+        self.roi_tracker.update(analysis, bool(self.primary_user_id), self.primary_face_index(analysis))
+
+    def calculate_eye_aspect_ratio(self, ear, user_id, eye):
+        """Smooth a raw eye aspect ratio (from eye_aspect_ratios) for one eye of one user"""
+        try:
+            # Moving average over this user's own history for this eye
+            return self.smoothing.push(user_id, eye, ear)
+            
+        except Exception as e:
+            print(f"Eye aspect ratio calculation error: {str(e)}")
+            return 0.3  # Return default value on error
+
+    def face_user_ids(self, analysis):
+        """Stable user ID of every face in the frame, in detection order.
+
+        The identity tracker runs at most once per frame; eye strain and user
+        detection share its result.
+        """
+        if self._identified_analysis is not analysis:
+            self._face_user_ids = self.identity_tracker.update(analysis.landmark_points(TRACKED_LANDMARKS),
+                                                                  analysis.timestamp)
+            self._identified_analysis = analysis
+        return self._face_user_ids
+
+    def primary_face_index(self, analysis):
+        """Index of the primary user's face in this frame, or None (no face inference, or not in view)"""
+        if not self.primary_user_id or not analysis.face_ready:
+            return None
+        user_ids = self.face_user_ids(analysis)
+        return user_ids.index(self.primary_user_id) if self.primary_user_id in user_ids else None
+
+    def detect_eye_strain(self, analysis):
+        try:
+            # Check for low light conditions first
+            if analysis.brightness < 40:  # Low light threshold
+                # Reset all counters and timers during low light
+                self.reset_eye_monitors(analysis.timestamp)
+                self.set_status('eye', "👁 Eye Health: Low Light Conditions")
+                return
+
+            faces = analysis.face_landmarks
+            user_ids = self.face_user_ids(analysis)
+            # Forget smoothing state of users that left the frame
+            self.smoothing.retain(set(user_ids))
+            if not faces:
+                # Reset all counters and timers when no face is detected
+                self.reset_eye_monitors(analysis.timestamp)
+                self.set_status('eye', "👁 Eye Health: No Face Detected")
+                return
+
+            # Raw eye aspect ratio of both eyes of every face in one vectorized
+            # pass over just the 12 eye landmarks of each face
+            ears = eye_aspect_ratios(analysis.eye_points)
+            
+            current_ear = None
+            for user_id, (left_ear, right_ear) in zip(user_ids, ears):
+                # Smooth each eye separately, per user in frame
+                left_eye = self.calculate_eye_aspect_ratio(left_ear, user_id, 'left_ear')
+                right_eye = self.calculate_eye_aspect_ratio(right_ear, user_id, 'right_ear')
+                if user_id == self.primary_user_id:
+                    # Alerts follow the primary user, wherever they are in the frame
+                    current_ear = (left_eye + right_eye) / 2.0
+            if current_ear is None:
+                return  # Primary user missed this frame; keep their timers running
+            self.current_ear = current_ear
+            
+            current_time = analysis.timestamp
+            events = self.blink_monitor.update(current_time, current_ear)
+            events += self.tiredness_monitor.update(current_time, current_ear)
+            events += self.static_image_monitor.update(current_time, self.blink_monitor.last_blink)
+            
+            self.handle_detector_events(events)
+            
+            # Update eye status with more detailed information
+            time_since_last_blink = self.static_image_monitor.seconds_since_blink
+            if time_since_last_blink >= self.static_image_monitor.no_blink_seconds:
+                self.set_status('eye', f"👁 Eye Health: No Blinks ({int(time_since_last_blink)}s)")
+            else:
+                self.set_status('eye', f"👁 Eye Health: Good (Last blink: {int(time_since_last_blink)}s ago)")
+            
+            # Update blink status display
+            self.set_status('blink', f"😌 Blinks: {self.blink_count}")
+
+        except Exception as e:
+            print(f"Eye strain detection error: {str(e)}")
+            traceback.print_exc()
+
+    def detect_users(self, analysis):
+        """Detect and track users in the frame"""
+        try:
+            user_ids = self.face_user_ids(analysis)
+            self.handle_detector_events(self.user_monitor.update(analysis.timestamp, user_ids))
+            if self.current_user_id in user_ids:
+                self.user_state.last_active = analysis.timestamp
+            for user_id in set(user_ids):
+                self.log_user(user_id, self.identity_tracker.embedding_bytes(user_id), analysis.timestamp)
+
+        except Exception as e:
+            print(f"User detection error: {str(e)}")
+
+    def detect_posture(self, analysis):
+        try:
+            # Nothing moved since the last pose inference: keep its score (the
+            # posture timers still advance) instead of running Pose again
+            if analysis.pose_ready or self.pose_gate.check(analysis):
+                pose_landmarks = analysis.pose_landmarks
+                self.pose_detected = bool(pose_landmarks)
+                if not pose_landmarks:
+                    self.set_status('posture', "🪑 Posture: No Detection")
+                    return
+
+                # Calculate posture score
+                self.current_posture_score = self.calculate_posture_score(pose_landmarks)
+                print(f"Current posture score: {self.current_posture_score}")  # Debug print
+            elif not self.pose_detected:
+                return
+            
+            self.handle_detector_events(self.posture_monitor.update(analysis.timestamp,
+                                                                    self.current_posture_score))
+                
+        except Exception as e:
+            print(f"Posture detection error: {str(e)}")
+            traceback.print_exc()
+
+    def handle_detector_events(self, events):
+        """Turn monitor events into alerts, activity logging and status text"""
+        for event in events:
+            kind, data = event.kind, event.data
+            if kind == 'blink':
+                print(f"Blink detected! Count: {data['count']}, EAR: {data['ear']:.3f}")
+            elif kind == 'low_blink_rate':
+                self.alert(f"Low blink rate detected! Only {data['count']} blinks in the last minute.",
+                           f"Low blink rate detected. You only blinked {data['count']} times in the last minute.", key='low_blink')
+                self.set_status('eye', "👁 Eye Health: Low Blink Rate Alert")
+                # Log eye alert to database
+                self.log_activity(eye_alerts=1)
+            elif kind == 'blink_minute':
+                print(f"Resetting blink count. Total blinks in last minute: {data['count']}")
+                self.log_blink_minute(data['start'], data['count'], data['mean_ear'], data['closed_seconds'])
+            elif kind == 'tiredness':
+                self.alert("You seem tired! Your eyes have been closed for 30 seconds.",
+                           "You seem tired. Your eyes have been closed for 30 seconds. Consider taking a short break.", key='tiredness', priority=alerts.HIGH)
+                self.set_status('eye', "👁 Eye Health: Tiredness Alert")
+                self.log_activity(eye_alerts=1)
+            elif kind == 'static_image':
+                self.alert("Static content alert! A real user is required. Are you there?",
+                           "Static content alert.A real user is required. Are you there?", key='static_image')
+                self.set_status('eye', "👁 Eye Health: Static Content Alert A real user is required Are you there?")
+                self.log_activity(eye_alerts=1)
+            elif kind == 'posture_stage':
+                stage, duration = data['stage'], int(data['duration'])
+                if stage == 'good':
+                    self.set_status('posture', "🪑 Posture: Good")
+                elif stage == 'fair':
+                    self.set_status('posture', "🪑 Posture: Fair")
+                elif stage == 'poor':
+                    self.set_status('posture', f"🪑 Posture: Poor ({duration}s)")
+                elif stage == 'warning':
+                    self.set_status('posture', f"🪑 Posture: Poor - Warning ({duration}s)")
+                elif stage == 'countdown':
+                    self.set_status('posture', f"🪑 Posture: Poor - Alert in {data['remaining']}s")
+            elif kind == 'posture_warning':
+                self.alert("Warning: Poor posture detected. Please adjust your position.",
+                           "Warning: Poor posture detected. Please adjust your position.", key='posture_warning')
+                self.log_activity(posture_alerts=1)
+            elif kind == 'posture_countdown':
+                self.alert(f"Posture Alert: You have {data['remaining']} seconds to correct your posture.",
+                           f"Posture alert: You have {data['remaining']} seconds to correct your posture.", key='posture_countdown')
+                self.log_activity(posture_alerts=1)
+            elif kind == 'posture_alert':
+                self.alert("⚠️ POSTURE ALERT: You've been in poor posture for 2 minutes! Please adjust your sitting position.",
+                           "Posture alert! You've been in poor posture for too long. Please sit up straight.", key='posture_alert', priority=alerts.HIGH)
+                self.set_status('posture', "🪑 Posture: Poor - Needs Immediate Attention")
+                self.log_activity(posture_alerts=1)
+            elif kind == 'primary_user_found':
+                self.activate_user(data['user_id'], event.timestamp)
+                self.show_status_message("Primary user identified")
+                self.set_status('activity', "⌨ Activity Level: Normal")
+            elif kind == 'primary_user_lost':
+                self.show_status_message("Primary user no longer detected")
+                self.set_status('activity', "⌨ Activity Level: No User Detected")
+                # Reset blink count and related variables
+                self.reset_eye_monitors(event.timestamp)
+                self.set_status('eye', "👁 Eye Health: No User Detected")
+            elif kind == 'multiple_users':
+                self.alert(f"Multiple users detected ({data['count']}). Only one user should be in frame.",
+                           f"Multiple users detected. Only one user should be in frame", key='multiple_users')
+                self.set_status('activity', f"👥 Multiple Users Detected ({data['count']})")
+            elif kind == 'single_user':
+                self.set_status('activity', "⌨ Activity Level: Normal")
+                self.show_status_message("Single user detected")
+            elif kind == 'user_count':
+                # Update status bar with current user count
+                self.show_status_message(f"Detected {data['count']} user(s) in frame")
+            self.on_detector_event(event)
+
+    def calculate_posture_score(self, pose_landmarks):
+        """Calculate posture score based on body alignment"""
+        try:
+            # Get relevant landmarks
+            left_shoulder = pose_landmarks.landmark[PoseLandmark.LEFT_SHOULDER]
+            right_shoulder = pose_landmarks.landmark[PoseLandmark.RIGHT_SHOULDER]
+            left_ear = pose_landmarks.landmark[PoseLandmark.LEFT_EAR]
+            right_ear = pose_landmarks.landmark[PoseLandmark.RIGHT_EAR]
+            left_hip = pose_landmarks.landmark[PoseLandmark.LEFT_HIP]
+            right_hip = pose_landmarks.landmark[PoseLandmark.RIGHT_HIP]
+
+            # Calculate shoulder alignment
+            shoulder_angle = abs(left_shoulder.y - right_shoulder.y)
+            
+            # Calculate head position relative to shoulders
+            head_forward = abs((left_ear.x + right_ear.x)/2 - (left_shoulder.x + right_shoulder.x)/2)
+            
+            # Calculate hip alignment
+            hip_angle = abs(left_hip.y - right_hip.y)
+            
+            # Calculate neck angle (head tilt)
+            neck_angle = abs((left_ear.y + right_ear.y)/2 - (left_shoulder.y + right_shoulder.y)/2)
+            
+            # Calculate overall score (0-100)
+            score = 100 - (
+                shoulder_angle * 200 +  # Shoulder alignment
+                head_forward * 100 +    # Forward head posture
+                hip_angle * 100 +       # Hip alignment
+                neck_angle * 150        # Neck angle
+            )
+            
+            # Smooth over the primary user's recent posture samples
+            smoothed_score = max(0, min(100, self.smoothing.push(self.primary_user_id, 'posture', score)))
+            print(f"Raw posture score: {score}, Smoothed score: {smoothed_score}")  # Debug print
+            return smoothed_score
+            
+        except Exception as e:
+            print(f"Posture score calculation error: {str(e)}")
+            return 50
@@ -0,0 +1,251 @@
+"""Streaming export of raw activity and blink history.
+
+Rows are read from SQLite in ``chunk_size`` pages (keyset pagination on
+the primary key), so memory use does not depend on the size of the
+history. Supported formats are CSV, gzip-compressed CSV and Parquet
+(needs pyarrow). CSV progress is checkpointed after every chunk in
+``<output>.progress``, and ``resume=True`` continues an interrupted export
+from the last checkpoint:
+
+    python -m devwell.export activity history.csv.gz --start 2024-01-01 --end 2024-07-01
+    python -m devwell.export blink_data blinks.csv --resume
+
+A Parquet file is only readable once its footer has been written at the
+end of the export, so Parquet exports cannot be resumed; an interrupted
+one is started again.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import threading
+
+from devwell.storage import Database
+
+TABLES = ('activity', 'blink_data')
+FORMATS = ('csv', 'csv.gz', 'parquet')
+
+
+def arrow_type(pa, declared):
+    """Arrow type for a column of SQLite declared type ``declared``"""
+    declared = (declared or '').upper()
+    if 'INT' in declared:
+        return pa.int64()
+    if any(name in declared for name in ('REAL', 'FLOA', 'DOUB')):
+        return pa.float64()
+    if 'BLOB' in declared:
+        return pa.binary()
+    return pa.string()  # TEXT, and DATETIME, which this database stores as text
+
+
+def detect_format(path):
+    name = path.lower()
+    if name.endswith('.csv.gz') or name.endswith('.gz'):
+        return 'csv.gz'
+    if name.endswith('.parquet'):
+        return 'parquet'
+    return 'csv'
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class Exporter:
+    """Streams one table to one output file; see the module docstring.
+
+    Plain CSV is appended chunk by chunk; gzip output writes every chunk as
+    its own gzip member (a valid multi-member gzip file). On resume, bytes
+    written after the last checkpoint are truncated so no row is duplicated
+    or lost; if the output is missing or shorter than the checkpoint, the
+    export starts over. Parquet writes every chunk as a row group, with a schema taken
+    from the table's declared column types (so all-NULL chunks don't
+    decide a column's type), and is not resumable.
+    """
+
+    def __init__(self, database, table, path, fmt=None, start=None, end=None,
+                 chunk_size=10000, progress=None):
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        self.database = database
+        self.table = table
+        self.path = path
+        self.format = fmt or detect_format(path)
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown format: {self.format}")
+        self.start = start
+        self.end = end
+        self.chunk_size = chunk_size
+        self.progress = progress  # progress(rows_written) after every chunk
+        self.state_path = path + '.progress'
+        self.rows_written = 0
+        self._cancel = threading.Event()
+
+    @property
+    def resumable(self):
+        return self.format != 'parquet'
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self, resume=False):
+        """Export the table; returns the number of rows written"""
+        if resume and not self.resumable:
+            raise ValueError("Parquet exports cannot be resumed; start the export again")
+        state = self._load_state() if resume else None
+        if state is not None and (state['table'], state['start'], state['end']) != (self.table, self.start, self.end):
+            raise ValueError("Resume state does not match this export (table or date range differ)")
+        if state is not None and (not os.path.exists(self.path) or os.path.getsize(self.path) < state['offset']):
+            # The checkpoint no longer describes the output, so continuing from it would lose rows
+            print(f"{self.path} is missing or shorter than its checkpoint; exporting from the start")
+            state = None
+        if state is None:
+            state = {'table': self.table, 'start': self.start, 'end': self.end,
+                     'last_id': 0, 'rows': 0, 'offset': 0}
+
+        conn = self.database.connect(readonly=True)
+        try:
+            table_info = conn.execute(f"PRAGMA table_info({self.table})").fetchall()
+            columns = [row[1] for row in table_info]
+            where, params = self._filters()
+            query = (f"SELECT {', '.join(columns)} FROM {self.table} "
+                     f"WHERE id > ?{where} ORDER BY id LIMIT ?")
+            sink = self._open_sink(table_info, state)
+            try:
+                self.rows_written = state['rows']
+                while True:
+                    if self._cancel.is_set():
+                        raise ExportCancelled()
+                    rows = conn.execute(query, [state['last_id']] + params + [self.chunk_size]).fetchall()
+                    if not rows:
+                        break
+                    state['offset'] = sink.write(rows)
+                    state['last_id'] = rows[-1][0]
+                    state['rows'] += len(rows)
+                    self.rows_written = state['rows']
+                    if self.resumable:
+                        self._save_state(state)
+                    if self.progress:
+                        self.progress(self.rows_written)
+            finally:
+                sink.close()
+        finally:
+            conn.close()
+        # Finished: the checkpoint is no longer needed
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        return self.rows_written
+
+    def _filters(self):
+        where, params = "", []
+        if self.start:
+            where += " AND timestamp >= ?"
+            params.append(self.start)
+        if self.end:
+            where += " AND timestamp < ?"
+            params.append(self.end)
+        return where, params
+
+    def _open_sink(self, table_info, state):
+        if self.format == 'parquet':
+            return _ParquetSink(self.path, [(row[1], row[2]) for row in table_info])
+        columns = [row[1] for row in table_info]
+        return _CsvSink(self.path, columns, state, compress=self.format == 'csv.gz')
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+
+class _CsvSink:
+
+    def __init__(self, path, columns, state, compress=False):
+        self.compress = compress
+        resuming = state['rows'] > 0
+        self.file = open(path, 'r+b' if resuming else 'wb')
+        if resuming:
+            # Drop anything written after the last checkpoint
+            self.file.truncate(state['offset'])
+            self.file.seek(state['offset'])
+        else:
+            self._write_bytes(self._encode([columns]))
+
+    def write(self, rows):
+        self._write_bytes(self._encode(rows))
+        self.file.flush()
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+    def _encode(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    def _write_bytes(self, data):
+        self.file.write(gzip.compress(data) if self.compress else data)
+
+
+class _ParquetSink:
+
+    def __init__(self, path, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.schema = pa.schema([(name, arrow_type(pa, declared)) for name, declared in columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        data = {name: [row[i] for row in rows] for i, name in enumerate(self.schema.names)}
+        self.writer.write_table(self.pa.table(data, schema=self.schema))
+        return 0
+
+    def close(self):
+        self.writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export DevWell history without loading it into memory")
+    parser.add_argument('table', choices=TABLES)
+    parser.add_argument('output', help="output file (.csv, .csv.gz or .parquet)")
+    parser.add_argument('--db', default=os.path.join("data", "devwell.db"), help="SQLite database path")
+    parser.add_argument('--format', choices=FORMATS, help="output format (default: from the file name)")
+    parser.add_argument('--start', help="first timestamp to include (UTC, e.g. 2024-01-01)")
+    parser.add_argument('--end', help="first timestamp to exclude (UTC)")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="rows read per query")
+    parser.add_argument('--resume', action='store_true', help="continue an interrupted CSV export")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}")
+        return 1
+    exporter = Exporter(Database(args.db), args.table, args.output, fmt=args.format,
+                        start=args.start, end=args.end, chunk_size=args.chunk_size,
+                        progress=lambda rows: print(f"\r{rows:,} rows", end='', flush=True))
+    if args.resume and not exporter.resumable:
+        print("Parquet exports cannot be resumed; run the export again without --resume")
+        return 2
+    try:
+        rows = exporter.run(resume=args.resume)
+    except KeyboardInterrupt:
+        hint = "rerun with --resume to continue" if exporter.resumable else "run the export again"
+        print(f"\nInterrupted after {exporter.rows_written:,} rows; {hint}")
+        return 130
+    print(f"\nExported {rows:,} rows from {args.table} to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
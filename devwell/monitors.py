@@ -0,0 +1,234 @@
+"""Pure state machines behind DevWell's eye, posture and user alerts.
+
+Each monitor is fed ``(timestamp, measurement)`` by ``update()`` and returns
+the list of Events that update produced. Monitors never read the clock,
+touch widgets, speak or write to the database, so they run identically in
+the desktop app, in headless tools, in tests and in other processes (events
+are plain picklable tuples). Hosts decide what each event means for the UI.
+"""
+import collections
+
+Event = collections.namedtuple('Event', 'kind timestamp data')
+
+
+class BlinkMonitor:
+    """Counts blinks and checks the blink rate once a minute.
+
+    Events: ``blink`` {count, ear}, ``low_blink_rate`` {count} and
+    ``blink_minute`` {start, count, mean_ear, closed_seconds} when a minute
+    closes, summarizing the samples seen during that minute.
+    """
+
+    def __init__(self, ear_threshold=0.45, min_blinks_per_minute=17, interval=60):
+        self.ear_threshold = ear_threshold
+        self.min_blinks_per_minute = min_blinks_per_minute
+        self.interval = interval
+        self.reset(0.0)
+
+    def reset(self, timestamp):
+        self.count = 0  # Blinks in the current minute
+        self.minute_start = timestamp
+        self.eyes_closed = False  # Whether the eyes were closed on the previous sample
+        self.last_blink = timestamp
+        self.last_sample = None
+        self.ear_sum = 0.0  # EAR samples and closed-eye time in the current minute
+        self.samples = 0
+        self.closed_seconds = 0.0
+
+    def update(self, timestamp, ear):
+        events = []
+        closed = ear <= self.ear_threshold
+        if self.eyes_closed and self.last_sample is not None:
+            self.closed_seconds += timestamp - self.last_sample
+        self.ear_sum += ear
+        self.samples += 1
+        self.last_sample = timestamp
+        if closed and not self.eyes_closed:
+            # Eyes just closed: count this as a blink
+            self.count += 1
+            self.last_blink = timestamp
+            events.append(Event('blink', timestamp, {'count': self.count, 'ear': ear}))
+        self.eyes_closed = closed
+
+        if timestamp - self.minute_start >= self.interval:
+            if self.count < self.min_blinks_per_minute:
+                events.append(Event('low_blink_rate', timestamp, {'count': self.count}))
+            events.append(Event('blink_minute', timestamp, {
+                'start': self.minute_start,
+                'count': self.count,
+                'mean_ear': self.ear_sum / self.samples,
+                'closed_seconds': self.closed_seconds,
+            }))
+            self.count = 0
+            self.minute_start = timestamp
+            self.ear_sum = 0.0
+            self.samples = 0
+            self.closed_seconds = 0.0
+        return events
+
+
+class TirednessMonitor:
+    """Raises ``tiredness`` when the eyes stay closed for ``closed_seconds``"""
+
+    def __init__(self, ear_threshold=0.45, closed_seconds=30, cooldown=300):
+        self.ear_threshold = ear_threshold
+        self.closed_seconds = closed_seconds
+        self.cooldown = cooldown
+        self.last_alert = float('-inf')
+        self.reset(0.0)
+
+    def reset(self, timestamp):
+        self.closed_since = None
+
+    def update(self, timestamp, ear):
+        if ear > self.ear_threshold:
+            self.closed_since = None  # Reset timer when eyes are open
+            return []
+        if self.closed_since is None:
+            self.closed_since = timestamp
+        elif (timestamp - self.closed_since >= self.closed_seconds
+              and timestamp - self.last_alert >= self.cooldown):
+            self.last_alert = timestamp
+            return [Event('tiredness', timestamp, {'closed_for': timestamp - self.closed_since})]
+        return []
+
+
+class StaticImageMonitor:
+    """Raises ``static_image`` when no blink has been seen for ``no_blink_seconds``.
+
+    A face that never blinks is most likely a photo or a paused video.
+    """
+
+    def __init__(self, no_blink_seconds=50, cooldown=300):
+        self.no_blink_seconds = no_blink_seconds
+        self.cooldown = cooldown
+        self.last_alert = float('-inf')
+        self.seconds_since_blink = 0.0
+
+    def update(self, timestamp, last_blink):
+        self.seconds_since_blink = timestamp - last_blink
+        if (self.seconds_since_blink >= self.no_blink_seconds
+                and timestamp - self.last_alert >= self.cooldown):
+            self.last_alert = timestamp
+            return [Event('static_image', timestamp, {'seconds': self.seconds_since_blink})]
+        return []
+
+
+class PostureMonitor:
+    """Tracks how long posture has been poor and escalates in stages.
+
+    Every update emits ``posture_stage`` {stage, duration, remaining} with
+    stage one of good, fair, poor, warning, countdown or alert. One-off
+    events: ``posture_warning`` after 30 s of poor posture,
+    ``posture_countdown`` {remaining} after 60 s and ``posture_alert`` after
+    ``alert_after`` seconds (repeated at most every ``cooldown`` seconds).
+    """
+
+    def __init__(self, bad_score=40, fair_score=70, alert_after=120, cooldown=180):
+        self.bad_score = bad_score
+        self.fair_score = fair_score
+        self.alert_after = alert_after
+        self.cooldown = cooldown
+        self.last_alert = float('-inf')
+        self.reset(0.0)
+
+    def reset(self, timestamp):
+        self.bad_since = None
+        self.warning_shown = False
+        self.countdown_shown = False
+
+    def update(self, timestamp, score):
+        if score >= self.bad_score:
+            self.reset(timestamp)
+            stage = 'fair' if score < self.fair_score else 'good'
+            return [Event('posture_stage', timestamp, {'stage': stage, 'duration': 0, 'remaining': None})]
+
+        if self.bad_since is None:
+            self.bad_since = timestamp
+        duration = timestamp - self.bad_since
+        events = []
+        remaining = None
+
+        if 30 <= duration < 60:
+            stage = 'warning'
+            if not self.warning_shown:
+                self.warning_shown = True
+                events.append(Event('posture_warning', timestamp, {'duration': duration}))
+        elif duration >= self.alert_after:
+            stage = 'alert'
+            if timestamp - self.last_alert >= self.cooldown:
+                self.last_alert = timestamp
+                self.warning_shown = False
+                events.append(Event('posture_alert', timestamp, {'duration': duration}))
+        elif duration >= 60:
+            stage = 'countdown'
+            remaining = int(self.alert_after - duration)
+            if not self.countdown_shown:
+                self.countdown_shown = True
+                events.append(Event('posture_countdown', timestamp, {'remaining': remaining}))
+        else:
+            stage = 'poor'
+            self.warning_shown = False
+            self.countdown_shown = False
+
+        events.insert(0, Event('posture_stage', timestamp,
+                               {'stage': stage, 'duration': duration, 'remaining': remaining}))
+        return events
+
+
+class UserPresenceMonitor:
+    """Follows which users are in frame and who the primary user is.
+
+    ``update()`` takes the IDs of the faces found by one user check. The
+    primary user is lost once they have not been seen for ``user_timeout``
+    seconds, even if other people are still in frame; the first face of
+    the next check then becomes the primary user. Events:
+    ``primary_user_found`` {user_id}, ``primary_user_lost`` {user_id},
+    ``multiple_users`` {count} (once until back to a single user),
+    ``single_user`` and ``user_count`` {count} after every check with faces.
+    """
+
+    def __init__(self, user_timeout=3):
+        self.user_timeout = user_timeout
+        self.reset(0.0)
+
+    def reset(self, timestamp):
+        self.users = {}  # user_id -> last seen timestamp
+        self.primary_user_id = None
+        self.multiple_users_alerted = False
+
+    def update(self, timestamp, user_ids):
+        events = []
+        if not user_ids:
+            primary = self.primary_user_id
+            if primary and timestamp - self.users.get(primary, float('-inf')) > self.user_timeout:
+                self.primary_user_id = None
+                events.append(Event('primary_user_lost', timestamp, {'user_id': primary}))
+            return events
+
+        for user_id in user_ids:
+            self.users[user_id] = timestamp
+        # Forget users that haven't been seen recently
+        self.users = {user_id: seen for user_id, seen in self.users.items()
+                      if timestamp - seen <= self.user_timeout}
+        if self.primary_user_id and self.primary_user_id not in self.users:
+            # The primary user left while someone else stayed in view
+            events.append(Event('primary_user_lost', timestamp, {'user_id': self.primary_user_id}))
+            self.primary_user_id = None
+
+        if not self.primary_user_id:
+            self.primary_user_id = user_ids[0]
+            self.multiple_users_alerted = False
+            events.append(Event('primary_user_found', timestamp, {'user_id': self.primary_user_id}))
+
+        count = len(set(user_ids))
+        if count > 1:
+            if not self.multiple_users_alerted:
+                self.multiple_users_alerted = True
+                events.append(Event('multiple_users', timestamp, {'count': count}))
+        elif self.multiple_users_alerted:
+            self.multiple_users_alerted = False
+            events.append(Event('single_user', timestamp, {}))
+
+        events.append(Event('user_count', timestamp, {'count': count}))
+        return events
@@ -0,0 +1,211 @@
+"""Staged capture -> inference pipeline for camera frames."""
+import collections
+import threading
+import time
+import traceback
+
+
+class DropOldestQueue:
+    """Bounded FIFO that discards its oldest item instead of blocking when full.
+
+    Producers never wait on slow consumers, so a stalled stage can only make
+    frames stale by at most ``maxsize`` items. Drops are counted so the owner
+    can see which stage is falling behind.
+    """
+
+    def __init__(self, maxsize=2):
+        self.maxsize = max(1, maxsize)
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest item, or None if nothing arrived within timeout"""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def get_nowait(self):
+        with self._cond:
+            return self._items.popleft() if self._items else None
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class FramePipeline:
+    """Runs camera capture and frame inference on separate threads.
+
+    ``read_frame()`` is called on the capture thread and must behave like
+    ``cv2.VideoCapture.read`` (returning ``(ok, frame)``). ``process(frame,
+    captured_at)`` runs on a single inference thread, since the detectors keep
+    per-frame state; it hands anything to display to the GUI itself (see
+    devwell.preview.PreviewBuffer), and its return value is ignored.
+    ``on_error(message)`` is called once if either worker gives up, after
+    which the pipeline stops.
+    ``frame_interval()``, if given, returns the minimum number of seconds
+    between captured frames; the capture thread sleeps instead of reading
+    while nothing downstream needs a new frame. With ``retry_capture`` the
+    source recovers from failures by itself (e.g. a reconnecting Camera), so
+    failed reads are counted but never stop the pipeline.
+    """
+
+    def __init__(self, read_frame, process, on_error=None,
+                 capture_queue_size=2, max_consecutive_failures=5, frame_interval=None, retry_capture=False):
+        self.read_frame = read_frame
+        self.process = process
+        self.on_error = on_error
+        self.frame_interval = frame_interval
+        self.max_consecutive_failures = max_consecutive_failures
+        self.retry_capture = retry_capture
+        self.capture_queue = DropOldestQueue(capture_queue_size)
+
+        self.running = False
+        self._threads = []
+        self._error_reported = False
+        self._lock = threading.Lock()
+
+        # Per-stage counters, reported by stats()
+        self.frames_captured = 0
+        self.capture_failures = 0
+        self.frames_processed = 0
+        self.process_failures = 0
+        self.avg_latency = 0.0  # Seconds from capture to end of inference (EMA)
+        self.max_latency = 0.0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._error_reported = False
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="devwell-capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="devwell-inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        self.running = False
+        current = threading.current_thread()
+        for thread in self._threads:
+            if thread is not current and thread.is_alive():
+                thread.join(timeout)
+        self._threads = []
+        self.capture_queue.clear()
+
+    def stats(self):
+        """Queue depth, drop and throughput counters for each stage"""
+        return {
+            'capture': {
+                'queue_depth': len(self.capture_queue),
+                'dropped': self.capture_queue.dropped,
+                'frames': self.frames_captured,
+                'failures': self.capture_failures,
+            },
+            'inference': {
+                'frames': self.frames_processed,
+                'failures': self.process_failures,
+                'avg_latency_ms': self.avg_latency * 1000,
+                'max_latency_ms': self.max_latency * 1000,
+            },
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        return (f"capture q={stats['capture']['queue_depth']} drop={stats['capture']['dropped']} | "
+                f"inference frames={stats['inference']['frames']} "
+                f"latency={stats['inference']['avg_latency_ms']:.0f}ms "
+                f"(max {stats['inference']['max_latency_ms']:.0f}ms)")
+
+    def _fail(self, message):
+        with self._lock:
+            if self._error_reported:
+                return
+            self._error_reported = True
+        self.running = False
+        print(f"Frame pipeline stopped: {message}")
+        if self.on_error:
+            self.on_error(message)
+
+    def _wait_for_next_frame(self, last_capture):
+        """Sleep in short steps until the next frame is wanted or we stop"""
+        while self.running:
+            interval = self.frame_interval() if self.frame_interval else 0
+            remaining = last_capture + interval - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 0.1))
+
+    def _capture_loop(self):
+        consecutive_failures = 0
+        last_capture = 0.0
+        while self.running:
+            self._wait_for_next_frame(last_capture)
+            if not self.running:
+                return
+            last_capture = time.time()
+            try:
+                ret, frame = self.read_frame()
+            except Exception as e:
+                print(f"Frame capture error: {str(e)}")
+                ret, frame = False, None
+            if not ret or frame is None:
+                consecutive_failures += 1
+                self.capture_failures += 1
+                if self.retry_capture:
+                    time.sleep(0.1)
+                    continue
+                print(f"Failed to read frame. Attempt {consecutive_failures}/{self.max_consecutive_failures}")
+                if consecutive_failures >= self.max_consecutive_failures:
+                    self._fail("Failed to read from webcam after multiple attempts")
+                    return
+                time.sleep(0.1)
+                continue
+
+            consecutive_failures = 0
+            self.frames_captured += 1
+            self.capture_queue.put((frame, time.time()))
+
+    def _inference_loop(self):
+        consecutive_failures = 0
+        while self.running:
+            item = self.capture_queue.get(timeout=0.1)
+            if item is None:
+                continue
+            frame, captured_at = item
+            try:
+                self.process(frame, captured_at)
+            except Exception as e:
+                print(f"Error processing frame: {str(e)}")
+                traceback.print_exc()
+                consecutive_failures += 1
+                self.process_failures += 1
+                if consecutive_failures >= self.max_consecutive_failures:
+                    self._fail(f"Multiple frame processing errors: {str(e)}")
+                    return
+                continue
+
+            consecutive_failures = 0
+            self.frames_processed += 1
+            latency = time.time() - captured_at
+            self.avg_latency = latency if self.frames_processed == 1 else 0.9 * self.avg_latency + 0.1 * latency
+            self.max_latency = max(self.max_latency, latency)
@@ -0,0 +1,75 @@
+"""Camera preview hand-off between the inference thread and the GUI.
+
+PreviewBuffer is a triple buffer of preallocated RGB frames. The producer
+(inference thread) fills the write buffer and publishes it; the consumer
+(GUI thread) takes the newest published frame and may keep reading it
+while the producer carries on with the other two buffers, so no frame is
+copied or reallocated per publish and neither side ever sees a frame that
+is being written. The producer is throttled to ``max_fps`` and does no work
+at all while the preview is disabled (e.g. the window is minimized).
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class PreviewBuffer:
+
+    def __init__(self, max_fps=15.0):
+        self.max_fps = max_fps
+        self.enabled = True
+        self._buffers = None  # [write, ready, read]
+        self._fresh = False
+        self._lock = threading.Lock()
+        self._last_publish = 0.0
+        self.published = 0
+        self.skipped = 0  # Frames not previewed because of the fps cap or while disabled
+        self.dropped = 0  # Published frames replaced before the GUI took them
+
+    def wants_frame(self, now=None):
+        """Whether the producer should prepare a preview frame now"""
+        now = time.time() if now is None else now
+        if not self.enabled or (self.max_fps and now - self._last_publish < 1.0 / self.max_fps):
+            self.skipped += 1
+            return False
+        return True
+
+    def write_buffer(self, shape):
+        """Buffer the producer may fill for the next publish (producer thread only)"""
+        if self._buffers is None or self._buffers[0].shape != shape:
+            with self._lock:
+                self._buffers = [np.empty(shape, dtype=np.uint8) for _ in range(3)]
+                self._fresh = False
+        return self._buffers[0]
+
+    def publish(self, now=None):
+        """Make the filled write buffer the newest frame"""
+        with self._lock:
+            self._buffers[0], self._buffers[1] = self._buffers[1], self._buffers[0]
+            if self._fresh:
+                self.dropped += 1
+            self._fresh = True
+        self._last_publish = time.time() if now is None else now
+        self.published += 1
+
+    def take(self):
+        """Newest published frame, or None if nothing new (consumer thread only).
+
+        The returned array stays valid and unchanged until the next take().
+        """
+        with self._lock:
+            if not self._fresh:
+                return None
+            self._buffers[1], self._buffers[2] = self._buffers[2], self._buffers[1]
+            self._fresh = False
+            return self._buffers[2]
+
+    @property
+    def pending(self):
+        """Published frames waiting for the GUI (0 or 1)"""
+        return int(self._fresh)
+
+    def clear(self):
+        with self._lock:
+            self._fresh = False
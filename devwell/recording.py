@@ -0,0 +1,211 @@
+"""Compact, memory-mappable recordings of per-frame landmark streams.
+
+A recording is a directory of raw little-endian column files plus a
+``meta.json`` describing them:
+
+    timestamps.f8   (frames,)                  capture time, seconds
+    brightness.f4   (frames,)                  mean grayscale brightness
+    face_count.u1   (frames,)                  faces found in the frame
+    faces.f4        (total faces, L, 3)        face landmarks, all frames back to back
+    pose.f4         (frames, 33, 4)            x, y, z, visibility; NaN if no body
+
+Columns are appended frame by frame while recording and opened with
+``np.memmap`` for replay, so neither side holds the stream in memory. If a
+recording is cut short, replay uses the frames whose columns are complete.
+"""
+import json
+import os
+
+import numpy as np
+
+from devwell.vision import EAR_LANDMARKS
+
+FORMAT = 'devwell-landmarks'
+VERSION = 1
+POSE_LANDMARKS = 33
+
+
+def is_recording(path):
+    """True if path is a landmark recording directory"""
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.isfile(meta_path):
+        return False
+    with open(meta_path) as f:
+        return json.load(f).get('format') == FORMAT
+
+
+class LandmarkRecorder:
+    """Appends each analysed frame's landmarks to a recording directory"""
+
+    def __init__(self, path, landmarks_per_face=468):
+        self.path = path
+        self.landmarks_per_face = landmarks_per_face
+        self.frame_shape = None
+        self.frames = 0
+        os.makedirs(path, exist_ok=True)
+        self._files = {name: open(os.path.join(path, name), 'wb')
+                       for name in ('timestamps.f8', 'brightness.f4', 'face_count.u1', 'faces.f4', 'pose.f4')}
+        self._empty_pose = np.full((POSE_LANDMARKS, 4), np.nan, dtype='<f4')
+
+    def write(self, analysis):
+        """Record one FrameAnalysis; inference must already have run on it"""
+        if self.frame_shape is None:
+            self.frame_shape = list(analysis.frame_shape)
+            self._write_meta()
+        faces = analysis.face_points.astype('<f4', copy=False)
+        if len(faces) and faces.shape[1] != self.landmarks_per_face:
+            self.landmarks_per_face = faces.shape[1]
+            self._write_meta()
+
+        pose = self._empty_pose
+        if analysis.pose_landmarks:
+            pose = np.array([(p.x, p.y, p.z, p.visibility) for p in analysis.pose_landmarks.landmark],
+                            dtype='<f4')
+
+        # Variable-size columns first, so a frame is only counted once it is complete
+        self._files['faces.f4'].write(faces.tobytes())
+        self._files['pose.f4'].write(pose.tobytes())
+        self._files['brightness.f4'].write(np.float32(analysis.brightness).astype('<f4').tobytes())
+        self._files['face_count.u1'].write(np.uint8(min(len(faces), 255)).tobytes())
+        self._files['timestamps.f8'].write(np.float64(analysis.timestamp).astype('<f8').tobytes())
+        self.frames += 1
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        self._write_meta()
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump({
+                'format': FORMAT,
+                'version': VERSION,
+                'landmarks_per_face': self.landmarks_per_face,
+                'pose_landmarks': POSE_LANDMARKS,
+                'frame_shape': self.frame_shape,
+                'frames': self.frames,
+            }, f, indent=2)
+
+
+class _Point:
+    """Landmark with the attributes MediaPipe landmarks have"""
+    __slots__ = ('x', 'y', 'z', 'visibility')
+
+    def __init__(self, x, y, z, visibility=1.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+        self.visibility = float(visibility)
+
+
+class LandmarkArray:
+    """Read-only stand-in for a MediaPipe landmark list, backed by an array row.
+
+    ``landmark[i]`` builds point objects on demand, so code written against
+    MediaPipe results works unchanged without converting every point.
+    """
+
+    def __init__(self, points):
+        self.points = points
+        self.landmark = _LandmarkSequence(points)
+
+
+class _LandmarkSequence:
+    def __init__(self, points):
+        self._points = points
+
+    def __getitem__(self, index):
+        return _Point(*self._points[index])
+
+    def __len__(self):
+        return len(self._points)
+
+    def __iter__(self):
+        for row in self._points:
+            yield _Point(*row)
+
+
+class RecordedAnalysis:
+    """FrameAnalysis look-alike built from one recorded frame.
+
+    Exposes what the detectors read (timestamp, brightness, face and pose
+    landmarks, face_points and subsets of them), with inference already "done".
+    """
+
+    roi = None
+    pose_roi = None
+    thumbnail = None
+    face_ready = True
+    pose_ready = True
+
+    def __init__(self, timestamp, brightness, face_points, pose, frame_shape):
+        self.timestamp = timestamp
+        self.brightness = brightness
+        self.face_points = face_points
+        self.face_landmarks = [LandmarkArray(points) for points in face_points]
+        self.pose_landmarks = None if np.isnan(pose[0, 0]) else LandmarkArray(pose)
+        self.frame_shape = frame_shape
+
+    def landmark_points(self, indices):
+        return self.face_points[:, list(indices)]
+
+    @property
+    def eye_points(self):
+        return self.landmark_points(EAR_LANDMARKS)
+
+
+class LandmarkStream:
+    """Memory-mapped reader for a LandmarkRecorder directory"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('format') != FORMAT:
+            raise ValueError(f"Not a DevWell landmark recording: {path}")
+        self.frame_shape = tuple(self.meta.get('frame_shape') or (480, 640))
+        landmarks = self.meta['landmarks_per_face']
+
+        timestamps = self._column('timestamps.f8', '<f8')
+        brightness = self._column('brightness.f4', '<f4')
+        face_count = self._column('face_count.u1', 'u1')
+        pose = self._rows(self._column('pose.f4', '<f4'), (POSE_LANDMARKS, 4))
+        faces = self._rows(self._column('faces.f4', '<f4'), (landmarks, 3))
+
+        # Only frames whose every column was fully written
+        offsets = np.concatenate(([0], np.cumsum(face_count, dtype=np.int64)))
+        complete = min(len(timestamps), len(brightness), len(face_count), len(pose))
+        while complete and offsets[complete] > len(faces):
+            complete -= 1
+        self.frames = complete
+        self.timestamps = timestamps[:complete]
+        self.brightness = brightness[:complete]
+        self.face_offsets = offsets[:complete + 1]
+        self.faces = faces
+        self.pose = pose[:complete]
+
+    def _column(self, name, dtype):
+        path = os.path.join(self.path, name)
+        itemsize = np.dtype(dtype).itemsize
+        if os.path.getsize(path) < itemsize:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    @staticmethod
+    def _rows(flat, shape):
+        """Reshape a flat column into rows of shape, dropping a partly written last row"""
+        row_size = int(np.prod(shape))
+        return flat[:len(flat) // row_size * row_size].reshape((-1,) + shape)
+
+    def __len__(self):
+        return self.frames
+
+    def analysis(self, index):
+        start, end = self.face_offsets[index], self.face_offsets[index + 1]
+        return RecordedAnalysis(float(self.timestamps[index]), float(self.brightness[index]),
+                                np.asarray(self.faces[start:end]), self.pose[index], self.frame_shape)
+
+    def __iter__(self):
+        for index in range(self.frames):
+            yield self.analysis(index)
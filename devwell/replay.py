@@ -0,0 +1,247 @@
+"""Headless replay of recorded sessions through the DevWell detectors.
+
+Feeds a video file or a directory of frames through the same detector
+pipeline the desktop app runs, as fast as possible and without a camera or
+Qt, and reports throughput, per-stage latency percentiles and the alert
+timeline. Intended as a regression benchmark on CI machines:
+
+    python -m devwell.replay session.mp4 --json result.json
+    python -m devwell.replay frames/ --fps 30 --baseline baseline.json
+
+Landmark recordings (see devwell.recording) skip decoding and inference
+entirely and go straight into the detector logic, which makes threshold
+tuning runs far faster than real time:
+
+    python -m devwell.replay session.mp4 --record session-landmarks/
+    python -m devwell.replay session-landmarks/
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+
+from devwell.detectors import VisionDetectors
+from devwell.recording import LandmarkRecorder, LandmarkStream, is_recording
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def iter_frames(path, fps=None, limit=None):
+    """Yield (frame, seconds from start) from a video file or a frame directory"""
+    if os.path.isdir(path):
+        names = sorted(name for name in os.listdir(path) if name.lower().endswith(IMAGE_EXTENSIONS))
+        fps = fps or 30.0
+        for index, name in enumerate(names[:limit]):
+            frame = cv2.imread(os.path.join(path, name))
+            if frame is None:
+                print(f"Skipping unreadable frame: {name}")
+                continue
+            yield frame, index / fps
+        return
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Unable to open recording: {path}")
+    fps = fps or cap.get(cv2.CAP_PROP_FPS) or 30.0
+    try:
+        index = 0
+        while limit is None or index < limit:
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                break
+            yield frame, index / fps
+            index += 1
+    finally:
+        cap.release()
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    result = {f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000 for p in points}
+    result['max'] = ordered[-1] * 1000
+    result['count'] = len(ordered)
+    return result
+
+
+class ReplaySession(VisionDetectors):
+    """Detector host that records side effects instead of showing them.
+
+    Timestamps are simulated from the recording's frame rate, so timing
+    based alerts (blink rate per minute, posture stages) fire exactly as
+    they would live, however fast the replay runs.
+    """
+
+    def __init__(self, start_time=None, build_graphs=True):
+        self.start_time = time.time() if start_time is None else start_time
+        self._now = self.start_time  # Simulated time of the frame being replayed
+        self.init_detector_state(now=self.start_time)
+        if build_graphs:
+            self.init_vision_graphs()  # Not needed to replay landmark recordings
+        self.reset_detector_state(now=self.start_time)
+        self.timeline = []  # (seconds from start, key, message)
+        self.activity = {}
+        self.status = {}
+        self.timings = {}  # stage -> list of seconds
+        self.frames = 0
+
+    # Side-effect hooks
+
+    def alert(self, message=None, speech=None, key=None, priority=None):
+        offset = self._now - self.start_time
+        self.timeline.append((round(offset, 3), key or speech or message, message or speech))
+
+    def log_activity(self, **counts):
+        for column, value in counts.items():
+            self.activity[column] = self.activity.get(column, 0) + value
+
+    def set_status(self, field, text):
+        self.status[field] = text
+
+    def show_status_message(self, text):
+        self.status['message'] = text
+
+    # Timed detectors; inference is lazy, so it is timed separately from the
+    # detector that happens to trigger it first
+
+    def _time(self, stage, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.timings.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    def _time_inference(self, analysis, face=False, pose=False):
+        if face and not analysis.face_ready:
+            self._time('face_mesh', lambda: analysis.face_landmarks)
+        if pose and not analysis.pose_ready:
+            self._time('pose', lambda: analysis.pose_landmarks)
+
+    def detect_users(self, analysis):
+        self._time_inference(analysis, face=True)
+        return self._time('users', super().detect_users, analysis)
+
+    def detect_eye_strain(self, analysis):
+        if analysis.brightness >= 40:
+            self._time_inference(analysis, face=True)
+        return self._time('eyes', super().detect_eye_strain, analysis)
+
+    def detect_posture(self, analysis):
+        if self.pose_gate.check(analysis):
+            self._time_inference(analysis, pose=True)
+        return self._time('posture', super().detect_posture, analysis)
+
+    def replay(self, frames):
+        """Run every (frame, offset) pair through the detectors; returns the report"""
+        wall_start = time.perf_counter()
+        for frame, offset in frames:
+            self._now = self.start_time + offset
+            self._time('frame', self.analyse_frame, frame, self._now)
+            self.frames += 1
+        elapsed = time.perf_counter() - wall_start
+        return self.report(elapsed)
+
+    def replay_landmarks(self, stream):
+        """Run a LandmarkStream straight through the detector logic; returns the report"""
+        wall_start = time.perf_counter()
+        first_timestamp = None
+        for analysis in stream:
+            if first_timestamp is None:
+                first_timestamp = analysis.timestamp
+            self._now = self.start_time + (analysis.timestamp - first_timestamp)
+            analysis.timestamp = self._now
+            users_due = self.detector_scheduler.due('users', self._now)
+            self._time('frame', self.run_detectors, analysis, users_due)
+            self.frames += 1
+        elapsed = time.perf_counter() - wall_start
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        return {
+            'frames': self.frames,
+            'elapsed_s': elapsed,
+            'fps': self.frames / elapsed if elapsed > 0 else 0.0,
+            'latency_ms': {stage: percentiles(samples) for stage, samples in self.timings.items()},
+            'alerts': [{'t': t, 'key': key, 'message': message} for t, key, message in self.timeline],
+            'activity': self.activity,
+            'pose_gate': {'hits': self.pose_gate.hits, 'skips': self.pose_gate.skips},
+        }
+
+
+def print_report(report):
+    print(f"Frames: {report['frames']}  elapsed: {report['elapsed_s']:.2f}s  fps: {report['fps']:.1f}")
+    print(f"{'stage':<10} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)")
+    for stage, stats in sorted(report['latency_ms'].items()):
+        print(f"{stage:<10} {stats['count']:>6} {stats['p50']:>9.2f} {stats['p95']:>9.2f} "
+              f"{stats['p99']:>9.2f} {stats['max']:>9.2f}")
+    gate = report.get('pose_gate')
+    if gate:
+        print(f"Pose gate: ran {gate['hits']}, skipped {gate['skips']} unchanged frames")
+    print(f"Alerts ({len(report['alerts'])}):")
+    for alert in report['alerts']:
+        print(f"  {alert['t']:>9.1f}s  {alert['key']}")
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """Return a list of regressions against a previous report"""
+    problems = []
+    if report['fps'] < baseline['fps'] * (1 - tolerance):
+        problems.append(f"fps dropped from {baseline['fps']:.1f} to {report['fps']:.1f}")
+    for stage, stats in baseline.get('latency_ms', {}).items():
+        current = report['latency_ms'].get(stage)
+        if current and current['p95'] > stats['p95'] * (1 + tolerance):
+            problems.append(f"{stage} p95 latency rose from {stats['p95']:.2f}ms to {current['p95']:.2f}ms")
+    expected = [alert['key'] for alert in baseline.get('alerts', [])]
+    actual = [alert['key'] for alert in report['alerts']]
+    if expected != actual:
+        problems.append(f"alert timeline changed: expected {expected}, got {actual}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the DevWell detectors")
+    parser.add_argument('source', help="video file, directory of frames or landmark recording")
+    parser.add_argument('--fps', type=float, help="frame rate of the recording (default: from file, or 30)")
+    parser.add_argument('--limit', type=int, help="stop after this many frames")
+    parser.add_argument('--record', help="also save the landmark stream to this directory")
+    parser.add_argument('--json', help="write the report to this file")
+    parser.add_argument('--baseline', help="fail if worse than this earlier --json report")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed fps/latency regression against the baseline (default 0.2)")
+    args = parser.parse_args(argv)
+
+    if is_recording(args.source):
+        session = ReplaySession(build_graphs=False)
+        stream = LandmarkStream(args.source)
+        frames = (stream.analysis(i) for i in range(min(len(stream), args.limit or len(stream))))
+        report = session.replay_landmarks(frames)
+    else:
+        session = ReplaySession()
+        if args.record:
+            session.landmark_recorder = LandmarkRecorder(args.record)
+        try:
+            report = session.replay(iter_frames(args.source, args.fps, args.limit))
+        finally:
+            if session.landmark_recorder is not None:
+                session.landmark_recorder.close()
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = compare_to_baseline(report, baseline, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
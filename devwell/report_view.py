@@ -0,0 +1,270 @@
+"""Qt report view with one long-lived figure that is updated in place.
+
+The dialog is created once and kept: switching between daily, weekly and
+monthly reports or between users (or reopening the window) starts a new
+ReportJob on a background thread and, as each dataset arrives, updates the
+existing bar heights and line data instead of building a new figure. A busy indicator
+shows while data is loading. ``dispose()`` frees the figure and canvas.
+matplotlib is imported when the view is first created.
+"""
+import datetime
+
+from PyQt5 import QtCore, QtWidgets
+
+from devwell.reports import PERIOD_DAYS, ReportJob
+
+HEALTH_COLUMNS = ['eye_alerts', 'posture_alerts', 'low_light_alerts']
+ACTIVITY_COLUMNS = ['keyboard_activity', 'mouse_activity']
+SESSION_COLUMNS = ['session_duration']
+
+
+class BarGroup:
+    """Grouped bar chart on one axes whose bars are updated in place.
+
+    Bar heights are changed on the existing patches when the number of
+    days is unchanged; only when it changes are the bar containers of this
+    axes rebuilt (the figure and axes themselves are kept).
+    """
+
+    def __init__(self, ax, columns, title, ylabel):
+        self.ax = ax
+        self.columns = columns
+        self.containers = []
+        ax.set_title(title)
+        ax.set_ylabel(ylabel)
+
+    def update(self, labels, frame):
+        count = len(labels)
+        if self.containers and len(self.containers[0].patches) == count:
+            for container, column in zip(self.containers, self.columns):
+                for patch, height in zip(container.patches, frame[column]):
+                    patch.set_height(height)
+        else:
+            for container in self.containers:
+                container.remove()
+            width = 0.8 / len(self.columns)
+            self.containers = [
+                self.ax.bar([i + (n - (len(self.columns) - 1) / 2) * width for i in range(count)],
+                            list(frame[column]), width, label=column)
+                for n, column in enumerate(self.columns)
+            ]
+            if len(self.columns) > 1:
+                self.ax.legend(loc='upper right')
+        self.ax.set_xticks(range(count))
+        self.ax.set_xticklabels(labels, rotation=45, ha='right')
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+
+class ReportDialog(QtWidgets.QDialog):
+    # Emitted from the report thread with the id of the job that produced it
+    dataset_ready = QtCore.pyqtSignal(int, str, object)
+    load_finished = QtCore.pyqtSignal(int, object)
+
+    def __init__(self, parent, database, min_blink_threshold, prepare=(), on_save=None):
+        super().__init__(parent)
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_qt5agg import FigureCanvas
+
+        self.database = database
+        self.min_blink_threshold = min_blink_threshold
+        self.prepare = prepare
+        self.on_save = on_save
+        self.period = None
+        self.user_id = None  # None: all users
+        self.datasets = {}
+        self.job = None
+        self.job_id = 0
+        self.setGeometry(200, 200, 1200, 900)
+
+        layout = QtWidgets.QVBoxLayout()
+
+        controls = QtWidgets.QHBoxLayout()
+        self.period_input = QtWidgets.QComboBox()
+        self.period_input.addItems([period.capitalize() for period in PERIOD_DAYS])
+        self.period_input.activated.connect(
+            lambda index: self.load(list(PERIOD_DAYS)[index]))
+        controls.addWidget(QtWidgets.QLabel("Period:"))
+        controls.addWidget(self.period_input)
+        # Filled from the users table by every load
+        self.user_input = QtWidgets.QComboBox()
+        self.user_input.addItem("All users", None)
+        self.user_input.activated.connect(self.select_user)
+        controls.addWidget(QtWidgets.QLabel("User:"))
+        controls.addWidget(self.user_input)
+        # Busy indicator while a report is loading
+        self.progress = QtWidgets.QProgressBar()
+        self.progress.setRange(0, 0)
+        self.progress.setFormat("Loading report...")
+        self.progress.setTextVisible(True)
+        controls.addWidget(self.progress, 1)
+        layout.addLayout(controls)
+
+        # One figure for the lifetime of the view, created without pyplot so
+        # it is not tracked by pyplot's global figure manager
+        self.figure = Figure(figsize=(12, 12))
+        health_ax = self.figure.add_subplot(411)
+        self.blink_ax = self.figure.add_subplot(412)
+        activity_ax = self.figure.add_subplot(413)
+        session_ax = self.figure.add_subplot(414)
+        self.charts = [
+            BarGroup(health_ax, HEALTH_COLUMNS, 'Health Alerts', 'Number of Alerts'),
+            BarGroup(activity_ax, ACTIVITY_COLUMNS, 'Activity Levels', 'Activity Count'),
+            BarGroup(session_ax, SESSION_COLUMNS, 'Session Duration', 'Duration (seconds)'),
+        ]
+        self.blink_ax.set_title('Blink Rate Over Time')
+        self.blink_ax.set_ylabel('Blinks per Minute')
+        self.blink_line, = self.blink_ax.plot([], [], marker='o', label='Blinks')
+        self.threshold_line = self.blink_ax.axhline(y=min_blink_threshold, color='r', linestyle='--',
+                                                    label=f'Minimum Target ({min_blink_threshold})')
+        self.blink_ax.legend()
+        self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(self.canvas)
+
+        self.stats_text = QtWidgets.QTextEdit()
+        self.stats_text.setReadOnly(True)
+        layout.addWidget(self.stats_text)
+
+        self.save_button = QtWidgets.QPushButton("Save Report")
+        self.save_button.clicked.connect(self.save)
+        layout.addWidget(self.save_button)
+        self.setLayout(layout)
+
+        self.dataset_ready.connect(self.on_dataset)
+        self.load_finished.connect(self.on_finished)
+
+    def load(self, period, min_blink_threshold=None):
+        """Start loading a period; charts update in place as data arrives"""
+        if self.job is not None:
+            self.job.cancel()
+        if min_blink_threshold is not None and min_blink_threshold != self.min_blink_threshold:
+            self.min_blink_threshold = min_blink_threshold
+            self.threshold_line.set_ydata([min_blink_threshold, min_blink_threshold])
+            self.threshold_line.set_label(f'Minimum Target ({min_blink_threshold})')
+            self.blink_ax.legend()
+        self.period = period
+        self.period_input.setCurrentIndex(list(PERIOD_DAYS).index(period))
+        title = f"DevWell {period.capitalize()} Report"
+        if self.user_id is not None:
+            title += f" - {self.user_input.currentText()}"
+        self.setWindowTitle(title)
+        self.datasets = {}
+        self.save_button.setEnabled(False)
+        self.progress.show()
+        self.stats_text.setHtml("<h3>Summary Statistics</h3><p>Loading...</p>")
+
+        self.job_id += 1
+        job_id = self.job_id
+        self.job = ReportJob(self.database, period,
+                             lambda name, frame: self.dataset_ready.emit(job_id, name, frame),
+                             on_done=lambda error: self.load_finished.emit(job_id, error),
+                             prepare=self.prepare, user_id=self.user_id)
+        self.start_date = self.job.start_date
+        self.job.start()
+
+    def on_dataset(self, job_id, name, frame):
+        if job_id != self.job_id:
+            return  # Late result of a superseded load
+        self.datasets[name] = frame
+        if name == 'users':
+            self.update_users(frame)
+            return
+        if name == 'activity':
+            labels = list(frame['Date'])
+            for chart in self.charts:
+                chart.update(labels, frame)
+        elif name == 'blinks':
+            self.update_blinks(frame)
+        self.figure.tight_layout()
+        self.canvas.draw_idle()
+
+    def on_finished(self, job_id, error):
+        if job_id != self.job_id:
+            return
+        self.progress.hide()
+        if error:
+            self.stats_text.setHtml(f"<h3>Error generating report</h3><p>{error}</p>")
+            return
+        self.save_button.setEnabled(True)
+        self.stats_text.setHtml(self.summary_html())
+
+    def select_user(self, index):
+        self.user_id = self.user_input.itemData(index)
+        self.load(self.period)
+
+    def update_users(self, df_users):
+        self.user_input.clear()
+        self.user_input.addItem("All users", None)
+        for user_id, name in zip(df_users['user_id'], df_users['name']):
+            self.user_input.addItem(name, user_id)
+        index = 0 if self.user_id is None else self.user_input.findData(self.user_id)
+        self.user_input.setCurrentIndex(max(0, index))
+
+    def update_blinks(self, df_blinks):
+        count = len(df_blinks)
+        self.blink_line.set_data(range(count), list(df_blinks['Blinks']))
+        # Label a handful of points only; there can be thousands
+        step = max(1, count // 12)
+        self.blink_ax.set_xticks(range(0, count, step))
+        self.blink_ax.set_xticklabels(list(df_blinks['Time'])[::step], rotation=45, ha='right')
+        self.blink_ax.relim()
+        self.blink_ax.autoscale_view()
+
+    def summary_html(self):
+        df_activity = self.datasets.get('activity')
+        df_blinks = self.datasets.get('blinks')
+        if (df_activity is None or df_activity.empty) and (df_blinks is None or df_blinks.empty):
+            return "<h3>No data available for the selected period</h3>"
+        if df_activity is None or df_activity.empty:
+            return "<h3>No activity data available</h3>"
+
+        days = len(df_activity)
+        stats_html = f"""
+        <h3>Summary Statistics</h3>
+            <p><b>Period:</b> {self.period.capitalize()} Report ({self.start_date.date()} to {datetime.datetime.now().date()})</p>
+            <p><b>User:</b> {self.user_input.currentText()}</p>
+        """
+        stats_html += f"<p><b>Total Eye Alerts:</b> {df_activity['eye_alerts'].sum()}</p>"
+        stats_html += f"<p><b>Total Posture Alerts:</b> {df_activity['posture_alerts'].sum()}</p>"
+        stats_html += f"<p><b>Total Low Light Alerts:</b> {df_activity['low_light_alerts'].sum()}</p>"
+        stats_html += f"<p><b>Total Breaks:</b> {df_activity['breaks'].sum()}</p>"
+        if df_blinks is not None and not df_blinks.empty:
+            stats_html += f"<p><b>Average Blinks per Minute:</b> {df_blinks['Blinks'].mean():.1f}</p>"
+        total_keyboard = df_activity['keyboard_activity'].sum()
+        stats_html += f"<p><b>Total Keyboard Activity:</b> {total_keyboard:,} keystrokes</p>"
+        stats_html += f"<p><b>Average Keyboard Activity per Day:</b> {total_keyboard/days:,.0f} keystrokes</p>"
+        total_mouse = df_activity['mouse_activity'].sum()
+        stats_html += f"<p><b>Total Mouse Activity:</b> {total_mouse:,} clicks</p>"
+        stats_html += f"<p><b>Average Mouse Activity per Day:</b> {total_mouse/days:,.0f} clicks</p>"
+        total_duration = df_activity['session_duration'].sum()
+        stats_html += f"<p><b>Total Session Duration:</b> {total_duration/3600:.1f} hours</p>"
+        stats_html += f"<p><b>Average Session Duration per Day:</b> {total_duration/days/3600:.1f} hours</p>"
+        return stats_html
+
+    def save(self):
+        if self.on_save:
+            self.on_save(self.datasets.get('activity'), self.datasets.get('blinks'), self.period)
+
+    def cancel_load(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+        self.job_id += 1  # Ignore anything still queued from the cancelled job
+
+    def closeEvent(self, event):
+        # Hidden, not destroyed: the figure is reused the next time
+        self.cancel_load()
+        super().closeEvent(event)
+
+    def reject(self):
+        self.cancel_load()
+        super().reject()
+
+    def dispose(self):
+        """Free the figure and canvas; the view cannot be used afterwards"""
+        self.cancel_load()
+        self.datasets = {}
+        self.figure.clear()
+        self.canvas.close()
+        self.canvas.deleteLater()
+        self.deleteLater()
@@ -0,0 +1,146 @@
+"""Report data loading, off the GUI thread.
+
+A ReportJob runs the report queries on its own thread and connection and
+hands each dataset to ``on_dataset(name, dataframe)`` as soon as it is
+ready, so the view can draw charts progressively. ``cancel()`` interrupts
+a running query and suppresses any further callbacks. Reports cover all
+users, or one user if a ``user_id`` is given.
+"""
+import datetime
+import sqlite3
+import threading
+import traceback
+
+# Report name -> rollup column, in chart order
+ACTIVITY_REPORT_COLUMNS = {
+    'eye_alerts': 'eye_alerts',
+    'posture_alerts': 'posture_alerts',
+    'breaks': 'breaks_taken',
+    'keyboard_activity': 'keyboard_activity',
+    'mouse_activity': 'mouse_activity',
+    'low_light_alerts': 'low_light_alerts',
+    'session_duration': 'session_duration',
+}
+
+PERIOD_DAYS = {'daily': 1, 'weekly': 7, 'monthly': 30}
+
+ACTIVITY_REPORT_SQL = f"""
+    SELECT day, {', '.join(f'{column} as {name}' for name, column in ACTIVITY_REPORT_COLUMNS.items())}
+    FROM activity_daily
+    WHERE day >= ?
+    ORDER BY day
+"""
+
+# One user's days are summed from their raw rows, a range scan of
+# idx_activity_user_timestamp (the rollups hold all users together)
+USER_ACTIVITY_REPORT_SQL = f"""
+    SELECT strftime('%Y-%m-%d', timestamp) AS day,
+           {', '.join(f'COALESCE(SUM({column}), 0) as {name}' for name, column in ACTIVITY_REPORT_COLUMNS.items())}
+    FROM activity
+    WHERE user_id = ? AND timestamp >= ?
+    GROUP BY day
+    ORDER BY day
+"""
+
+# Hourly rows (older than a week) hold several minutes, so report blinks per minute
+BLINK_REPORT_SQL = """
+    SELECT strftime('%m-%d %H:%M', timestamp) as time,
+           blink_count * 1.0 / COALESCE(NULLIF(minute_interval, 0), 1)
+    FROM blink_data
+    WHERE timestamp >= ?
+    ORDER BY timestamp
+"""
+
+USER_BLINK_REPORT_SQL = """
+    SELECT strftime('%m-%d %H:%M', timestamp) as time,
+           blink_count * 1.0 / COALESCE(NULLIF(minute_interval, 0), 1)
+    FROM blink_data
+    WHERE user_id = ? AND timestamp >= ?
+    ORDER BY timestamp
+"""
+
+# Users to offer as report filters, most recently seen first
+USERS_SQL = """
+    SELECT user_id, COALESCE(name, user_id) FROM users ORDER BY last_seen DESC
+"""
+
+
+def report_start_date(period, now=None):
+    """First day of a report period, in UTC like the stored timestamps"""
+    now = datetime.datetime.now(datetime.timezone.utc) if now is None else now
+    return now - datetime.timedelta(days=PERIOD_DAYS.get(period, 30))
+
+
+class ReportJob:
+    """Loads the 'users', 'activity' and 'blinks' datasets for one report period.
+
+    ``prepare`` callables (e.g. writer flushes) run first on the job's
+    thread. ``on_dataset`` and ``on_done(error)`` are called from that
+    thread too; Qt views forward them to the GUI thread through signals.
+    """
+
+    def __init__(self, database, period, on_dataset, on_done=None, prepare=(), user_id=None):
+        self.database = database
+        self.period = period
+        self.user_id = user_id
+        self.start_date = report_start_date(period)
+        self.on_dataset = on_dataset
+        self.on_done = on_done
+        self.prepare = prepare
+        self.cancelled = False
+        self._conn = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="devwell-report", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                self._conn.interrupt()  # Abort the query in progress
+
+    def _run(self):
+        error = None
+        try:
+            for step in self.prepare:
+                step()
+            if self.cancelled:
+                return
+            with self._lock:
+                self._conn = self.database.connect(readonly=True)
+            try:
+                start = self.start_date.strftime("%Y-%m-%d")
+                self._load('users', USERS_SQL, (), ["user_id", "name"])
+                if self.user_id is None:
+                    self._load('activity', ACTIVITY_REPORT_SQL, (start,),
+                               ["Date"] + list(ACTIVITY_REPORT_COLUMNS))
+                    self._load('blinks', BLINK_REPORT_SQL, (start,), ["Time", "Blinks"])
+                else:
+                    self._load('activity', USER_ACTIVITY_REPORT_SQL, (self.user_id, start),
+                               ["Date"] + list(ACTIVITY_REPORT_COLUMNS))
+                    self._load('blinks', USER_BLINK_REPORT_SQL, (self.user_id, start), ["Time", "Blinks"])
+            finally:
+                with self._lock:
+                    self._conn.close()
+                    self._conn = None
+        except sqlite3.OperationalError as e:
+            if not self.cancelled:
+                error = str(e)
+        except Exception as e:
+            error = str(e)
+            traceback.print_exc()
+        finally:
+            if self.on_done and not self.cancelled:
+                self.on_done(error)
+
+    def _load(self, name, query, params, columns):
+        if self.cancelled:
+            return
+        rows = self._conn.execute(query, params).fetchall()
+        import pandas as pd
+        frame = pd.DataFrame(rows, columns=columns)
+        if not self.cancelled:
+            self.on_dataset(name, frame)
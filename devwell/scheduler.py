@@ -0,0 +1,82 @@
+"""Adaptive per-detector frame-rate scheduling."""
+import time
+
+# Activity states the scheduler moves between
+PRESENT = 'present'  # A primary user is in frame
+SEARCHING = 'searching'  # User recently lost, look for them quickly
+IDLE = 'idle'  # Nobody seen for a while, back off to save CPU and battery
+
+# Target rate in Hz for each detector in each state. None means every frame,
+# 0 means the detector does not run at all in that state.
+DEFAULT_RATES = {
+    'users': {PRESENT: 0.2, SEARCHING: 1.0, IDLE: 0.2},
+    'eyes': {PRESENT: None, SEARCHING: 0, IDLE: 0},
+    'posture': {PRESENT: 1.0, SEARCHING: 0, IDLE: 0},
+}
+
+
+class DetectorScheduler:
+    """Decides which vision detectors should run on the current frame.
+
+    Each detector gets its own target rate per activity state (see
+    DEFAULT_RATES). The owner reports whether a user is present after every
+    processed frame; once nobody has been seen for ``idle_after`` seconds the
+    scheduler drops to the idle rates. ``frame_interval()`` tells the capture
+    stage how often a frame is needed at all, so idle frames are never read.
+    """
+
+    def __init__(self, rates=None, idle_after=30):
+        self.rates = {name: dict(state_rates) for name, state_rates in (rates or DEFAULT_RATES).items()}
+        self.idle_after = idle_after
+        self.state = SEARCHING
+        self.last_user_seen = time.time()
+        self._last_run = {}
+
+    def reset(self, now=None):
+        self.state = SEARCHING
+        self.last_user_seen = time.time() if now is None else now
+        self._last_run = {}
+
+    def set_rate(self, name, state, rate_hz):
+        self.rates.setdefault(name, {})[state] = rate_hz
+
+    def update(self, user_present, now=None):
+        """Move between present, searching and idle; returns the new state"""
+        now = time.time() if now is None else now
+        if user_present:
+            self.last_user_seen = now
+            new_state = PRESENT
+        elif now - self.last_user_seen >= self.idle_after:
+            new_state = IDLE
+        else:
+            new_state = SEARCHING
+        if new_state != self.state:
+            print(f"Detector scheduler: {self.state} -> {new_state}")
+            self.state = new_state
+        return self.state
+
+    def due(self, name, now=None):
+        """Return True (and record the run) if the detector should run now"""
+        now = time.time() if now is None else now
+        rate = self.rates.get(name, {}).get(self.state)
+        if rate is None:
+            self._last_run[name] = now
+            return True
+        if rate <= 0:
+            return False
+        last = self._last_run.get(name)
+        if last is not None and now - last < 1.0 / rate:
+            return False
+        self._last_run[name] = now
+        return True
+
+    def frame_interval(self):
+        """Shortest interval (seconds) any detector needs in the current state"""
+        intervals = []
+        for state_rates in self.rates.values():
+            rate = state_rates.get(self.state)
+            if rate is None:
+                return 0.0
+            if rate > 0:
+                intervals.append(1.0 / rate)
+        return min(intervals) if intervals else 1.0
@@ -0,0 +1,93 @@
+"""Fixed-size smoothing buffers for per-frame measurements."""
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-size float ring buffer with an O(1) running mean and EMA.
+
+    The running sum is updated incrementally on every push and recomputed
+    from the buffer each time it wraps, so floating point drift can't
+    accumulate.
+    """
+
+    def __init__(self, size, alpha=None):
+        self.size = max(1, int(size))
+        self.alpha = 2.0 / (self.size + 1) if alpha is None else alpha
+        self._values = np.zeros(self.size, dtype=np.float64)
+        self._index = 0
+        self._sum = 0.0
+        self.count = 0
+        self.ema = None
+
+    def push(self, value):
+        """Add a value and return the new running mean"""
+        value = float(value)
+        if self.count == self.size:
+            self._sum -= self._values[self._index]
+        else:
+            self.count += 1
+        self._values[self._index] = value
+        self._sum += value
+        self._index += 1
+        if self._index == self.size:
+            self._index = 0
+            self._sum = float(self._values.sum())
+        self.ema = value if self.ema is None else self.ema + self.alpha * (value - self.ema)
+        return self.mean
+
+    @property
+    def mean(self):
+        return self._sum / self.count if self.count else None
+
+    def values(self):
+        """Stored values, oldest first"""
+        if self.count < self.size:
+            return self._values[:self.count].copy()
+        return np.roll(self._values, -self._index)
+
+    def clear(self):
+        self._values[:] = 0.0
+        self._index = 0
+        self._sum = 0.0
+        self.count = 0
+        self.ema = None
+
+    def __len__(self):
+        return self.count
+
+
+class SignalBank:
+    """RingBuffers kept per user and per signal, created on first use.
+
+    ``sizes`` maps each signal name (e.g. 'left_ear', 'posture') to its
+    window length in samples.
+    """
+
+    def __init__(self, sizes):
+        self.sizes = dict(sizes)
+        self._buffers = {}  # user_id -> {signal: RingBuffer}
+
+    def buffer(self, user_id, signal):
+        signals = self._buffers.setdefault(user_id, {})
+        ring = signals.get(signal)
+        if ring is None:
+            ring = signals[signal] = RingBuffer(self.sizes[signal])
+        return ring
+
+    def push(self, user_id, signal, value):
+        """Add a measurement and return the smoothed (mean) value"""
+        return self.buffer(user_id, signal).push(value)
+
+    def drop(self, user_id):
+        self._buffers.pop(user_id, None)
+
+    def retain(self, user_ids):
+        """Forget every user not in user_ids"""
+        for user_id in [u for u in self._buffers if u not in user_ids]:
+            del self._buffers[user_id]
+
+    def clear(self):
+        self._buffers.clear()
+
+    def users(self):
+        return list(self._buffers)
@@ -0,0 +1,48 @@
+"""Startup cost accounting for the desktop app.
+
+Set ``DEVWELL_STARTUP_REPORT=1`` to print how long each import group and
+initialization step took before the window was shown, e.g.:
+
+    DevWell startup: 412 ms to window
+      import Qt                 88.1 ms
+      import cv2/numpy          121.4 ms
+      ...
+"""
+import contextlib
+import os
+import time
+
+
+class StartupProfile:
+    """Records named, timed phases of startup in the order they ran"""
+
+    def __init__(self, enabled=None):
+        self.started = time.perf_counter()
+        self.phases = []  # (name, seconds)
+        if enabled is None:
+            enabled = os.environ.get('DEVWELL_STARTUP_REPORT', '') not in ('', '0')
+        self.enabled = enabled
+        self.finished = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def finish(self):
+        """Mark startup as complete (window shown) and print the report if enabled"""
+        if self.finished is None:
+            self.finished = time.perf_counter() - self.started
+            if self.enabled:
+                print(self.format_report())
+        return self.finished
+
+    def format_report(self):
+        total = self.finished if self.finished is not None else time.perf_counter() - self.started
+        lines = [f"DevWell startup: {total * 1000:.0f} ms to window"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<26}{seconds * 1000:8.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,567 @@
+"""SQLite persistence helpers for DevWell."""
+import abc
+import atexit
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+import traceback
+
+# Counter columns of the activity table, in schema order
+ACTIVITY_COLUMNS = (
+    'eye_alerts',
+    'posture_alerts',
+    'breaks_taken',
+    'keyboard_activity',
+    'mouse_activity',
+    'low_light_alerts',
+    'session_duration',
+)
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS activity (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        eye_alerts INTEGER DEFAULT 0,
+        posture_alerts INTEGER DEFAULT 0,
+        breaks_taken INTEGER DEFAULT 0,
+        keyboard_activity INTEGER DEFAULT 0,
+        mouse_activity INTEGER DEFAULT 0,
+        low_light_alerts INTEGER DEFAULT 0,
+        session_duration INTEGER DEFAULT 0
+    )
+    """,
+    # Index on timestamp for faster range queries
+    """
+    CREATE INDEX IF NOT EXISTS idx_activity_timestamp
+    ON activity(timestamp)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS settings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        setting_name TEXT UNIQUE,
+        setting_value TEXT
+    )
+    """,
+    # Blink data table for detailed blink tracking
+    """
+    CREATE TABLE IF NOT EXISTS blink_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        blink_count INTEGER,
+        minute_interval INTEGER
+    )
+    """,
+    # Users told apart by devwell.tracking.IdentityTracker; embedding is
+    # their float32 face-geometry profile, name an optional display name
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id TEXT PRIMARY KEY,
+        name TEXT,
+        embedding BLOB,
+        first_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+        last_seen DATETIME DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+    """,
+)
+
+# Columns added to existing tables after their first release:
+# (table, column, definition)
+MIGRATIONS = (
+    # Seconds covered by the row's bucket (60 per-minute, 3600 hourly);
+    # minute_interval is the number of minutes of samples it holds
+    ('blink_data', 'resolution', 'INTEGER DEFAULT 60'),
+    ('blink_data', 'mean_ear', 'REAL'),
+    ('blink_data', 'closed_seconds', 'REAL DEFAULT 0'),
+    # User the row belongs to (NULL: before anyone was identified, or
+    # recorded before per-user tracking)
+    ('activity', 'user_id', 'TEXT'),
+    ('blink_data', 'user_id', 'TEXT'),
+)
+
+# Indexes on migrated columns, created once MIGRATIONS have run
+INDEXES = (
+    """
+    CREATE INDEX IF NOT EXISTS idx_blink_data_resolution_timestamp
+    ON blink_data(resolution, timestamp)
+    """,
+    # Per-user reports and session row lookups read one user's time range
+    """
+    CREATE INDEX IF NOT EXISTS idx_activity_user_timestamp
+    ON activity(user_id, timestamp)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_blink_data_user_timestamp
+    ON blink_data(user_id, timestamp)
+    """,
+)
+
+# Pre-aggregated activity totals of all users, maintained by ActivityWriter
+# on every flush so reports read a handful of rows instead of scanning the
+# activity table (per-user reports use idx_activity_user_timestamp).
+# Buckets are UTC like activity.timestamp: hour is 'YYYY-MM-DD HH:00:00',
+# day is 'YYYY-MM-DD'.
+ROLLUPS = {
+    'activity_hourly': ('hour', '%Y-%m-%d %H:00:00'),
+    'activity_daily': ('day', '%Y-%m-%d'),
+}
+
+SCHEMA += tuple(
+    f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        {key} TEXT PRIMARY KEY,
+        {', '.join(f'{column} INTEGER DEFAULT 0' for column in ACTIVITY_COLUMNS)}
+    ) WITHOUT ROWID
+    """
+    for table, (key, _) in ROLLUPS.items()
+)
+
+DEFAULT_SETTINGS = {
+    'ear_threshold': '0.45',
+    'min_blink_threshold': '17',
+    'bad_posture_threshold': '120',
+    'keyboard_limit': '2500',
+    'mouse_limit': '2500',
+    # Capture settings, see devwell.capture.Camera
+    'camera_device': '0',
+    'camera_backend': 'any',
+    'camera_width': '640',
+    'camera_height': '480',
+    'camera_fps': '30',
+    'camera_pixel_format': 'MJPG',
+    'camera_grab_thread': '0',
+}
+
+# Pragmas applied to every connection. WAL lets report readers run alongside
+# the activity writer; synchronous=NORMAL is durable across application
+# crashes in WAL mode and avoids an fsync on every commit.
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -8000),  # 8 MB page cache
+    ('mmap_size', 64 * 1024 * 1024),
+    ('temp_store', 'MEMORY'),
+    ('busy_timeout', 5000),
+)
+
+# Statements are kept as constants so sqlite3's statement cache reuses them
+FIND_SESSION_ROW_SQL = """
+    SELECT id, timestamp FROM activity
+    WHERE user_id IS ? AND timestamp >= datetime('now', ?)
+    ORDER BY timestamp DESC LIMIT 1
+"""
+UPDATE_ACTIVITY_SQL = (
+    "UPDATE activity SET "
+    + ", ".join(f"{column} = {column} + ?" for column in ACTIVITY_COLUMNS)
+    + " WHERE id = ?"
+)
+INSERT_ACTIVITY_SQL = (
+    f"INSERT INTO activity (timestamp, user_id, {', '.join(ACTIVITY_COLUMNS)}) "
+    f"VALUES (?, ?, {', '.join('?' for _ in ACTIVITY_COLUMNS)})"
+)
+
+# Increments are bucketed by the timestamp of the activity row they are added
+# to (the first parameter), the same way rebuild_rollups() does it
+UPSERT_ROLLUP_SQL = {
+    table: (
+        f"INSERT INTO {table} ({key}, {', '.join(ACTIVITY_COLUMNS)}) "
+        f"VALUES (strftime('{bucket}', ?), {', '.join('?' for _ in ACTIVITY_COLUMNS)}) "
+        f"ON CONFLICT({key}) DO UPDATE SET "
+        + ", ".join(f"{column} = {column} + excluded.{column}" for column in ACTIVITY_COLUMNS)
+    )
+    for table, (key, bucket) in ROLLUPS.items()
+}
+
+
+def rebuild_rollups(conn):
+    """Recompute the rollup tables from the raw activity table (backfill).
+
+    Rows are bucketed by their own timestamp, so increments a writer added
+    to a session row later are attributed to the hour the row was created.
+    """
+    with conn:
+        for table, (key, bucket) in ROLLUPS.items():
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(
+                f"INSERT INTO {table} ({key}, {', '.join(ACTIVITY_COLUMNS)}) "
+                f"SELECT strftime('{bucket}', timestamp) AS bucket, "
+                + ", ".join(f"COALESCE(SUM({column}), 0)" for column in ACTIVITY_COLUMNS)
+                + " FROM activity WHERE timestamp IS NOT NULL GROUP BY bucket"
+            )
+
+
+INSERT_BLINK_SQL = """
+    INSERT INTO blink_data (timestamp, blink_count, minute_interval, resolution, mean_ear, closed_seconds, user_id)
+    VALUES (?, ?, 1, 60, ?, ?, ?)
+"""
+
+UPSERT_USER_SQL = """
+    INSERT INTO users (user_id, embedding, first_seen, last_seen) VALUES (?, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        embedding = COALESCE(excluded.embedding, embedding),
+        last_seen = MAX(last_seen, excluded.last_seen)
+"""
+
+
+def load_users(conn):
+    """(user_id, embedding) of every known user, least recently seen first"""
+    return conn.execute("SELECT user_id, embedding FROM users ORDER BY last_seen").fetchall()
+
+
+# Per-minute blink rows are kept for this long, then merged into hourly
+# rows; hourly rows are deleted after BLINK_HOURLY_RETENTION
+BLINK_MINUTE_RETENTION = '-7 days'
+BLINK_HOURLY_RETENTION = '-365 days'
+
+
+def compact_blink_data(conn):
+    """Downsample old per-minute blink rows to hourly and drop expired rows.
+
+    Only whole hours older than the retention window are merged, so an hour
+    is never split between minute and hourly rows, and every user's minutes
+    are merged into their own hourly rows. Returns the number of
+    minute rows merged and the number of hourly rows deleted.
+    """
+    with conn:
+        cutoff = conn.execute("SELECT strftime('%Y-%m-%d %H:00:00', 'now', ?)",
+                              (BLINK_MINUTE_RETENTION,)).fetchone()[0]
+        conn.execute("""
+            INSERT INTO blink_data (timestamp, blink_count, minute_interval, resolution, mean_ear, closed_seconds, user_id)
+            SELECT strftime('%Y-%m-%d %H:00:00', timestamp) AS hour,
+                   SUM(blink_count),
+                   SUM(COALESCE(minute_interval, 1)),
+                   3600,
+                   SUM(mean_ear * COALESCE(minute_interval, 1))
+                       / NULLIF(SUM(CASE WHEN mean_ear IS NULL THEN 0 ELSE COALESCE(minute_interval, 1) END), 0),
+                   SUM(COALESCE(closed_seconds, 0)),
+                   user_id
+            FROM blink_data
+            WHERE resolution = 60 AND timestamp < ?
+            GROUP BY user_id, hour
+        """, (cutoff,))
+        merged = conn.execute("DELETE FROM blink_data WHERE resolution = 60 AND timestamp < ?",
+                              (cutoff,)).rowcount
+        expired = conn.execute("""
+            DELETE FROM blink_data
+            WHERE resolution = 3600 AND timestamp < datetime('now', ?)
+        """, (BLINK_HOURLY_RETENTION,)).rowcount
+    return merged, expired
+
+
+class Database:
+    """Connection factory for the DevWell SQLite database.
+
+    Every connection gets the tuned PRAGMAS and a large statement cache.
+    Writers (the activity writer, settings) open their own connection with
+    ``connect()``; readers such as reports, exports and dbtool open a
+    read-only one with ``connect(readonly=True)`` on their own thread, so in
+    WAL mode they never block the writers.
+    """
+
+    def __init__(self, path, cached_statements=256):
+        self.path = path
+        self.cached_statements = cached_statements
+
+    def connect(self, readonly=False, check_same_thread=True):
+        if readonly:
+            uri = pathlib.Path(os.path.abspath(self.path)).as_uri() + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, timeout=10, check_same_thread=check_same_thread,
+                                   cached_statements=self.cached_statements)
+        else:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=check_same_thread,
+                                   cached_statements=self.cached_statements)
+        for name, value in PRAGMAS:
+            if readonly and name == 'journal_mode':
+                continue  # Read-only connections cannot change the journal mode
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def initialize(self, default_settings=DEFAULT_SETTINGS):
+        """Create the schema and default settings if they don't exist"""
+        conn = self.connect()
+        try:
+            with conn:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                for table, column, definition in MIGRATIONS:
+                    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                for statement in INDEXES:
+                    conn.execute(statement)
+                conn.executemany("""
+                    INSERT OR IGNORE INTO settings (setting_name, setting_value)
+                    VALUES (?, ?)
+                """, default_settings.items())
+            # Databases from before the rollup tables existed are backfilled once
+            if (conn.execute("SELECT 1 FROM activity_daily LIMIT 1").fetchone() is None
+                    and conn.execute("SELECT 1 FROM activity LIMIT 1").fetchone() is not None):
+                print("Backfilling activity rollups")
+                rebuild_rollups(conn)
+        finally:
+            conn.close()
+
+
+class BackgroundWriter(abc.ABC):
+    """Base for write-behind loggers that batch rows on their own thread.
+
+    Producers hand data to ``add()``, which only touches in-memory state
+    under a lock. A single writer thread owns its own connection and every
+    ``flush_interval`` seconds swaps out what is pending and writes it in
+    one transaction. Subclasses implement ``_take()`` (swap out pending data,
+    called with the lock held), ``_write(conn, pending)`` and ``_restore()``
+    (put data back after a failed write so the next flush retries it).
+
+    A final flush runs on ``close()`` and at interpreter exit; at most one
+    interval of data can be lost if the process is killed outright.
+    """
+
+    thread_name = "devwell-writer"
+    label = "rows"  # What is written, for log messages
+
+    def __init__(self, database, flush_interval=5.0):
+        self.database = database
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._requested_flush = 0  # Flush request generation
+        self._served_flush = 0  # Last generation written by the writer
+        self._thread = None
+        self.running = False
+
+        self.flush_count = 0
+        atexit.register(self.close)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def flush(self, timeout=5.0):
+        """Ask the writer to flush now and wait until it has"""
+        if not self.running:
+            return
+        deadline = time.time() + timeout
+        with self._lock:
+            self._requested_flush += 1
+            generation = self._requested_flush
+            self._wakeup.notify_all()
+            while self._served_flush < generation and self.running:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._wakeup.wait(remaining)
+
+    def close(self, timeout=5.0):
+        """Flush what is pending and stop the writer thread"""
+        if not self.running:
+            return
+        with self._lock:
+            self.running = False
+            self._wakeup.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        conn = self.database.connect()
+        try:
+            while True:
+                with self._lock:
+                    if self.running and self._served_flush >= self._requested_flush:
+                        self._wakeup.wait(self.flush_interval)
+                    pending = self._take()
+                    generation = self._requested_flush
+                    stopping = not self.running
+                if pending:
+                    try:
+                        self._write(conn, pending)
+                        self.flush_count += 1
+                    except Exception as e:
+                        print(f"Error flushing {self.label}: {str(e)}")
+                        traceback.print_exc()
+                        with self._lock:
+                            self._restore(pending)
+                self._after_flush(conn)
+                with self._lock:
+                    self._served_flush = generation
+                    self._wakeup.notify_all()
+                if stopping:
+                    return
+        finally:
+            conn.close()
+
+    @abc.abstractmethod
+    def _take(self):
+        """Swap out and return the pending data (lock held)"""
+
+    @abc.abstractmethod
+    def _write(self, conn, pending):
+        """Write data returned by _take() in one transaction"""
+
+    @abc.abstractmethod
+    def _restore(self, pending):
+        """Put back data whose write failed (lock held)"""
+
+    def _after_flush(self, conn):
+        """Periodic housekeeping on the writer thread; optional"""
+
+
+class ActivityWriter(BackgroundWriter):
+    """Write-behind logger for the activity table.
+
+    ``add()`` only bumps in-memory counters, so it is safe and cheap to call
+    from input hooks and the vision thread. Each flush adds the accumulated
+    increments to each user's current session row (rows are reused for
+    ``session_window`` seconds, like the old per-event logger did) and to
+    the hourly and daily rollups.
+    """
+
+    thread_name = "devwell-activity-writer"
+    label = "activity"
+
+    def __init__(self, database, flush_interval=5.0, session_window=300):
+        super().__init__(database, flush_interval)
+        self.session_window = session_window
+        self._pending = {}  # user_id -> {column: increment}
+
+        # Current session row per user, so most flushes skip the lookup query
+        self._rows = {}  # user_id -> (row_id, started, timestamp)
+
+    def add(self, user_id=None, **counts):
+        """Accumulate counter increments, e.g. add('user_1', keyboard_activity=100)"""
+        with self._lock:
+            pending = self._pending.setdefault(user_id, {})
+            for column, value in counts.items():
+                if column not in ACTIVITY_COLUMNS:
+                    raise ValueError(f"Unknown activity column: {column}")
+                pending[column] = pending.get(column, 0) + value
+
+    def _take(self):
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def _restore(self, pending):
+        for user_id, counts in pending.items():
+            user_pending = self._pending.setdefault(user_id, {})
+            for column, value in counts.items():
+                user_pending[column] = user_pending.get(column, 0) + value
+
+    def _write(self, conn, pending):
+        now = time.time()
+        rows = {}
+        with conn:
+            for user_id, counts in pending.items():
+                values = [counts.get(column, 0) for column in ACTIVITY_COLUMNS]
+                row_id, started, timestamp = self._rows.get(user_id, (None, 0.0, None))
+                if row_id is not None and now - started >= self.session_window:
+                    row_id = None
+                elif row_id is None and user_id not in self._rows:
+                    # First flush for this user: continue a session row from the last few minutes
+                    recent = conn.execute(FIND_SESSION_ROW_SQL,
+                                          (user_id, f"-{int(self.session_window)} seconds")).fetchone()
+                    if recent:
+                        row_id, timestamp = recent
+                        started = now
+                if row_id is not None:
+                    conn.execute(UPDATE_ACTIVITY_SQL, values + [row_id])
+                else:
+                    timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now))
+                    row_id = conn.execute(INSERT_ACTIVITY_SQL, [timestamp, user_id] + values).lastrowid
+                    started = now
+                rows[user_id] = (row_id, started, timestamp)
+                # Rollups are updated in the same transaction as the raw row
+                for statement in UPSERT_ROLLUP_SQL.values():
+                    conn.execute(statement, [timestamp] + values)
+        self._rows.update(rows)
+        for user_id, counts in pending.items():
+            print(f"Flushed activity ({user_id or 'no user'}): "
+                  + ", ".join(f"{column}={counts[column]}" for column in counts))
+
+
+class BlinkWriter(BackgroundWriter):
+    """Batched writer for the per-minute blink_data time series.
+
+    ``add()`` queues one row per closed minute; rows are inserted together
+    every ``flush_interval`` seconds. Every ``compact_interval`` seconds the
+    writer also runs compact_blink_data(), so the table stays bounded
+    (minute resolution for a week, hourly for a year).
+    """
+
+    thread_name = "devwell-blink-writer"
+    label = "blink data"
+
+    def __init__(self, database, flush_interval=60.0, compact_interval=3600.0):
+        super().__init__(database, flush_interval)
+        self.compact_interval = compact_interval
+        self._rows = []
+        self._last_compact = 0.0  # Compact once soon after start
+
+    def add(self, start, count, mean_ear, closed_seconds, user_id=None):
+        """Queue one minute of user_id's blinks starting at epoch seconds ``start``"""
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(start))
+        with self._lock:
+            self._rows.append((timestamp, count, mean_ear, closed_seconds, user_id))
+
+    def _take(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def _restore(self, rows):
+        self._rows[:0] = rows
+
+    def _write(self, conn, rows):
+        with conn:
+            conn.executemany(INSERT_BLINK_SQL, rows)
+
+    def _after_flush(self, conn):
+        now = time.time()
+        if now - self._last_compact < self.compact_interval:
+            return
+        self._last_compact = now
+        try:
+            merged, expired = compact_blink_data(conn)
+            if merged or expired:
+                print(f"Compacted blink data: {merged} minute rows merged, {expired} hourly rows expired")
+        except Exception as e:
+            print(f"Error compacting blink data: {str(e)}")
+
+
+class UserWriter(BackgroundWriter):
+    """Batched writer for the users table.
+
+    ``add()`` is called whenever a user is seen and keeps only the latest
+    profile per user, so a flush writes one upsert per user seen since
+    the last flush.
+    """
+
+    thread_name = "devwell-user-writer"
+    label = "users"
+
+    def __init__(self, database, flush_interval=60.0):
+        super().__init__(database, flush_interval)
+        self._users = {}  # user_id -> (embedding, seen timestamp)
+
+    def add(self, user_id, embedding, seen_at):
+        """Record that user_id was seen at epoch seconds ``seen_at``"""
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(seen_at))
+        with self._lock:
+            self._users[user_id] = (embedding, timestamp)
+
+    def _take(self):
+        users, self._users = self._users, {}
+        return users
+
+    def _restore(self, users):
+        for user_id, value in users.items():
+            self._users.setdefault(user_id, value)
+
+    def _write(self, conn, users):
+        with conn:
+            conn.executemany(UPSERT_USER_SQL, [(user_id, embedding, timestamp, timestamp)
+                                               for user_id, (embedding, timestamp) in users.items()])
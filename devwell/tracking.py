@@ -0,0 +1,192 @@
+"""Stable user identities across frames.
+
+IdentityTracker associates the faces of each user check with persistent
+tracks. Faces are first matched to active tracks by bounding-box IoU (or,
+failing that, centroid distance); faces that match no active track are
+compared with the profiles of known users by a landmark-geometry
+embedding, so a user who leaves the frame gets their old ID back. Profiles
+can be loaded from the ``users`` table, so this also works across
+sessions. Matching is greedy over at most ``max_tracks`` tracks and
+``max_profiles`` profiles, so an update costs O(faces) and memory is
+bounded.
+"""
+import collections
+import itertools
+
+import numpy as np
+
+# Landmarks used for the geometry embedding: eye corners, nose tip, mouth
+# corners, chin, forehead and the sides of the face
+EMBEDDING_LANDMARKS = (33, 133, 362, 263, 1, 61, 291, 152, 10, 234, 454)
+_PAIRS = np.array(list(itertools.combinations(range(len(EMBEDDING_LANDMARKS)), 2)))
+INTER_OCULAR = (33, 263)  # Outer eye corners, used to normalize scale
+EMBEDDING_DTYPE = '<f4'  # Stored embedding format
+
+# FaceMesh face outline; its extent is the face's bounding box
+FACE_OVAL = (10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288, 397, 365, 379, 378, 400, 377,
+             152, 148, 176, 149, 150, 136, 172, 58, 132, 93, 234, 127, 162, 21, 54, 103, 67, 109)
+
+# The only landmarks the tracker reads: functions here take (F, len(TRACKED_LANDMARKS), 3)
+# arrays of them, e.g. FrameAnalysis.landmark_points(TRACKED_LANDMARKS), rather than all 468
+TRACKED_LANDMARKS = tuple(sorted(set(FACE_OVAL) | set(EMBEDDING_LANDMARKS)))
+_EMBEDDING_COLUMNS = np.array([TRACKED_LANDMARKS.index(index) for index in EMBEDDING_LANDMARKS])
+_INTER_OCULAR_COLUMNS = tuple(TRACKED_LANDMARKS.index(index) for index in INTER_OCULAR)
+
+
+def face_boxes(points):
+    """(F, 4) boxes x0, y0, x1, y1 from (F, N, 3) normalized TRACKED_LANDMARKS points"""
+    xy = points[:, :, :2]
+    return np.concatenate([xy.min(axis=1), xy.max(axis=1)], axis=1)
+
+
+def face_embeddings(points):
+    """(F, P) scale-invariant pairwise distances between key landmarks"""
+    key = points[:, _EMBEDDING_COLUMNS, :2]
+    distances = np.linalg.norm(key[:, _PAIRS[:, 0]] - key[:, _PAIRS[:, 1]], axis=2)
+    left, right = _INTER_OCULAR_COLUMNS
+    scale = np.linalg.norm(points[:, left, :2] - points[:, right, :2], axis=1)
+    return (distances / np.maximum(scale, 1e-6)[:, None]).astype(np.float32)
+
+
+def box_iou(box, boxes):
+    x0 = np.maximum(box[0], boxes[:, 0])
+    y0 = np.maximum(box[1], boxes[:, 1])
+    x1 = np.minimum(box[2], boxes[:, 2])
+    y1 = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / np.maximum(area + areas - intersection, 1e-9)
+
+
+class Track:
+    __slots__ = ('user_id', 'box', 'embedding', 'first_seen', 'last_seen', 'hits')
+
+    def __init__(self, user_id, box, embedding, timestamp):
+        self.user_id = user_id
+        self.box = box
+        self.embedding = embedding
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.hits = 0
+
+
+class IdentityTracker:
+    """Assigns persistent user IDs ("user_1", "user_2", ...) to faces.
+
+    Tracks not seen for ``active_timeout`` seconds are dropped; their user
+    can then only come back through their profile. A profile is the
+    user's embedding, an exponential moving average (``embedding_alpha``)
+    so it settles on their typical geometry; the ``max_profiles`` most
+    recently seen users are remembered.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_centroid_distance=0.15, active_timeout=3.0,
+                 reid_threshold=0.12, max_tracks=16, max_profiles=64, embedding_alpha=0.1):
+        self.iou_threshold = iou_threshold
+        self.max_centroid_distance = max_centroid_distance
+        self.active_timeout = active_timeout
+        self.reid_threshold = reid_threshold
+        self.max_tracks = max_tracks
+        self.max_profiles = max_profiles
+        self.embedding_alpha = embedding_alpha
+        self.tracks = []
+        self.profiles = collections.OrderedDict()  # user_id -> embedding, least recently seen first
+        self._next_id = 1
+
+    def reset(self):
+        """Forget the tracks of the current session; profiles are kept"""
+        self.tracks = []
+
+    def load_profiles(self, profiles):
+        """Add known users from (user_id, embedding bytes) pairs, least recently seen first"""
+        for user_id, data in profiles:
+            number = user_id.rpartition('_')[2]
+            if number.isdigit():
+                self._next_id = max(self._next_id, int(number) + 1)  # Never reuse a stored ID
+            if not data:
+                continue
+            embedding = np.frombuffer(data, dtype=EMBEDDING_DTYPE).astype(np.float32)
+            if embedding.shape == (len(_PAIRS),):  # Skip profiles of an older embedding layout
+                self._remember(user_id, embedding)
+
+    def embedding_bytes(self, user_id):
+        """Serialized profile of user_id for the users table, or None"""
+        embedding = self.profiles.get(user_id)
+        return None if embedding is None else embedding.astype(EMBEDDING_DTYPE).tobytes()
+
+    def update(self, points, timestamp):
+        """Match the faces in (F, len(TRACKED_LANDMARKS), 3) ``points``; returns one user ID per face"""
+        if len(points) == 0:
+            return []
+        boxes = face_boxes(points)
+        embeddings = face_embeddings(points)
+        self.tracks = [track for track in self.tracks if timestamp - track.last_seen <= self.active_timeout]
+
+        assigned = [None] * len(points)
+        # Position: best IoU pairs first
+        if self.tracks:
+            track_boxes = np.array([track.box for track in self.tracks])
+            track_centers = (track_boxes[:, :2] + track_boxes[:, 2:]) / 2
+            candidates = []
+            for face, box in enumerate(boxes):
+                ious = box_iou(box, track_boxes)
+                distances = np.linalg.norm(track_centers - (box[:2] + box[2:]) / 2, axis=1)
+                for index, (iou, distance) in enumerate(zip(ious, distances)):
+                    if iou >= self.iou_threshold:
+                        candidates.append((-iou, face, index))
+                    elif distance <= self.max_centroid_distance:
+                        candidates.append((distance, face, index))  # Ranked after any IoU match
+            used = set()
+            for _, face, index in sorted(candidates):
+                if assigned[face] is None and index not in used:
+                    assigned[face] = self.tracks[index]
+                    used.add(index)
+
+        # Appearance: re-identify users who left and came back
+        taken = {track.user_id for track in assigned if track is not None}
+        for face in range(len(points)):
+            if assigned[face] is not None:
+                continue
+            user_id = self._identify(embeddings[face], taken)
+            if user_id is None:
+                user_id = f"user_{self._next_id}"
+                self._next_id += 1
+                self._remember(user_id, embeddings[face].copy())
+            track = next((track for track in self.tracks if track.user_id == user_id), None)
+            if track is None:
+                track = Track(user_id, boxes[face], self.profiles[user_id], timestamp)
+                self.tracks.append(track)
+            assigned[face] = track
+            taken.add(user_id)
+
+        for face, track in enumerate(assigned):
+            track.box = boxes[face]
+            # The profile is the track's own array, so this updates it too
+            track.embedding += self.embedding_alpha * (embeddings[face] - track.embedding)
+            track.last_seen = timestamp
+            track.hits += 1
+            self._remember(track.user_id, track.embedding)
+
+        if len(self.tracks) > self.max_tracks:
+            # Forget the longest-unseen tracks
+            self.tracks.sort(key=lambda track: track.last_seen, reverse=True)
+            del self.tracks[self.max_tracks:]
+        return [track.user_id for track in assigned]
+
+    def _identify(self, embedding, taken):
+        """Closest known user within reid_threshold that isn't matched yet, or None"""
+        best, best_distance = None, self.reid_threshold
+        for user_id, profile in self.profiles.items():
+            if user_id in taken:
+                continue
+            distance = float(np.mean(np.abs(profile - embedding)))
+            if distance <= best_distance:
+                best, best_distance = user_id, distance
+        return best
+
+    def _remember(self, user_id, embedding):
+        self.profiles[user_id] = embedding
+        self.profiles.move_to_end(user_id)
+        while len(self.profiles) > self.max_profiles:
+            self.profiles.popitem(last=False)
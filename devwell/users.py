@@ -0,0 +1,89 @@
+"""Per-user detector state for shared (hot-desk) workstations.
+
+Every user the identity tracker tells apart gets a UserState holding their
+own alert monitors and input counters, so one person's blink minute,
+posture timer or typing total never carries over to the next person at the
+desk. The detectors always work on the state of the current user, the most
+recent primary user. States are kept for the ``max_users`` most recently
+active users; the anonymous state (user_id None) collects whatever
+happens before anyone has been identified.
+"""
+import collections
+
+from devwell.monitors import BlinkMonitor, PostureMonitor, StaticImageMonitor, TirednessMonitor
+
+# Threshold settings shared by every user's monitors
+DEFAULT_THRESHOLDS = {
+    'ear_threshold': 0.45,
+    'min_blinks_per_minute': 17,
+    'bad_posture_seconds': 120,
+}
+
+
+class UserState:
+    """Monitors and session counters of one user"""
+
+    def __init__(self, user_id, now, thresholds=DEFAULT_THRESHOLDS):
+        self.user_id = user_id
+        self.blink_monitor = BlinkMonitor()
+        self.tiredness_monitor = TirednessMonitor(closed_seconds=30, cooldown=300)
+        self.static_image_monitor = StaticImageMonitor(no_blink_seconds=50, cooldown=300)
+        self.posture_monitor = PostureMonitor(bad_score=40, fair_score=70, cooldown=180)
+        self.configure(**thresholds)
+        self.keyboard_activity = 0  # Keys since the last typing alert
+        self.mouse_activity = 0  # Clicks since the last clicking alert
+        self.first_active = now
+        self.last_active = now
+        self.reset(now)
+
+    def configure(self, ear_threshold=None, min_blinks_per_minute=None, bad_posture_seconds=None):
+        if ear_threshold is not None:
+            self.blink_monitor.ear_threshold = ear_threshold
+            self.tiredness_monitor.ear_threshold = ear_threshold
+        if min_blinks_per_minute is not None:
+            self.blink_monitor.min_blinks_per_minute = min_blinks_per_minute
+        if bad_posture_seconds is not None:
+            self.posture_monitor.alert_after = bad_posture_seconds
+
+    def reset(self, now):
+        """Restart the monitors' timers, e.g. when the user sits back down"""
+        self.blink_monitor.reset(now)
+        self.tiredness_monitor.reset(now)
+        self.posture_monitor.reset(now)
+
+
+class UserStates:
+    """UserState registry, bounded to the most recently active users"""
+
+    def __init__(self, max_users=16, **thresholds):
+        self.max_users = max_users
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **thresholds)
+        self._states = collections.OrderedDict()  # user_id -> UserState, least recent first
+
+    def get(self, user_id, now):
+        """State of user_id, created on first use"""
+        state = self._states.get(user_id)
+        if state is None:
+            state = UserState(user_id, now, self.thresholds)
+            self._states[user_id] = state
+            while len(self._states) > self.max_users:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(user_id)
+        state.last_active = now
+        return state
+
+    def configure(self, **thresholds):
+        """Change thresholds for every known and future user"""
+        self.thresholds.update({name: value for name, value in thresholds.items() if value is not None})
+        for state in self._states.values():
+            state.configure(**thresholds)
+
+    def clear(self):
+        self._states.clear()
+
+    def __iter__(self):
+        return iter(list(self._states.values()))
+
+    def __len__(self):
+        return len(self._states)
@@ -0,0 +1,406 @@
+"""Per-frame vision analysis shared by all DevWell detectors."""
+import enum
+import time
+
+import cv2
+import numpy as np
+
+from devwell.tracking import TRACKED_LANDMARKS
+
+# FaceMesh landmark indices of the six EAR points (corner, top, top, corner,
+# bottom, bottom) for each eye
+LEFT_EYE_INDICES = [33, 160, 158, 133, 153, 144]
+RIGHT_EYE_INDICES = [362, 385, 387, 263, 373, 380]
+EAR_LANDMARKS = tuple(LEFT_EYE_INDICES + RIGHT_EYE_INDICES)  # The 12 landmarks eye_aspect_ratios reads
+_EAR_FROM = np.array([1, 2, 0])  # Per-eye point pairs measured by the EAR
+_EAR_TO = np.array([4, 5, 3])
+
+DEFAULT_EAR = 0.3  # Used when an eye's horizontal extent is too small to measure
+
+
+class PoseLandmark(enum.IntEnum):
+    """MediaPipe Pose landmark indices used by DevWell (same values as mp.solutions.pose)"""
+    NOSE = 0
+    LEFT_EAR = 7
+    RIGHT_EAR = 8
+    LEFT_SHOULDER = 11
+    RIGHT_SHOULDER = 12
+    LEFT_HIP = 23
+    RIGHT_HIP = 24
+
+
+def create_face_mesh(max_num_faces=10):
+    """Build a FaceMesh graph with DevWell's tracking settings"""
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(
+        max_num_faces=max_num_faces,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+        static_image_mode=False
+    )
+
+
+def create_pose():
+    """Build a Pose graph with DevWell's tracking settings"""
+    import mediapipe as mp
+    return mp.solutions.pose.Pose(
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+def landmarks_to_array(faces, indices=None):
+    """Convert MediaPipe face landmark lists to a (faces, landmarks, 3) float32 array
+
+    FaceMesh returns 468 landmarks per face (478 with refine_landmarks=True).
+    With ``indices`` (a tuple of landmark indices) only those landmarks are
+    converted, in that order; reading every landmark costs far more than
+    the maths done on them, so per-frame callers should ask only for what
+    they use.
+    """
+    if indices is not None:
+        if not faces:
+            return np.empty((0, len(indices), 3), dtype=np.float32)
+        return np.array([[(point.x, point.y, point.z) for point in map(face.landmark.__getitem__, indices)]
+                         for face in faces], dtype=np.float32)
+    if not faces:
+        return np.empty((0, 0, 3), dtype=np.float32)
+    num_landmarks = len(faces[0].landmark)
+    points = np.empty((len(faces), num_landmarks, 3), dtype=np.float32)
+    for face_index, face in enumerate(faces):
+        points[face_index] = np.fromiter(
+            (value for point in face.landmark for value in (point.x, point.y, point.z)),
+            dtype=np.float32, count=num_landmarks * 3).reshape(num_landmarks, 3)
+    return points
+
+
+def eye_aspect_ratios(eye_points):
+    """Raw eye aspect ratio of both eyes of every face, as a (faces, 2) array
+
+    ``eye_points`` is a (faces, 12, 2 or 3) array of the EAR_LANDMARKS, e.g.
+    ``analysis.eye_points``; column 0 of the result is the left eye and
+    column 1 the right eye.
+    """
+    # Point pairs (top, bottom), (top, bottom), (corner, corner) of every eye
+    # in one subtraction: (faces, 2 eyes, 3 pairs, xy)
+    eyes = eye_points[:, :, :2].reshape(len(eye_points), 2, 6, 2)
+    distances = np.sqrt(np.square(eyes[:, :, _EAR_FROM] - eyes[:, :, _EAR_TO]).sum(axis=-1))
+    vertical = distances[:, :, 0] + distances[:, :, 1]
+    horizontal = distances[:, :, 2]
+    # Avoid division by very small numbers
+    return np.where(horizontal > 0.001, vertical / (2.0 * np.maximum(horizontal, 0.001)), DEFAULT_EAR)
+
+
+THUMBNAIL_SIZE = (32, 24)  # (width, height) of FrameAnalysis.thumbnail
+
+
+class FrameAnalysis:
+    """Everything the detectors need to know about a single camera frame.
+
+    The colour conversions and brightness are computed once when the frame is
+    analysed. MediaPipe inference is lazy: FaceMesh and Pose each run at most
+    once per frame, on first access, and every detector shares the result.
+
+    If ``roi`` (an ``(x0, y0, x1, y1)`` pixel box) is given, FaceMesh runs on
+    that crop only; ``pose_roi`` does the same for Pose, which needs a larger
+    box (down to the hips). Inference images are downscaled so their longest
+    side is at most ``roi_size`` (crops) or ``full_frame_size`` (full frame),
+    and landmarks are mapped back to full-frame normalized coordinates, so
+    detectors never need to know a crop was used.
+    """
+
+    def __init__(self, frame, face_mesh, pose, timestamp=None, roi=None, pose_roi=None,
+                 roi_size=480, full_frame_size=960):
+        self.frame = frame  # Original BGR frame from the camera
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)  # MediaPipe expects RGB
+        self.brightness = float(np.mean(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)))
+        self.roi = roi
+        self.pose_roi = pose_roi
+        self.roi_size = roi_size
+        self.full_frame_size = full_frame_size
+        self._inference_images = {}  # roi -> downscaled RGB image, shared when both graphs use it
+        self._thumbnail = None
+
+        self._face_mesh = face_mesh
+        self._pose = pose
+        self._face_landmarks = None
+        self._face_points = None
+        self._landmark_points = {}  # indices -> converted subset of the face landmarks
+        self._pose_landmarks = None
+        self._face_processed = False
+        self._pose_processed = False
+
+    @property
+    def face_landmarks(self):
+        """List of detected faces (empty if none), running FaceMesh on first use"""
+        if not self._face_processed:
+            self._face_processed = True
+            results = self._face_mesh.process(self.inference_image)
+            self._face_landmarks = results.multi_face_landmarks or []
+            for face in self._face_landmarks:
+                self._to_frame_coordinates(face, self.roi)
+        return self._face_landmarks
+
+    @property
+    def face_points(self):
+        """All face landmarks as a (faces, landmarks, 3) float32 array, converted once.
+
+        Converting every landmark is expensive; detectors use
+        landmark_points() for the few landmarks they need.
+        """
+        if self._face_points is None:
+            self._face_points = landmarks_to_array(self.face_landmarks)
+        return self._face_points
+
+    def landmark_points(self, indices):
+        """The landmarks in ``indices`` (a tuple) of every face as a (faces, len(indices), 3) array.
+
+        Each index set is converted at most once per frame.
+        """
+        points = self._landmark_points.get(indices)
+        if points is None:
+            if self._face_points is not None:
+                points = self._face_points[:, list(indices)]
+            else:
+                points = landmarks_to_array(self.face_landmarks, indices)
+            self._landmark_points[indices] = points
+        return points
+
+    @property
+    def eye_points(self):
+        """(faces, 12, 3) EAR_LANDMARKS of every face, for eye_aspect_ratios"""
+        return self.landmark_points(EAR_LANDMARKS)
+
+    @property
+    def pose_landmarks(self):
+        """Pose landmarks (None if no body found), running Pose on first use"""
+        if not self._pose_processed:
+            self._pose_processed = True
+            results = self._pose.process(self.pose_inference_image)
+            self._pose_landmarks = results.pose_landmarks
+            if self._pose_landmarks:
+                self._to_frame_coordinates(self._pose_landmarks, self.pose_roi)
+        return self._pose_landmarks
+
+    @property
+    def thumbnail(self):
+        """Tiny grayscale copy of the frame for cheap change detection"""
+        if self._thumbnail is None:
+            small = cv2.resize(self.frame, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+            self._thumbnail = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+        return self._thumbnail
+
+    @property
+    def frame_shape(self):
+        """(height, width) of the camera frame"""
+        return self.rgb.shape[:2]
+
+    @property
+    def face_ready(self):
+        """True once FaceMesh has run on this frame"""
+        return self._face_processed
+
+    @property
+    def pose_ready(self):
+        """True once Pose has run on this frame"""
+        return self._pose_processed
+
+    @property
+    def inference_image(self):
+        """RGB image FaceMesh sees: the ROI crop (or full frame), downscaled"""
+        return self._downscaled(self.roi)
+
+    @property
+    def pose_inference_image(self):
+        """RGB image Pose sees: the pose ROI crop (or full frame), downscaled"""
+        return self._downscaled(self.pose_roi)
+
+    def _downscaled(self, roi):
+        image = self._inference_images.get(roi)
+        if image is None:
+            image = self.rgb
+            if roi is not None:
+                x0, y0, x1, y1 = roi
+                image = image[y0:y1, x0:x1]
+            height, width = image.shape[:2]
+            scale = (self.roi_size if roi is not None else self.full_frame_size) / max(height, width)
+            if scale < 1:
+                image = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                                   interpolation=cv2.INTER_AREA)
+            image = np.ascontiguousarray(image)
+            self._inference_images[roi] = image
+        return image
+
+    def _to_frame_coordinates(self, landmark_list, roi):
+        """Map landmarks normalized to ``roi`` back to full-frame normalized coordinates"""
+        if roi is None:
+            return
+        frame_height, frame_width = self.rgb.shape[:2]
+        x0, y0, x1, y1 = roi
+        x_scale = (x1 - x0) / frame_width
+        y_scale = (y1 - y0) / frame_height
+        x_offset = x0 / frame_width
+        y_offset = y0 / frame_height
+        for point in landmark_list.landmark:
+            point.x = x_offset + point.x * x_scale
+            point.y = y_offset + point.y * y_scale
+            point.z = point.z * x_scale  # z uses the same scale as x
+
+
+class RoiTracker:
+    """Tracks the primary user's face and body boxes between frames.
+
+    ``update()`` is fed every analysed frame with the index of the primary
+    user's face in it. While the user is found the tracker offers two ROIs
+    for the next frame: ``region()`` around their face for FaceMesh, and
+    ``pose_region()`` around their head, shoulders and hips for Pose (the
+    posture score reads the hips, so a crop that cuts them off would make
+    Pose guess them). When their face is lost, or ``full_search_interval``
+    seconds have passed, both return None so the next frame is searched in
+    full; ``pose_region()`` is also None until Pose has seen both hips.
+    """
+
+    def __init__(self, full_search_interval=5.0, margin=0.35, min_size=160):
+        self.full_search_interval = full_search_interval
+        self.margin = margin  # Padding around the tracked box, as a fraction of its size
+        self.min_size = min_size  # Smallest ROI side in pixels
+        self.roi = None
+        self.pose_roi = None
+        self.last_full_search = 0.0
+        self.lost_count = 0
+
+    def reset(self):
+        self.roi = None
+        self.pose_roi = None
+        self.last_full_search = 0.0
+
+    def region(self, now):
+        """FaceMesh ROI for the next frame, or None if a full-frame search is due"""
+        if self.roi is None or now - self.last_full_search >= self.full_search_interval:
+            return None
+        return self.roi
+
+    def pose_region(self, now):
+        """Pose ROI for the next frame, or None to run Pose on the full frame"""
+        if self.region(now) is None:
+            return None
+        return self.pose_roi
+
+    def update(self, analysis, user_locked, primary_face=None):
+        """Recompute the ROIs from whatever landmarks this frame produced.
+
+        ``primary_face`` is the index of the primary user's face in
+        ``analysis.face_landmarks``, or None if they are not among the faces.
+        """
+        if analysis.roi is None:
+            self.last_full_search = analysis.timestamp
+        if not user_locked:
+            self.roi = None
+            self.pose_roi = None
+            return
+        if not analysis.face_ready:
+            return  # No new face information on this frame, keep the current ROIs
+
+        if primary_face is None:
+            # Primary user lost (or only other people in view), search the whole frame next time
+            if self.roi is not None:
+                self.lost_count += 1
+            self.roi = None
+            self.pose_roi = None
+            return
+
+        # Face box of the primary user (from the landmarks the identity
+        # tracker already converted), grown downward to include the chin
+        # and neck
+        points = analysis.landmark_points(TRACKED_LANDMARKS)[primary_face]
+        xs = points[:, 0]
+        ys = points[:, 1]
+        x0, x1 = float(xs.min()), float(xs.max())
+        y0, y1 = float(ys.min()), float(ys.max())
+        face_box = (x0, y0, x1, y1)
+        face_width = x1 - x0
+        face_height = y1 - y0
+        self.roi = self._pixel_box(analysis.frame_shape, x0 - face_width, y0,
+                                   x1 + face_width, y1 + face_height * 1.5)
+
+        if analysis.pose_ready:
+            self.pose_roi = self._pose_box(analysis, face_box)
+
+    def _pose_box(self, analysis, face_box):
+        """Pixel box around the head, shoulders and hips of the primary user's pose, or None"""
+        pose_landmarks = analysis.pose_landmarks
+        if not pose_landmarks:
+            return None
+        landmarks = pose_landmarks.landmark
+        if min(landmarks[PoseLandmark.LEFT_HIP].visibility, landmarks[PoseLandmark.RIGHT_HIP].visibility) < 0.5:
+            return None  # Hips out of view: Pose needs the full frame to place them
+        nose = landmarks[PoseLandmark.NOSE]
+        x0, y0, x1, y1 = face_box
+        if not (x0 <= nose.x <= x1 and y0 <= nose.y <= y1):
+            return None  # Pose found someone other than the primary user
+        visible = [p for p in landmarks[:PoseLandmark.RIGHT_HIP + 1] if p.visibility > 0.5]
+        return self._pixel_box(analysis.frame_shape,
+                               min(x0, min(p.x for p in visible)), min(y0, min(p.y for p in visible)),
+                               max(x1, max(p.x for p in visible)), max(y1, max(p.y for p in visible)))
+
+    def _pixel_box(self, frame_shape, x0, y0, x1, y1):
+        """Normalized box padded by ``margin``, clipped to the frame, at least ``min_size`` pixels"""
+        frame_height, frame_width = frame_shape
+        pad_x = (x1 - x0) * self.margin
+        pad_y = (y1 - y0) * self.margin
+        left = int(max(0.0, x0 - pad_x) * frame_width)
+        right = int(min(1.0, x1 + pad_x) * frame_width)
+        top = int(max(0.0, y0 - pad_y) * frame_height)
+        bottom = int(min(1.0, y1 + pad_y) * frame_height)
+        if right - left < self.min_size or bottom - top < self.min_size:
+            # Grow tiny boxes around their centre (e.g. user far from the camera)
+            cx, cy = (left + right) // 2, (top + bottom) // 2
+            half = self.min_size // 2
+            left, right = max(0, cx - half), min(frame_width, cx + half)
+            top, bottom = max(0, cy - half), min(frame_height, cy + half)
+        return (left, top, right, bottom)
+
+
+class MotionGate:
+    """Skips work on frames that look the same as the last analysed one.
+
+    ``check(analysis)`` compares the frame's thumbnail with the thumbnail of
+    the last frame it let through: if the mean absolute difference is at
+    most ``threshold`` grey levels, the frame counts as unchanged and is
+    skipped, at most for ``max_age`` seconds in a row. Frames without a
+    thumbnail (recorded landmark streams) are always let through. ``hits``
+    counts frames let through, ``skips`` frames gated out.
+    """
+
+    def __init__(self, threshold=3.0, max_age=10.0):
+        self.threshold = threshold
+        self.max_age = max_age
+        self.hits = 0
+        self.skips = 0
+        self.reset()
+
+    def reset(self):
+        self._reference = None
+        self._reference_time = None
+        self._checked = None  # (analysis, result) of the last check
+
+    def check(self, analysis):
+        """True if the frame changed (and becomes the new reference).
+
+        Repeated checks of the same analysis return the first answer.
+        """
+        if self._checked is not None and self._checked[0] is analysis:
+            return self._checked[1]
+        thumbnail = getattr(analysis, 'thumbnail', None)
+        changed = (thumbnail is None or self._reference is None
+                   or analysis.timestamp - self._reference_time >= self.max_age
+                   or float(np.mean(np.abs(thumbnail - self._reference))) > self.threshold)
+        if changed:
+            self._reference = thumbnail
+            self._reference_time = analysis.timestamp
+            self.hits += 1
+        else:
+            self.skips += 1
+        self._checked = (analysis, changed)
+        return changed
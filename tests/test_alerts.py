@@ -0,0 +1,85 @@
+import threading
+
+from devwell.alerts import HIGH, LOW, NORMAL, AlertDispatcher
+
+
+class Recorder:
+    """notify/speak callbacks that remember what was delivered"""
+
+    def __init__(self):
+        self.messages = []
+        self.delivered = threading.Event()
+
+    def __call__(self, message):
+        self.messages.append(message)
+        self.delivered.set()
+
+
+def test_submit_coalesces_pending_alerts():
+    dispatcher = AlertDispatcher()
+    first = dispatcher.submit("Blink more", key='blink')
+    second = dispatcher.submit("Blink more often", key='blink')
+    assert second is first
+    assert first.message == "Blink more often"
+    assert dispatcher.pending() == 1
+    assert dispatcher.coalesced == 1
+    assert dispatcher.submit() is None  # Nothing to deliver
+
+
+def test_delivers_by_priority():
+    notify = Recorder()
+    dispatcher = AlertDispatcher(notify=notify, min_gap=0)
+    dispatcher.submit("low", priority=LOW)
+    dispatcher.submit("normal", priority=NORMAL)
+    dispatcher.submit("high", priority=HIGH)
+    dispatcher.submit("bumped", key='bumped', priority=LOW)
+    dispatcher.submit("bumped", key='bumped', priority=HIGH)  # Coalesced, moved up the queue
+    dispatcher.start()
+    dispatcher.stop(drain=True)
+    assert notify.messages == ["high", "bumped", "normal", "low"]
+    assert dispatcher.delivered == 4
+
+
+def test_rate_limits_delivered_keys():
+    notify = Recorder()
+    dispatcher = AlertDispatcher(notify=notify, min_interval=30, min_gap=0)
+    dispatcher.start()
+    try:
+        dispatcher.submit("Sit up", key='posture')
+        assert notify.delivered.wait(5)
+        assert dispatcher.submit("Sit up", key='posture') is None
+        assert dispatcher.rate_limited == 1
+        assert dispatcher.submit("Sit up", key='posture', min_interval=0) is not None
+    finally:
+        dispatcher.stop(drain=True)
+    assert notify.messages == ["Sit up", "Sit up"]
+
+
+def test_cancel_and_expiry():
+    notify = Recorder()
+    dispatcher = AlertDispatcher(notify=notify, max_age=-1, min_gap=0)
+    dispatcher.submit("cancelled", key='a')
+    dispatcher.submit("stale", key='b')
+    assert dispatcher.cancel('a')
+    assert not dispatcher.cancel('a')
+    dispatcher.start()
+    dispatcher.stop(drain=True)
+    assert notify.messages == []
+    assert dispatcher.expired == 1
+
+
+def test_delivery_errors_do_not_stop_the_worker():
+    speak = Recorder()
+
+    def notify(message):
+        raise RuntimeError("no notification daemon")
+
+    dispatcher = AlertDispatcher(notify=notify, speak=speak, min_gap=0)
+    dispatcher.submit("first", speech="first")
+    dispatcher.submit("second", speech="second")
+    dispatcher.start()
+    dispatcher.stop(drain=True)
+    # Both alerts were attempted; a failed notification skips its speech
+    assert dispatcher.delivered == 0
+    assert dispatcher.pending() == 0
+    assert speak.messages == []
@@ -0,0 +1,57 @@
+import random
+import types
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from devwell.vision import (EAR_LANDMARKS, LEFT_EYE_INDICES, RIGHT_EYE_INDICES, FrameAnalysis,  # noqa: E402
+                            eye_aspect_ratios, landmarks_to_array)
+
+
+def fake_faces(count, seed=0):
+    """MediaPipe-like face landmark lists with 468 random points"""
+    rng = random.Random(seed)
+    return [types.SimpleNamespace(landmark=[types.SimpleNamespace(x=rng.random(), y=rng.random(), z=rng.random())
+                                            for _ in range(468)])
+            for _ in range(count)]
+
+
+def reference_ear(landmarks, indices):
+    p = [np.array([landmarks[i].x, landmarks[i].y]) for i in indices]
+    horizontal = np.linalg.norm(p[0] - p[3])
+    vertical = np.linalg.norm(p[1] - p[4]) + np.linalg.norm(p[2] - p[5])
+    return vertical / (2.0 * horizontal) if horizontal > 0.001 else 0.3
+
+
+def test_subset_matches_full_conversion():
+    faces = fake_faces(3)
+    subset = landmarks_to_array(faces, EAR_LANDMARKS)
+    assert subset.shape == (3, 12, 3) and subset.dtype == np.float32
+    np.testing.assert_array_equal(subset, landmarks_to_array(faces)[:, list(EAR_LANDMARKS)])
+    assert landmarks_to_array([], EAR_LANDMARKS).shape == (0, 12, 3)
+
+
+def test_eye_aspect_ratios_match_per_point():
+    faces = fake_faces(4)
+    ears = eye_aspect_ratios(landmarks_to_array(faces, EAR_LANDMARKS))
+    expected = [(reference_ear(face.landmark, LEFT_EYE_INDICES), reference_ear(face.landmark, RIGHT_EYE_INDICES))
+                for face in faces]
+    np.testing.assert_allclose(ears, expected, rtol=1e-4)
+    assert eye_aspect_ratios(np.empty((0, 12, 3))).shape == (0, 2)
+
+
+def test_degenerate_eye_gets_default():
+    points = np.zeros((1, 12, 3), dtype=np.float32)
+    np.testing.assert_allclose(eye_aspect_ratios(points), [[0.3, 0.3]])
+
+
+def test_analysis_converts_each_subset_once():
+    faces = fake_faces(2)
+    face_mesh = types.SimpleNamespace(process=lambda image: types.SimpleNamespace(multi_face_landmarks=faces))
+    analysis = FrameAnalysis(np.zeros((48, 64, 3), dtype=np.uint8), face_mesh, None, timestamp=0.0)
+    eyes = analysis.eye_points
+    assert analysis.eye_points is eyes
+    assert analysis._face_points is None  # Nothing converted the full face
+    np.testing.assert_array_equal(eyes, landmarks_to_array(faces, EAR_LANDMARKS))
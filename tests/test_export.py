@@ -0,0 +1,128 @@
+import csv
+import gzip
+import os
+
+import pytest
+
+from devwell.export import ExportCancelled, Exporter, main
+from devwell.storage import Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "devwell.db"))
+    database.initialize()
+    conn = database.connect()
+    with conn:
+        # The first rows have NULL user_id and mean_ear, like a history that
+        # predates per-user tracking
+        conn.executemany(
+            "INSERT INTO blink_data (timestamp, blink_count, minute_interval, mean_ear, user_id) "
+            "VALUES (?, ?, 1, ?, ?)",
+            [(f"2024-01-01 {i // 60:02d}:{i % 60:02d}:00", i, None if i < 30 else 0.3 + i / 1000,
+              None if i < 30 else f"user_{i % 3 + 1}")
+             for i in range(100)])
+    conn.close()
+    return database
+
+
+def read_csv(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', newline='') as f:
+        return list(csv.reader(f))
+
+
+@pytest.mark.parametrize('name', ['blinks.csv', 'blinks.csv.gz'])
+def test_csv_round_trip(database, tmp_path, name):
+    path = str(tmp_path / name)
+    assert Exporter(database, 'blink_data', path, chunk_size=7).run() == 100
+    rows = read_csv(path)
+    assert rows[0][:3] == ['id', 'timestamp', 'blink_count']
+    assert len(rows) == 101
+    assert [int(row[0]) for row in rows[1:]] == list(range(1, 101))
+    user_id = rows[0].index('user_id')
+    assert rows[1][user_id] == '' and rows[-1][user_id] == 'user_1'
+    assert not os.path.exists(path + '.progress')
+
+
+def test_csv_date_range(database, tmp_path):
+    path = str(tmp_path / "blinks.csv")
+    exporter = Exporter(database, 'blink_data', path, start="2024-01-01 00:50:00", end="2024-01-01 01:10:00")
+    assert exporter.run() == 20
+
+
+@pytest.mark.parametrize('name', ['blinks.csv', 'blinks.csv.gz'])
+def test_csv_resume(database, tmp_path, name):
+    path = str(tmp_path / name)
+
+    def interrupt(rows):
+        if rows >= 40:
+            raise KeyboardInterrupt
+
+    exporter = Exporter(database, 'blink_data', path, chunk_size=20, progress=interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        exporter.run()
+    assert os.path.exists(path + '.progress')
+    # Bytes written after the last checkpoint are dropped on resume
+    with open(path, 'ab') as f:
+        f.write(gzip.compress(b"junk\n") if name.endswith('.gz') else b"junk\n")
+
+    assert Exporter(database, 'blink_data', path, chunk_size=20).run(resume=True) == 100
+    rows = read_csv(path)
+    assert [int(row[0]) for row in rows[1:]] == list(range(1, 101))
+    assert not os.path.exists(path + '.progress')
+
+
+@pytest.mark.parametrize('damage', ['delete', 'truncate'])
+def test_resume_restarts_without_output(database, tmp_path, damage):
+    path = str(tmp_path / "blinks.csv")
+    exporter = Exporter(database, 'blink_data', path, chunk_size=20, progress=lambda rows: exporter.cancel())
+    with pytest.raises(ExportCancelled):
+        exporter.run()
+    if damage == 'delete':
+        os.remove(path)
+    else:
+        os.truncate(path, 10)
+    assert Exporter(database, 'blink_data', path, chunk_size=20).run(resume=True) == 100
+    rows = read_csv(path)
+    assert rows[0][0] == 'id'
+    assert [int(row[0]) for row in rows[1:]] == list(range(1, 101))
+
+
+def test_resume_rejects_other_range(database, tmp_path):
+    path = str(tmp_path / "blinks.csv")
+    exporter = Exporter(database, 'blink_data', path, chunk_size=20, progress=lambda rows: exporter.cancel())
+    with pytest.raises(ExportCancelled):
+        exporter.run()
+    with pytest.raises(ValueError):
+        Exporter(database, 'blink_data', path, start="2024-01-01").run(resume=True)
+
+
+def test_parquet_round_trip(database, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / "blinks.parquet")
+    # Every value of the first chunk's user_id and mean_ear is NULL
+    assert Exporter(database, 'blink_data', path, chunk_size=10).run() == 100
+    table = pq.read_table(path)
+    assert table.num_rows == 100
+    assert str(table.schema.field('user_id').type) == 'string'
+    assert str(table.schema.field('mean_ear').type) == 'double'
+    assert str(table.schema.field('blink_count').type) == 'int64'
+    assert table.column('user_id').to_pylist()[-1] == 'user_1'
+
+
+def test_parquet_resume_refused(database, tmp_path):
+    path = str(tmp_path / "blinks.parquet")
+    exporter = Exporter(database, 'blink_data', path)
+    assert not exporter.resumable
+    with pytest.raises(ValueError):
+        exporter.run(resume=True)
+    assert main(['blink_data', path, '--db', database.path, '--resume']) == 2
+    assert not os.path.exists(path)
+
+
+def test_main_exports(database, tmp_path, capsys):
+    path = str(tmp_path / "blinks.csv")
+    assert main(['blink_data', path, '--db', database.path]) == 0
+    assert "Exported 100 rows" in capsys.readouterr().out
+    assert len(read_csv(path)) == 101
@@ -0,0 +1,132 @@
+from devwell.monitors import BlinkMonitor, PostureMonitor, StaticImageMonitor, TirednessMonitor, UserPresenceMonitor
+
+
+def feed(monitor, samples):
+    """Events of feeding (timestamp, measurement) samples, in order"""
+    events = []
+    for timestamp, value in samples:
+        events += monitor.update(timestamp, value)
+    return events
+
+
+def kinds(events):
+    return [event.kind for event in events]
+
+
+def test_blink_counted_once_per_closure():
+    monitor = BlinkMonitor(ear_threshold=0.2)
+    # Eyes closed for three samples in a row are one blink
+    events = feed(monitor, [(0.0, 0.3), (0.1, 0.15), (0.2, 0.1), (0.3, 0.15), (0.4, 0.3), (0.5, 0.1), (0.6, 0.3)])
+    assert kinds(events) == ['blink', 'blink']
+    assert [event.data['count'] for event in events] == [1, 2]
+    assert monitor.last_blink == 0.5
+
+
+def test_blink_minute_summary():
+    monitor = BlinkMonitor(ear_threshold=0.2, min_blinks_per_minute=17, interval=60)
+    samples = [(t, 0.1 if t % 10 == 5 else 0.3) for t in range(0, 60)]
+    events = feed(monitor, samples)
+    assert kinds(events).count('blink') == 6
+    events = monitor.update(60.0, 0.3)
+    assert kinds(events) == ['low_blink_rate', 'blink_minute']
+    assert events[0].data == {'count': 6}
+    summary = events[1].data
+    assert summary['start'] == 0.0 and summary['count'] == 6
+    assert summary['closed_seconds'] == 6.0  # Each closure lasted until the next sample
+    assert abs(summary['mean_ear'] - (54 * 0.3 + 6 * 0.1 + 0.3) / 61) < 1e-9
+    # The next minute starts from scratch
+    assert monitor.count == 0 and monitor.minute_start == 60.0
+
+
+def test_enough_blinks_is_not_low():
+    monitor = BlinkMonitor(ear_threshold=0.2, min_blinks_per_minute=2, interval=60)
+    events = feed(monitor, [(10, 0.1), (11, 0.3), (20, 0.1), (21, 0.3), (60, 0.3)])
+    assert kinds(events) == ['blink', 'blink', 'blink_minute']
+
+
+def test_tiredness_after_closed_seconds():
+    monitor = TirednessMonitor(ear_threshold=0.2, closed_seconds=30, cooldown=300)
+    assert feed(monitor, [(t, 0.1) for t in range(0, 30)]) == []
+    events = monitor.update(30.0, 0.1)
+    assert kinds(events) == ['tiredness'] and events[0].data == {'closed_for': 30.0}
+    # Not repeated within the cooldown, even after opening and closing again
+    assert feed(monitor, [(31, 0.3)] + [(t, 0.1) for t in range(40, 100)]) == []
+    assert kinds(feed(monitor, [(t, 0.1) for t in range(100, 331)])) == ['tiredness']
+
+
+def test_tiredness_timer_resets_when_eyes_open():
+    monitor = TirednessMonitor(ear_threshold=0.2, closed_seconds=30)
+    assert feed(monitor, [(0, 0.1), (25, 0.1), (26, 0.3), (27, 0.1), (50, 0.1)]) == []
+    assert kinds(monitor.update(57, 0.1)) == ['tiredness']
+
+
+def test_static_image():
+    monitor = StaticImageMonitor(no_blink_seconds=50, cooldown=300)
+    assert monitor.update(49.0, 0.0) == []
+    events = monitor.update(50.0, 0.0)
+    assert kinds(events) == ['static_image'] and events[0].data == {'seconds': 50.0}
+    assert monitor.update(120.0, 0.0) == []  # Cooldown
+    assert monitor.update(200.0, 199.0) == []  # A blink was seen
+    assert kinds(monitor.update(400.0, 0.0)) == ['static_image']
+
+
+def stages(events):
+    return [event.data['stage'] for event in events if event.kind == 'posture_stage']
+
+
+def test_posture_escalation():
+    monitor = PostureMonitor(bad_score=40, fair_score=70, alert_after=120, cooldown=180)
+    assert stages(monitor.update(0, 80)) == ['good']
+    assert stages(monitor.update(1, 50)) == ['fair']
+    events = feed(monitor, [(t, 20) for t in range(10, 131, 10)])
+    assert stages(events) == ['poor', 'poor', 'poor', 'warning', 'warning', 'warning',
+                              'countdown', 'countdown', 'countdown', 'countdown', 'countdown', 'countdown', 'alert']
+    assert [event.kind for event in events if event.kind != 'posture_stage'] == [
+        'posture_warning', 'posture_countdown', 'posture_alert']
+    countdown = next(event for event in events if event.kind == 'posture_countdown')
+    assert countdown.data == {'remaining': 60}
+    # Still bad: the alert is repeated only after the cooldown
+    assert 'posture_alert' not in kinds(feed(monitor, [(t, 20) for t in range(140, 300, 10)]))
+    assert 'posture_alert' in kinds(monitor.update(310, 20))
+
+
+def test_good_posture_resets_the_timer():
+    monitor = PostureMonitor(bad_score=40, alert_after=120)
+    feed(monitor, [(t, 20) for t in range(0, 100, 10)])
+    assert stages(monitor.update(100, 90)) == ['good']
+    assert stages(monitor.update(110, 20)) == ['poor']
+    assert monitor.update(110, 20)[0].data['duration'] == 0
+
+
+def test_primary_user_found_and_lost():
+    monitor = UserPresenceMonitor(user_timeout=3)
+    events = monitor.update(0.0, ['user_1'])
+    assert kinds(events) == ['primary_user_found', 'user_count']
+    assert events[0].data == {'user_id': 'user_1'}
+    assert kinds(monitor.update(2.0, [])) == []  # Briefly out of view
+    assert monitor.primary_user_id == 'user_1'
+    events = monitor.update(4.0, [])
+    assert kinds(events) == ['primary_user_lost'] and events[0].data == {'user_id': 'user_1'}
+    assert monitor.primary_user_id is None
+
+
+def test_multiple_users():
+    monitor = UserPresenceMonitor(user_timeout=3)
+    events = monitor.update(0.0, ['user_1', 'user_2'])
+    assert kinds(events) == ['primary_user_found', 'multiple_users', 'user_count']
+    assert events[1].data == {'count': 2}
+    assert kinds(monitor.update(1.0, ['user_1', 'user_2'])) == ['user_count']  # Alerted once
+    assert kinds(monitor.update(2.0, ['user_1'])) == ['single_user', 'user_count']
+    assert monitor.primary_user_id == 'user_1'
+
+
+def test_primary_user_handed_over():
+    monitor = UserPresenceMonitor(user_timeout=3)
+    monitor.update(0.0, ['user_1', 'user_2'])
+    # user_1 leaves, user_2 stays at the desk
+    assert kinds(monitor.update(2.0, ['user_2'])) == ['single_user', 'user_count']
+    assert monitor.primary_user_id == 'user_1'
+    events = monitor.update(4.0, ['user_2'])
+    assert kinds(events) == ['primary_user_lost', 'primary_user_found', 'user_count']
+    assert [event.data.get('user_id') for event in events[:2]] == ['user_1', 'user_2']
+    assert monitor.primary_user_id == 'user_2'
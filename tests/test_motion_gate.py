@@ -0,0 +1,51 @@
+import types
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from devwell.vision import FrameAnalysis, MotionGate  # noqa: E402
+
+
+def analysis(level, timestamp, noise_seed=None):
+    """FrameAnalysis of a flat grey 640x480 frame, optionally with sensor noise"""
+    frame = np.full((480, 640, 3), level, dtype=np.uint8)
+    if noise_seed is not None:
+        noise = np.random.default_rng(noise_seed).integers(-2, 3, frame.shape)
+        frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+    return FrameAnalysis(frame, face_mesh=None, pose=None, timestamp=timestamp)
+
+
+def test_skips_unchanged_frames():
+    gate = MotionGate(threshold=3.0, max_age=10.0)
+    assert gate.check(analysis(100, 0.0))  # First frame is the reference
+    assert not gate.check(analysis(100, 0.1, noise_seed=1))
+    assert not gate.check(analysis(101, 0.2, noise_seed=2))
+    assert gate.check(analysis(140, 0.3))
+    assert (gate.hits, gate.skips) == (2, 2)
+
+
+def test_reference_expires():
+    gate = MotionGate(threshold=3.0, max_age=1.0)
+    assert gate.check(analysis(100, 0.0))
+    assert not gate.check(analysis(100, 0.5))
+    assert gate.check(analysis(100, 1.0))  # Re-analysed at least every max_age seconds
+    assert not gate.check(analysis(100, 1.5))
+
+
+def test_repeated_check_returns_first_answer():
+    gate = MotionGate()
+    first = analysis(100, 0.0)
+    assert gate.check(first)
+    assert gate.check(first)
+    assert gate.hits == 1
+
+
+def test_frames_without_thumbnail_pass():
+    gate = MotionGate()
+    # Recorded landmark streams have no frame to compare
+    assert gate.check(types.SimpleNamespace(timestamp=0.0, thumbnail=None))
+    assert gate.check(types.SimpleNamespace(timestamp=0.1, thumbnail=None))
+    gate.reset()
+    assert gate.check(analysis(100, 0.2))
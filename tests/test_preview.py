@@ -0,0 +1,31 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from devwell.preview import PreviewBuffer  # noqa: E402
+
+
+def publish(preview, value, now):
+    preview.write_buffer((2, 2, 3))[:] = value
+    preview.publish(now)
+
+
+def test_newest_frame_wins_and_replaced_frames_are_dropped():
+    preview = PreviewBuffer(max_fps=0)
+    publish(preview, 1, 0.0)
+    publish(preview, 2, 0.1)  # The GUI never saw frame 1
+    assert (preview.pending, preview.dropped) == (1, 1)
+    assert preview.take()[0, 0, 0] == 2
+    assert preview.take() is None
+    assert (preview.pending, preview.published, preview.dropped) == (0, 2, 1)
+
+
+def test_fps_cap_and_disabled_preview_skip_frames():
+    preview = PreviewBuffer(max_fps=10)
+    assert preview.wants_frame(1.0)
+    publish(preview, 1, 1.0)
+    assert not preview.wants_frame(1.05)
+    assert preview.wants_frame(1.1)
+    preview.enabled = False
+    assert not preview.wants_frame(5.0)
+    assert preview.skipped == 2
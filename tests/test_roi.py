@@ -0,0 +1,93 @@
+import types
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from devwell.tracking import TRACKED_LANDMARKS  # noqa: E402
+from devwell.vision import PoseLandmark, RoiTracker  # noqa: E402
+
+
+def face(x0, y0, size=0.1):
+    """TRACKED_LANDMARKS points of a face filling the box at x0, y0"""
+    points = np.full((len(TRACKED_LANDMARKS), 3), (x0 + size / 2, y0 + size / 2, 0), dtype=np.float32)
+    points[0, :2] = (x0, y0)
+    points[1, :2] = (x0 + size, y0 + size)
+    return points
+
+
+def pose(nose, hips_visible=True):
+    """Pose landmarks of someone whose nose is at ``nose`` and hips at y=0.9"""
+    landmarks = [types.SimpleNamespace(x=nose[0], y=nose[1] + 0.15, visibility=0.9) for _ in range(33)]
+    landmarks[PoseLandmark.NOSE] = types.SimpleNamespace(x=nose[0], y=nose[1], visibility=0.9)
+    for hip, dx in ((PoseLandmark.LEFT_HIP, 0.1), (PoseLandmark.RIGHT_HIP, -0.1)):
+        landmarks[hip] = types.SimpleNamespace(x=nose[0] + dx, y=0.9, visibility=0.9 if hips_visible else 0.1)
+    return types.SimpleNamespace(landmark=landmarks)
+
+
+def analysis(faces, timestamp=0.0, roi=None, pose_landmarks=None):
+    points = np.stack(faces) if faces else np.empty((0, len(TRACKED_LANDMARKS), 3))
+    return types.SimpleNamespace(roi=roi, timestamp=timestamp, face_ready=True,
+                                 pose_ready=pose_landmarks is not None, pose_landmarks=pose_landmarks,
+                                 landmark_points=lambda indices: points, frame_shape=(1000, 1000))
+
+
+def center(roi):
+    return (roi[0] + roi[2]) / 2, (roi[1] + roi[3]) / 2
+
+
+def test_roi_follows_primary_face():
+    tracker = RoiTracker()
+    faces = [face(0.1, 0.1), face(0.7, 0.1)]
+    tracker.update(analysis(faces), user_locked=True, primary_face=1)
+    x, _ = center(tracker.region(0.1))
+    assert x > 500  # Around the second face, not the first one
+    tracker.update(analysis(faces), user_locked=True, primary_face=0)
+    x, _ = center(tracker.region(0.1))
+    assert x < 500
+
+
+def test_roi_cleared_when_primary_user_not_in_frame():
+    tracker = RoiTracker()
+    tracker.update(analysis([face(0.4, 0.4)]), user_locked=True, primary_face=0)
+    assert tracker.region(0.1) is not None
+    # Someone else is in view, but not the primary user
+    tracker.update(analysis([face(0.7, 0.1)], timestamp=0.1, roi=tracker.roi), user_locked=True, primary_face=None)
+    assert tracker.region(0.2) is None
+    assert tracker.lost_count == 1
+
+
+def test_roi_needs_a_locked_user_and_expires():
+    tracker = RoiTracker(full_search_interval=5.0)
+    tracker.update(analysis([face(0.4, 0.4)]), user_locked=False, primary_face=0)
+    assert tracker.region(0.1) is None
+    tracker.update(analysis([face(0.4, 0.4)]), user_locked=True, primary_face=0)
+    assert tracker.region(4.9) is not None
+    assert tracker.region(5.0) is None  # Periodic full-frame search
+
+
+def test_pose_roi_covers_the_hips():
+    tracker = RoiTracker()
+    tracker.update(analysis([face(0.4, 0.2)], pose_landmarks=pose((0.45, 0.25))), user_locked=True, primary_face=0)
+    face_roi, pose_roi = tracker.region(0.1), tracker.pose_region(0.1)
+    assert face_roi[3] < 900  # FaceMesh gets a tight crop around the face
+    assert pose_roi[3] >= 900 and pose_roi[1] <= face_roi[1]
+    # Frames without a Pose run keep the pose ROI
+    tracker.update(analysis([face(0.41, 0.2)], timestamp=0.1, roi=face_roi), user_locked=True, primary_face=0)
+    assert tracker.pose_region(0.2) == pose_roi
+    # Lost with the face, and on full searches
+    assert tracker.pose_region(5.0) is None
+    tracker.update(analysis([], timestamp=0.2), user_locked=True, primary_face=None)
+    assert tracker.pose_region(0.3) is None
+
+
+def test_pose_roi_needs_the_primary_users_hips():
+    tracker = RoiTracker()
+    tracker.update(analysis([face(0.4, 0.2)], pose_landmarks=pose((0.45, 0.25), hips_visible=False)),
+                   user_locked=True, primary_face=0)
+    assert tracker.region(0.1) is not None
+    assert tracker.pose_region(0.1) is None  # Pose keeps the full frame
+    # Pose locked onto somebody else
+    tracker.update(analysis([face(0.4, 0.2)], pose_landmarks=pose((0.8, 0.25))), user_locked=True, primary_face=0)
+    assert tracker.pose_region(0.1) is None
@@ -0,0 +1,229 @@
+import sqlite3
+import time
+
+import pytest
+
+from devwell.storage import (ACTIVITY_COLUMNS, ROLLUPS, ActivityWriter, BackgroundWriter, BlinkWriter, Database,
+                             UserWriter, compact_blink_data, load_users, rebuild_rollups)
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "devwell.db"))
+    database.initialize()
+    return database
+
+
+def columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def test_migrates_old_schema(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    with conn:
+        # Schema of the original single-file application
+        conn.execute("""
+            CREATE TABLE activity (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                eye_alerts INTEGER DEFAULT 0,
+                posture_alerts INTEGER DEFAULT 0,
+                breaks_taken INTEGER DEFAULT 0,
+                keyboard_activity INTEGER DEFAULT 0,
+                mouse_activity INTEGER DEFAULT 0,
+                low_light_alerts INTEGER DEFAULT 0,
+                session_duration INTEGER DEFAULT 0
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE blink_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                blink_count INTEGER,
+                minute_interval INTEGER
+            )
+        """)
+        conn.execute("INSERT INTO activity (timestamp, keyboard_activity) VALUES ('2024-01-01 09:15:00', 10)")
+        conn.execute("INSERT INTO activity (timestamp, keyboard_activity) VALUES ('2024-01-01 09:45:00', 5)")
+        conn.execute("INSERT INTO blink_data (timestamp, blink_count, minute_interval) VALUES ('2024-01-01', 12, 1)")
+    conn.close()
+
+    database = Database(path)
+    database.initialize()
+    database.initialize()  # Migrations are idempotent
+    conn = database.connect(readonly=True)
+    assert 'user_id' in columns(conn, 'activity')
+    assert {'resolution', 'mean_ear', 'closed_seconds', 'user_id'} <= columns(conn, 'blink_data')
+    assert conn.execute("SELECT resolution, user_id FROM blink_data").fetchone() == (60, None)
+    # Existing history is backfilled into the rollups
+    assert conn.execute("SELECT hour, keyboard_activity FROM activity_hourly").fetchall() == [
+        ('2024-01-01 09:00:00', 15)]
+    assert conn.execute("SELECT setting_value FROM settings WHERE setting_name = 'ear_threshold'").fetchone() == (
+        '0.45',)
+    conn.close()
+
+
+def test_rebuild_rollups(database):
+    conn = database.connect()
+    with conn:
+        conn.executemany(
+            "INSERT INTO activity (timestamp, user_id, eye_alerts, mouse_activity) VALUES (?, ?, ?, ?)",
+            [('2024-01-01 09:10:00', 'user_1', 1, 100),
+             ('2024-01-01 09:50:00', 'user_2', 2, 50),
+             ('2024-01-01 10:05:00', None, 0, 25),
+             ('2024-01-02 08:00:00', 'user_1', 4, 0)])
+    rebuild_rollups(conn)
+    assert conn.execute("SELECT hour, eye_alerts, mouse_activity FROM activity_hourly ORDER BY hour").fetchall() == [
+        ('2024-01-01 09:00:00', 3, 150),
+        ('2024-01-01 10:00:00', 0, 25),
+        ('2024-01-02 08:00:00', 4, 0)]
+    assert conn.execute("SELECT day, eye_alerts, mouse_activity FROM activity_daily ORDER BY day").fetchall() == [
+        ('2024-01-01', 3, 175),
+        ('2024-01-02', 4, 0)]
+    conn.close()
+
+
+def test_compact_blink_data_per_user(database):
+    conn = database.connect()
+    with conn:
+        old = conn.execute("SELECT strftime('%Y-%m-%d %H:00:00', 'now', '-10 days')").fetchone()[0]
+        rows = [(f"{old[:14]}{minute:02d}:00", 10, 0.2, 1.0, 'user_1') for minute in range(3)]
+        rows += [(f"{old[:14]}{minute:02d}:00", 20, None, 0.0, 'user_2') for minute in range(2)]
+        rows.append((conn.execute("SELECT datetime('now')").fetchone()[0], 5, 0.3, 0.0, 'user_1'))
+        conn.executemany("""
+            INSERT INTO blink_data
+                (timestamp, blink_count, minute_interval, resolution, mean_ear, closed_seconds, user_id)
+            VALUES (?, ?, 1, 60, ?, ?, ?)
+        """, rows)
+    assert compact_blink_data(conn) == (5, 0)
+    hourly = conn.execute("""
+        SELECT user_id, timestamp, blink_count, minute_interval, mean_ear, closed_seconds
+        FROM blink_data WHERE resolution = 3600 ORDER BY user_id
+    """).fetchall()
+    assert hourly == [('user_1', old, 30, 3, pytest.approx(0.2), 3.0),
+                      ('user_2', old, 40, 2, None, 0.0)]
+    # Recent minutes are kept as they are
+    assert conn.execute("SELECT COUNT(*) FROM blink_data WHERE resolution = 60").fetchone() == (1,)
+    assert compact_blink_data(conn) == (0, 0)
+    conn.close()
+
+
+def test_background_writer_is_abstract(database):
+    with pytest.raises(TypeError):
+        BackgroundWriter(database)
+
+
+def test_activity_writer_keeps_rows_per_user(database):
+    writer = ActivityWriter(database, flush_interval=60)
+    writer.start()
+    try:
+        writer.add('user_1', keyboard_activity=100)
+        writer.add('user_2', keyboard_activity=7, eye_alerts=1)
+        writer.add(None, mouse_activity=3)
+        writer.flush()
+        writer.add('user_1', keyboard_activity=50)
+        writer.flush()
+    finally:
+        writer.close()
+    conn = database.connect(readonly=True)
+    rows = conn.execute("SELECT user_id, keyboard_activity, mouse_activity, eye_alerts FROM activity").fetchall()
+    assert sorted(rows, key=lambda row: row[0] or '') == [
+        (None, 0, 3, 0), ('user_1', 150, 0, 0), ('user_2', 7, 0, 1)]
+    assert conn.execute("SELECT keyboard_activity, mouse_activity, eye_alerts FROM activity_daily").fetchall() == [
+        (157, 3, 1)]
+    conn.close()
+    with pytest.raises(ValueError):
+        writer.add('user_1', not_a_column=1)
+
+
+def test_live_rollups_match_rebuild(database):
+    conn = database.connect()
+    with conn:
+        # A session row from two days ago is still open for this writer
+        conn.execute("INSERT INTO activity (timestamp, user_id, keyboard_activity) "
+                     "VALUES (datetime('now', '-2 days'), 'user_1', 0)")
+    writer = ActivityWriter(database, flush_interval=60, session_window=3 * 86400)
+    writer.start()
+    try:
+        writer.add('user_1', keyboard_activity=10)
+        writer.add('user_2', keyboard_activity=5)
+        writer.flush()
+        writer.add('user_1', keyboard_activity=1)
+        writer.flush()
+    finally:
+        writer.close()
+    live = {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall() for table in ROLLUPS}
+    assert len(live['activity_daily']) == 2  # Increments go to the day the row started, not the flush day
+    rebuild_rollups(conn)
+    assert {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall() for table in ROLLUPS} == live
+    conn.close()
+
+
+class FlakyActivityWriter(ActivityWriter):
+    """Fails its first write"""
+
+    failures = 1
+
+    def _write(self, conn, pending):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        super()._write(conn, pending)
+
+
+def test_failed_write_is_retried(database):
+    writer = FlakyActivityWriter(database, flush_interval=60)
+    writer.start()
+    try:
+        writer.add('user_1', keyboard_activity=10)
+        writer.flush()
+        assert writer.flush_count == 0
+        # Increments added after the failure are merged with the restored ones
+        writer.add('user_1', keyboard_activity=5)
+        writer.flush()
+        assert writer.flush_count == 1
+    finally:
+        writer.close()
+    conn = database.connect(readonly=True)
+    assert conn.execute("SELECT user_id, keyboard_activity FROM activity").fetchall() == [('user_1', 15)]
+    conn.close()
+
+
+def test_close_flushes_pending(database):
+    writer = BlinkWriter(database, flush_interval=60, compact_interval=3600)
+    writer.start()
+    start = time.time() // 60 * 60
+    writer.add(start, 15, 0.31, 2.5, user_id='user_1')
+    writer.close()
+    conn = database.connect(readonly=True)
+    assert conn.execute("SELECT timestamp, blink_count, mean_ear, closed_seconds, user_id, resolution "
+                        "FROM blink_data").fetchall() == [
+        (time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(start)), 15, 0.31, 2.5, 'user_1', 60)]
+    conn.close()
+
+
+def test_user_writer_upserts(database):
+    writer = UserWriter(database, flush_interval=60)
+    writer.start()
+    try:
+        writer.add('user_1', b'\x00' * 4, 1704067200)
+        writer.add('user_2', b'\x01' * 4, 1704067260)
+        writer.flush()
+        writer.add('user_1', None, 1704070800)  # No embedding: the stored one is kept
+        writer.flush()
+    finally:
+        writer.close()
+    conn = database.connect(readonly=True)
+    assert conn.execute("SELECT user_id, first_seen, last_seen FROM users ORDER BY user_id").fetchall() == [
+        ('user_1', '2024-01-01 00:00:00', '2024-01-01 01:00:00'),
+        ('user_2', '2024-01-01 00:01:00', '2024-01-01 00:01:00')]
+    assert load_users(conn) == [('user_2', b'\x01' * 4), ('user_1', b'\x00' * 4)]
+    conn.close()
+
+
+def test_activity_columns_match_schema(database):
+    conn = database.connect(readonly=True)
+    assert set(ACTIVITY_COLUMNS) <= columns(conn, 'activity')
+    assert set(ACTIVITY_COLUMNS) <= columns(conn, 'activity_hourly')
+    conn.close()
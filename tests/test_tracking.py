@@ -0,0 +1,80 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from devwell.tracking import TRACKED_LANDMARKS, IdentityTracker, face_embeddings  # noqa: E402
+
+
+def make_face(seed):
+    """Normalized TRACKED_LANDMARKS of a synthetic face with its own geometry"""
+    return np.random.default_rng(seed).uniform(0, 1, (len(TRACKED_LANDMARKS), 3))
+
+
+def place(face, x, y, size=0.2):
+    """Face landmarks scaled to ``size`` with their corner at x, y"""
+    return face * [size, size, 1] + [x, y, 0]
+
+
+ALICE = make_face(1)
+BOB = make_face(2)
+
+
+def test_embedding_ignores_position_and_scale():
+    embeddings = face_embeddings(np.stack([place(ALICE, 0.1, 0.1), place(ALICE, 0.5, 0.4, size=0.3)]))
+    assert embeddings.dtype == np.float32
+    np.testing.assert_allclose(embeddings[0], embeddings[1], rtol=1e-5)
+
+
+def test_moving_face_keeps_its_id():
+    tracker = IdentityTracker()
+    ids = [tracker.update(np.stack([place(ALICE, 0.1 + 0.01 * step, 0.1)]), step * 0.1)
+           for step in range(20)]
+    assert ids == [['user_1']] * 20
+
+
+def test_two_faces_get_distinct_ids():
+    tracker = IdentityTracker()
+    assert tracker.update(np.stack([place(ALICE, 0.1, 0.1), place(BOB, 0.6, 0.1)]), 0.0) == ['user_1', 'user_2']
+    # Listed in the other order, each face keeps its own ID
+    assert tracker.update(np.stack([place(BOB, 0.61, 0.1), place(ALICE, 0.11, 0.1)]), 0.1) == ['user_2', 'user_1']
+    assert tracker.update(np.empty((0, len(TRACKED_LANDMARKS), 3)), 0.2) == []
+
+
+def test_returning_face_is_reidentified():
+    tracker = IdentityTracker(active_timeout=3.0)
+    assert tracker.update(np.stack([place(ALICE, 0.1, 0.1)]), 0.0) == ['user_1']
+    assert tracker.update(np.stack([place(BOB, 0.6, 0.5)]), 1.0) == ['user_2']
+    # Alice comes back elsewhere in the frame after her track has expired
+    assert tracker.update(np.stack([place(ALICE, 0.5, 0.5, size=0.25)]), 10.0) == ['user_1']
+    assert [track.user_id for track in tracker.tracks] == ['user_1']
+
+
+def test_reset_keeps_profiles():
+    tracker = IdentityTracker()
+    tracker.update(np.stack([place(ALICE, 0.1, 0.1)]), 0.0)
+    tracker.reset()
+    assert tracker.tracks == []
+    assert tracker.update(np.stack([place(ALICE, 0.4, 0.3)]), 0.1) == ['user_1']
+
+
+def test_profiles_round_trip():
+    tracker = IdentityTracker()
+    tracker.update(np.stack([place(ALICE, 0.1, 0.1), place(BOB, 0.6, 0.1)]), 0.0)
+    stored = [(user_id, tracker.embedding_bytes(user_id)) for user_id in ('user_1', 'user_2')]
+    assert tracker.embedding_bytes('user_9') is None
+
+    restored = IdentityTracker()
+    restored.load_profiles(stored + [('user_7', None), ('user_8', b'\x00' * 8)])
+    assert list(restored.profiles) == ['user_1', 'user_2']  # Empty and old-layout profiles are skipped
+    assert restored.update(np.stack([place(BOB, 0.3, 0.3)]), 0.0) == ['user_2']
+    # New users never reuse a stored ID
+    assert restored.update(np.stack([place(BOB, 0.3, 0.3), place(make_face(3), 0.7, 0.7)]), 0.1) == [
+        'user_2', 'user_9']
+
+
+def test_profiles_are_bounded():
+    tracker = IdentityTracker(max_tracks=2, max_profiles=3)
+    for seed in range(5):
+        tracker.update(np.stack([place(make_face(10 + seed), 0.05 + seed * 0.2, 0.1, size=0.1)]), seed * 0.1)
+    assert len(tracker.tracks) == 2
+    assert list(tracker.profiles) == ['user_3', 'user_4', 'user_5']